@@ -20,7 +20,82 @@ class Config:
     TOPIC_ID: Optional[int]
     LOG_LEVEL: str
     GOOGLE_CALENDAR_ID: str = os.getenv("GOOGLE_CALENDAR_ID", "primary")
-    
+    # Список синхронизируемых календарей через запятую (например, календари
+    # ресурсов‑аудиторий). Если не задан — используется GOOGLE_CALENDAR_ID.
+    GOOGLE_CALENDAR_IDS: list[str] = [
+        calendar_id.strip()
+        for calendar_id in os.getenv("GOOGLE_CALENDAR_IDS", "").split(",")
+        if calendar_id.strip()
+    ] or [GOOGLE_CALENDAR_ID]
+    # Сколько календарей синхронизируется одновременно.
+    CALENDAR_SYNC_CONCURRENCY: int = int(os.getenv("CALENDAR_SYNC_CONCURRENCY", "3"))
+
+    # Запросы к Google Calendar выполняются в отдельном пуле потоков,
+    # чтобы не блокировать event loop бота.
+    GOOGLE_API_TIMEOUT: float = float(os.getenv("GOOGLE_API_TIMEOUT", "30"))
+    GOOGLE_API_MAX_WORKERS: int = int(os.getenv("GOOGLE_API_MAX_WORKERS", "2"))
+    # Размер страницы events().list (maxResults, Google допускает до 2500).
+    GOOGLE_CALENDAR_PAGE_SIZE: int = int(os.getenv("GOOGLE_CALENDAR_PAGE_SIZE", "250"))
+    # Инкрементальная синхронизация по syncToken (минуты) и контрольная
+    # полная синхронизация окна CALENDAR_SYNC_WINDOW_DAYS (часы). Окно
+    # ограничивает и первую выборку, выдающую syncToken: повторяющиеся
+    # события разворачиваются в экземпляры только в его пределах.
+    CALENDAR_SYNC_INTERVAL_MINUTES: int = int(os.getenv("CALENDAR_SYNC_INTERVAL_MINUTES", "5"))
+    CALENDAR_FULL_SYNC_HOURS: int = int(os.getenv("CALENDAR_FULL_SYNC_HOURS", "6"))
+    CALENDAR_SYNC_WINDOW_DAYS: int = int(os.getenv("CALENDAR_SYNC_WINDOW_DAYS", "30"))
+    # Push‑уведомления Google Calendar (events.watch). Публичный HTTPS‑адрес
+    # приёмника; пустое значение отключает вебхук. HOST/PORT — где слушает
+    # встроенный HTTP‑сервер (за reverse proxy).
+    GOOGLE_WEBHOOK_URL: str = os.getenv("GOOGLE_WEBHOOK_URL", "").strip()
+    GOOGLE_WEBHOOK_HOST: str = os.getenv("GOOGLE_WEBHOOK_HOST", "127.0.0.1")
+    GOOGLE_WEBHOOK_PORT: int = int(os.getenv("GOOGLE_WEBHOOK_PORT", "8080"))
+    GOOGLE_WEBHOOK_CHANNEL_TTL_HOURS: int = int(os.getenv("GOOGLE_WEBHOOK_CHANNEL_TTL_HOURS", "168"))
+    # Лимиты рассылки уведомлений (services/dispatcher.py): сообщений в
+    # секунду на весь бот и в один личный чат, одновременных запросов к Bot API.
+    TELEGRAM_GLOBAL_RATE: float = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))
+    TELEGRAM_CHAT_RATE: float = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+    TELEGRAM_SEND_CONCURRENCY: int = int(os.getenv("TELEGRAM_SEND_CONCURRENCY", "8"))
+    # Очередь исходящих уведомлений (services/outbox.py): период опроса,
+    # размер пачки и число попыток до окончательной ошибки.
+    OUTBOX_POLL_SECONDS: float = float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+    # Как часто перезагружать таймеры напоминаний из БД (минуты). Таймеры
+    # срабатывают точно в срок; перезагрузка лишь подхватывает изменения,
+    # сделанные в обход бота.
+    REMINDER_RELOAD_MINUTES: int = int(os.getenv("REMINDER_RELOAD_MINUTES", "5"))
+    # Кэш пользователей (repositories/users.py): время жизни записи, сек.,
+    # и максимальное число записей.
+    USER_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "1000"))
+    # Как часто отложенные отметки last_active записываются в БД, сек.
+    LAST_ACTIVE_FLUSH_SECONDS: float = float(os.getenv("LAST_ACTIVE_FLUSH_SECONDS", "5"))
+    # Насколько далеко в прошлое смотрит авто‑завершение назначений (дни).
+    AUTO_COMPLETE_LOOKBACK_DAYS: int = int(os.getenv("AUTO_COMPLETE_LOOKBACK_DAYS", "7"))
+    # Часовой пояс расписания ежедневных задач (например, Europe/Moscow).
+    # Пустое значение — системный часовой пояс сервера.
+    TIMEZONE: str = os.getenv("TIMEZONE", "").strip()
+    # Выбор ведущего экземпляра (services/leader.py): период проверки
+    # соединения и повторных попыток взять роль, секунды. Роль переходит
+    # к другому экземпляру за 1–2 периода (при обрыве сети — примерно за 4).
+    LEADER_HEARTBEAT_SECONDS: float = float(os.getenv("LEADER_HEARTBEAT_SECONDS", "5"))
+    # Пул соединений PostgreSQL (database.py): минимальный и максимальный
+    # размер, таймаут одного запроса (сек., 0 — без ограничения), через
+    # сколько секунд простоя закрывать лишнее соединение, размер кэша
+    # подготовленных запросов на соединение и порог медленного запроса (мс).
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_COMMAND_TIMEOUT: float = float(os.getenv("DB_COMMAND_TIMEOUT", "30"))
+    DB_MAX_INACTIVE_CONNECTION_LIFETIME: float = float(os.getenv("DB_MAX_INACTIVE_CONNECTION_LIFETIME", "300"))
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    DB_SLOW_QUERY_MS: float = float(os.getenv("DB_SLOW_QUERY_MS", "500"))
+    # Метрики обработчиков (services/metrics_server.py): период записи
+    # сводки в лог, минуты (0 — не писать), и адрес эндпоинта Prometheus
+    # `/metrics` (порт 0 — эндпоинт выключен).
+    METRICS_LOG_MINUTES: float = float(os.getenv("METRICS_LOG_MINUTES", "15"))
+    METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
+
     ASSIGN_DAYS_RANGE = 3  # показывать мероприятия на 3 дня вперёд
 
     def __init__(self) -> None:
@@ -9,7 +9,8 @@
 - статусы аудиторий (`STATUS_*`, `AUDITORY_STATUSES`);
 - статусы назначений мероприятий (`ASSIGNMENT_STATUS_*`, `ASSIGNMENT_STATUSES_ACTIVE`);
 - роли пользователей (`ROLE_*`, `ALL_ROLES`);
-- типы уведомлений (`NOTIFICATION_*`).
+- типы уведомлений (`NOTIFICATION_*`);
+- статусы очереди исходящих уведомлений (`OUTBOX_STATUS_*`).
 """
 
 from __future__ import annotations
@@ -67,3 +68,8 @@ NOTIFICATION_CONFIRMATION: Final[str] = "confirmation"
 NOTIFICATION_MANUAL_COMPLETION: Final[str] = "manual_completion"
 NOTIFICATION_EARLY_COMPLETION: Final[str] = "early_completion"
 
+
+# Статусы очереди исходящих уведомлений (notification_outbox)
+OUTBOX_STATUS_PENDING: Final[str] = "pending"
+OUTBOX_STATUS_SENT: Final[str] = "sent"
+OUTBOX_STATUS_FAILED: Final[str] = "failed"
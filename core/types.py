@@ -59,6 +59,31 @@ class CalendarEventRow(TypedDict, total=False):
     last_sync: datetime
 
 
+class ScheduleEventRow(CalendarEventRow, total=False):
+    """Мероприятие расписания с технической аудиторией (см. `repositories.events`)."""
+
+    auditory_name: Optional[str]
+    building: Optional[str]
+
+
+class EventUpsertStats(TypedDict):
+    """Итог пакетного сохранения событий календаря."""
+
+    inserted: int
+    updated: int
+    unchanged: int
+    cancelled: int
+
+
+class CalendarSyncResult(TypedDict):
+    """Итог синхронизации одного календаря."""
+
+    calendar_id: str
+    processed: int
+    duration_sec: float
+    error: Optional[str]
+
+
 class EventAssignmentRow(TypedDict, total=False):
     id: int
     event_id: int
@@ -71,6 +96,32 @@ class EventAssignmentRow(TypedDict, total=False):
     completed_at: Optional[datetime]
 
 
+class EngineerAssignmentRow(TypedDict, total=False):
+    """Мероприятие с назначением конкретного инженера (`status` — статус назначения)."""
+
+    id: int
+    title: str
+    description: Optional[str]
+    start_time: datetime
+    end_time: datetime
+    auditory_name: Optional[str]
+    building: Optional[str]
+    status: str
+    confirmed_at: Optional[datetime]
+    engineer_name: Optional[str]
+
+
+class EventEngineerRow(TypedDict, total=False):
+    """Кандидат на назначение и его текущее назначение на мероприятие (если есть)."""
+
+    telegram_id: int
+    full_name: str
+    role: str
+    assignment_id: Optional[int]
+    assignment_status: Optional[str]
+    assigned_role: Optional[str]
+
+
 JsonDict = Dict[str, object]
 RowList = List[Dict[str, object]]
 
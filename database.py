@@ -2,26 +2,270 @@
 
 Задачи модуля:
 - один раз инициализировать пул соединений к БД и переиспользовать его по всему проекту;
+- измерять работу пула (`InstrumentedPool`): ожидание свободного соединения,
+  занятость, длительность и число строк каждого запроса с привязкой к
+  вызывающей функции, медленные запросы — чтобы подбирать размер пула и
+  искать тяжёлые запросы по данным, а не наугад;
 - предоставить высокоуровневый класс `Database` для типовых операций (пользователи, статусы);
 - централизованно валидировать статусы и обрабатывать ошибки обращения к БД.
 
 Используемые компоненты:
 - `asyncpg.create_pool` — асинхронный пул подключений;
-- `config.config` — настройки подключения к БД;
+- `config.config` — настройки подключения к БД и пула (`DB_*`);
+- `utils.metrics.LatencyHistogram` — перцентили длительностей;
 - `core.constants.AUDITORY_STATUSES` — разрешённые статусы аудиторий.
 """
 
 import logging
-from typing import Any, Dict, List, Optional
+import re
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from types import FrameType
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
 import asyncpg
 
 from config import config
 from core.constants import AUDITORY_STATUSES
+from utils.metrics import LatencyHistogram
 
 logger = logging.getLogger(__name__)
 
-_db_pool: Optional[asyncpg.Pool] = None
+# Сколько символов SQL оставлять в имени запроса для статистики и логов.
+_QUERY_NAME_LENGTH = 80
+
+# Сколько разных запросов хранить в `InstrumentedPool.queries`. Запросы
+# сверх лимита учитываются одной строкой `_OTHER_QUERIES`.
+_MAX_QUERY_STATS = 500
+_OTHER_QUERIES = ("(прочие)", "(запросы сверх лимита статистики)")
+
+# Литералы в тексте SQL: строки в кавычках и числа (но не параметры `$1`).
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|(?<![$\w.])\d+(?:\.\d+)?")
+_VALUE_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def _query_name(query: str) -> str:
+    """
+    Имя запроса для статистики: SQL в одну строку без литералов, обрезанный
+    до `_QUERY_NAME_LENGTH`.
+
+    Примечания:
+        Литералы заменяются на `?`, списки литералов — на `(?...)`, чтобы
+        запросы, собранные с разными значениями, попадали в одну строку
+        статистики.
+    """
+    name = _LITERAL_RE.sub("?", " ".join(query.split()))
+    return _VALUE_LIST_RE.sub("(?...)", name)[:_QUERY_NAME_LENGTH]
+
+
+def _caller_label(frame: FrameType) -> str:
+    """Метка вызывающего кода: `модуль.функция` (например, `repositories.events.get_assignment`)."""
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _row_count(method: str, result: Any) -> int:
+    """Число строк результата: длина списка для `fetch`, число из статуса для `execute`."""
+    if method == "fetch":
+        return len(result)
+    if method == "execute":
+        # Статус команды: 'UPDATE 3', 'INSERT 0 1', 'DELETE 0'.
+        tail = result.rsplit(" ", 1)[-1] if result else ""
+        return int(tail) if tail.isdigit() else 0
+    return 0 if result is None else 1
+
+
+def _param_shape(value: Any) -> str:
+    """Тип параметра без значения (для логов): `int`, `str[12]`, `list[250]`."""
+    if value is None:
+        return "None"
+    name = type(value).__name__
+    if isinstance(value, (str, bytes, list, tuple, dict, set, frozenset)):
+        return f"{name}[{len(value)}]"
+    return name
+
+
+@dataclass
+class QueryStats:
+    """
+    Статистика одного запроса из одного места в коде.
+
+    Атрибуты:
+        latency: длительность выполнения.
+        rows: сколько строк вернули (или изменили) все выполнения.
+        max_rows: наибольшее число строк за одно выполнение.
+    """
+
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    rows: int = 0
+    max_rows: int = 0
+
+    def observe(self, seconds: float, rows: int, error: bool = False) -> None:
+        """Учитывает одно выполнение запроса."""
+        self.latency.observe(seconds, error=error)
+        self.rows += rows
+        if rows > self.max_rows:
+            self.max_rows = rows
+
+
+class InstrumentedPool:
+    """
+    Пул asyncpg с измерением нагрузки.
+
+    Повторяет используемый в проекте интерфейс `asyncpg.Pool` (`fetch`,
+    `fetchrow`, `fetchval`, `execute`, `acquire`); остальные методы
+    передаются исходному пулу без изменений.
+
+    Атрибуты:
+        acquire_wait: ожидание свободного соединения из пула.
+        hold: сколько соединение было занято (запрос или блок `acquire()`).
+        queries: статистика запросов `fetch`/`fetchrow`/`fetchval`/`execute`
+            по ключу (метка вызывающей функции, SQL в одну строку без
+            литералов); не больше `_MAX_QUERY_STATS` ключей, остальные
+            запросы — в общей строке `_OTHER_QUERIES`.
+        in_use: занято соединений сейчас.
+        max_in_use: максимум одновременно занятых соединений.
+        slow_queries: сколько запросов выполнялись дольше `DB_SLOW_QUERY_MS`.
+
+    Примечания:
+        🔥 ВАЖНО: если `acquire_wait` растёт, а `max_in_use` упирается в
+        `DB_POOL_MAX_SIZE`, пулу не хватает соединений (или их надолго
+        занимают транзакции — см. `hold`).
+
+        ⚠️ ВНИМАНИЕ: запросы на соединении, полученном через `acquire()`
+        (транзакции), по отдельности не измеряются — учитывается только
+        общее время удержания соединения.
+    """
+
+    def __init__(self, pool: asyncpg.Pool, slow_query_seconds: float):
+        self._pool = pool
+        self.slow_query_seconds = slow_query_seconds
+        self.acquire_wait = LatencyHistogram()
+        self.hold = LatencyHistogram()
+        self.queries: Dict[Tuple[str, str], QueryStats] = {}
+        self.in_use = 0
+        self.max_in_use = 0
+        self.slow_queries = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+    @asynccontextmanager
+    async def acquire(self, *, timeout: Optional[float] = None) -> AsyncIterator[asyncpg.Connection]:
+        """Выдаёт соединение из пула (аналог `async with pool.acquire() as conn`)."""
+        started = time.perf_counter()
+        try:
+            conn = await self._pool.acquire(timeout=timeout)
+        except Exception:
+            self.acquire_wait.observe(time.perf_counter() - started, error=True)
+            raise
+        acquired = time.perf_counter()
+        self.acquire_wait.observe(acquired - started)
+        self.in_use += 1
+        self.max_in_use = max(self.max_in_use, self.in_use)
+        try:
+            yield conn
+        finally:
+            self.in_use -= 1
+            self.hold.observe(time.perf_counter() - acquired)
+            await self._pool.release(conn)
+
+    async def _run(
+        self,
+        method: str,
+        query: str,
+        args: Sequence[Any],
+        timeout: Optional[float],
+        caller: FrameType,
+    ) -> Any:
+        async with self.acquire() as conn:
+            started = time.perf_counter()
+            result = None
+            failed = False
+            try:
+                result = await getattr(conn, method)(query, *args, timeout=timeout)
+                return result
+            except Exception:
+                failed = True
+                raise
+            finally:
+                rows = 0 if failed else _row_count(method, result)
+                self._observe(_caller_label(caller), query, args, time.perf_counter() - started, rows, failed)
+
+    def _observe(
+        self,
+        caller: str,
+        query: str,
+        args: Sequence[Any],
+        seconds: float,
+        rows: int,
+        failed: bool,
+    ) -> None:
+        name = _query_name(query)
+        key = (caller, name)
+        stats = self.queries.get(key)
+        if stats is None:
+            if len(self.queries) >= _MAX_QUERY_STATS:
+                key = _OTHER_QUERIES
+                stats = self.queries.get(key)
+            if stats is None:
+                stats = self.queries[key] = QueryStats()
+        stats.observe(seconds, rows, error=failed)
+        if seconds >= self.slow_query_seconds:
+            self.slow_queries += 1
+            # Значения параметров не пишем — только типы и размеры.
+            shapes = ", ".join(_param_shape(arg) for arg in args)
+            logger.warning(
+                f"Медленный запрос к БД ({seconds * 1000:.0f} мс, строк {rows}) "
+                f"из {caller}: {name}; параметры: ({shapes})"
+            )
+
+    # Кадр вызывающего кода берётся здесь, а не в `_run`: метка должна
+    # указывать на функцию, которая обратилась к пулу.
+    async def fetch(self, query: str, *args: Any, timeout: Optional[float] = None) -> List[asyncpg.Record]:
+        return await self._run("fetch", query, args, timeout, sys._getframe(1))
+
+    async def fetchrow(self, query: str, *args: Any, timeout: Optional[float] = None) -> Optional[asyncpg.Record]:
+        return await self._run("fetchrow", query, args, timeout, sys._getframe(1))
+
+    async def fetchval(self, query: str, *args: Any, timeout: Optional[float] = None) -> Any:
+        return await self._run("fetchval", query, args, timeout, sys._getframe(1))
+
+    async def execute(self, query: str, *args: Any, timeout: Optional[float] = None) -> str:
+        return await self._run("execute", query, args, timeout, sys._getframe(1))
+
+    def top_queries(self, limit: int = 10) -> List[Tuple[str, str, QueryStats]]:
+        """
+        Запросы с наибольшим суммарным временем выполнения.
+
+        Возвращает:
+            Список `(метка вызывающей функции, SQL, статистика)`.
+        """
+        heaviest = sorted(self.queries.items(), key=lambda item: item[1].latency.total, reverse=True)
+        return [(caller, name, stats) for (caller, name), stats in heaviest[:limit]]
+
+    def summary(self, top: int = 5) -> str:
+        """
+        Сводка по пулу для логов.
+
+        Аргументы:
+            top: сколько запросов с наибольшим суммарным временем показать.
+        """
+        lines = [
+            f"соединений {self._pool.get_size()} (макс. {self._pool.get_max_size()}), "
+            f"занято {self.in_use}, пик {self.max_in_use}, "
+            f"медленных запросов {self.slow_queries}",
+            f"ожидание соединения: {self.acquire_wait.summary()}",
+            f"удержание соединения: {self.hold.summary()}",
+        ]
+        for caller, name, stats in self.top_queries(top):
+            lines.append(f"{stats.latency.summary()} rows={stats.rows} — {caller}: {name}")
+        return "\n".join(lines)
+
+
+_db_pool: Optional[InstrumentedPool] = None
 
 
 async def init_db_pool() -> None:
@@ -29,18 +273,29 @@ async def init_db_pool() -> None:
     Создаёт пул подключений к PostgreSQL и сохраняет его в глобальную переменную.
 
     Логирует успешное создание пула. В случае ошибки логирует и пробрасывает исключение.
+
+    Примечания:
+        🔥 ВАЖНО: размер пула, таймауты и размер кэша подготовленных запросов
+        задаются переменными `DB_*` (см. `config.Config`). Кэш подготовленных
+        запросов — на каждое соединение; он должен вмещать все частые
+        SQL‑тексты (см. `repositories.events`), иначе запросы будут
+        разбираться повторно.
     """
     global _db_pool
     try:
-        # Небольшая настройка пула подключений:
-        # - min_size = 1, чтобы не держать лишние коннекты при простое
-        # - max_size = 10, чего достаточно для типичной нагрузки бота
-        _db_pool = await asyncpg.create_pool(
+        pool = await asyncpg.create_pool(
             dsn=config.DATABASE_URL,
-            min_size=1,
-            max_size=10,
+            min_size=config.DB_POOL_MIN_SIZE,
+            max_size=config.DB_POOL_MAX_SIZE,
+            command_timeout=config.DB_COMMAND_TIMEOUT or None,
+            max_inactive_connection_lifetime=config.DB_MAX_INACTIVE_CONNECTION_LIFETIME,
+            statement_cache_size=config.DB_STATEMENT_CACHE_SIZE,
+        )
+        _db_pool = InstrumentedPool(pool, slow_query_seconds=config.DB_SLOW_QUERY_MS / 1000)
+        logger.info(
+            f"Пул подключений к БД успешно создан "
+            f"(min={config.DB_POOL_MIN_SIZE}, max={config.DB_POOL_MAX_SIZE})"
         )
-        logger.info("Пул подключений к БД успешно создан")
     except Exception as e:
         logger.exception("Не удалось создать пул подключений к БД: %s", e)
         raise
@@ -49,20 +304,23 @@ async def init_db_pool() -> None:
 async def close_db_pool() -> None:
     """
     Закрывает пул подключений, если он был инициализирован.
+
+    Перед закрытием пишет в лог сводку по нагрузке на пул.
     """
     global _db_pool
     if _db_pool is not None:
+        logger.info(f"Статистика пула БД:\n{_db_pool.summary()}")
         await _db_pool.close()
         _db_pool = None
         logger.info("Пул подключений к БД закрыт")
 
 
-def get_db_pool() -> asyncpg.Pool:
+def get_db_pool() -> InstrumentedPool:
     """
     Возвращает пул подключений к БД.
 
     Returns:
-        asyncpg.Pool: Пул подключений.
+        InstrumentedPool: Пул подключений (обёртка над `asyncpg.Pool` с метриками).
 
     Raises:
         RuntimeError: Если пул не был инициализирован.
@@ -131,6 +389,9 @@ class Database:
                 username,
             )
             logger.info("Пользователь %s (telegram_id=%s) добавлен/обновлён", full_name, telegram_id)
+            # Сразу сбрасываем кэш этого процесса, не дожидаясь users_changed.
+            from repositories.users import invalidate_user
+            invalidate_user(telegram_id)
             return True
         except Exception as e:
             logger.error("Ошибка при добавлении пользователя %s: %s", telegram_id, e, exc_info=True)
@@ -146,6 +407,10 @@ class Database:
 
         Возвращает:
             Словарь с данными пользователя или None, если пользователь не найден.
+
+        Примечания:
+            ⚠️ ВНИМАНИЕ: читает БД напрямую; в обработчиках используйте
+            кэширующий `repositories.users.get_user`.
         """
         pool = get_db_pool()
         try:
@@ -161,34 +426,24 @@ class Database:
     @staticmethod
     async def update_user_last_active(telegram_id: int) -> bool:
         """
-        Обновляет last_active = NOW() для пользователя.
+        Отмечает активность пользователя (last_active = текущее время).
 
         Аргументы:
             telegram_id: ID пользователя в Telegram.
 
         Возвращает:
-            True при успехе, False при ошибке.
+            True — отметка принята.
 
         Примечания:
             🔥 ВАЖНО: это поле используется как признак «жизни» пользователя
             и может применяться для чистки неактивных аккаунтов или статистики.
+            ⚠️ ВНИМАНИЕ: запись отложенная — отметки копятся в
+            `repositories.users.last_active_buffer` и пишутся в БД одним
+            запросом раз в `LAST_ACTIVE_FLUSH_SECONDS`.
         """
-        pool = get_db_pool()
-        try:
-            await pool.execute(
-                "UPDATE users SET last_active = NOW() WHERE telegram_id = $1",
-                telegram_id,
-            )
-            logger.info("Обновлён last_active для пользователя telegram_id=%s", telegram_id)
-            return True
-        except Exception as e:
-            logger.error(
-                "Ошибка при обновлении last_active для %s: %s",
-                telegram_id,
-                e,
-                exc_info=True,
-            )
-            return False
+        from repositories.users import last_active_buffer
+        last_active_buffer.touch(telegram_id)
+        return True
 
     @staticmethod
     async def get_auditory_by_name(name: str) -> Optional[Dict[str, Any]]:
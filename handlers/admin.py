@@ -13,9 +13,11 @@ from telegram.ext import ContextTypes
 
 from utils.roles import require_roles, check_permission, ROLE_NAMES, set_user_role
 from database import get_db_pool
+from core.constants import NOTIFICATION_REMINDER
 from services.reminder import (
-    find_upcoming_events, 
-    send_reminder, 
+    REMINDER_LEAD,
+    enqueue_due_reminder,
+    find_scheduled_reminders,
     auto_complete_events,
     send_morning_summary,
     send_afternoon_report
@@ -55,6 +57,7 @@ async def admin_panel_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
     keyboard = [
         [InlineKeyboardButton("🔄 Принудительная синхронизация", callback_data="admin_sync")],
         [InlineKeyboardButton("📋 Проверка БД", callback_data="admin_db_stats")],
+        [InlineKeyboardButton("⏱ Запросы к БД", callback_data="admin_query_stats")],
     ]
     
     # Для superadmin добавляем тестовые функции
@@ -225,10 +228,70 @@ async def admin_db_stats_handler(update: Update, context: ContextTypes.DEFAULT_T
     )
 
 
+# Сколько самых тяжёлых запросов показывать и максимальная длина сообщения Telegram.
+_QUERY_STATS_TOP = 10
+_MESSAGE_LIMIT = 4096
+
+
+@require_roles(['manager', 'superadmin'])
+async def admin_query_stats_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Показывает статистику запросов к БД с момента запуска бота.
+
+    Примечания:
+        🔥 ВАЖНО: данные берутся из памяти процесса (`database.InstrumentedPool`),
+        к БД обращений нет. Запросы отсортированы по суммарному времени —
+        сверху те, что сильнее всего нагружают базу.
+
+        ⚠️ ВНИМАНИЕ: сообщение отправляется без Markdown — в SQL и именах
+        функций есть символы `_` и `*`.
+    """
+    query = update.callback_query
+    await query.answer()
+    
+    pool = get_db_pool()
+    
+    text = "⏱ Запросы к БД (с запуска бота)\n\n"
+    text += (
+        f"Пул: соединений {pool.get_size()} из {pool.get_max_size()}, "
+        f"занято {pool.in_use}, пик {pool.max_in_use}\n"
+    )
+    text += f"Ожидание соединения: {pool.acquire_wait.summary()}\n"
+    text += f"Медленных запросов (от {config.DB_SLOW_QUERY_MS:.0f} мс): {pool.slow_queries}\n\n"
+    
+    top = pool.top_queries(_QUERY_STATS_TOP)
+    if top:
+        text += "Самые тяжёлые по суммарному времени:\n"
+        for i, (caller, name, stats) in enumerate(top, 1):
+            text += (
+                f"\n{i}. {caller}\n"
+                f"{stats.latency.summary()}\n"
+                f"строк: всего {stats.rows}, макс. {stats.max_rows}\n"
+                f"{name}\n"
+            )
+    else:
+        text += "Запросов пока не было."
+    
+    if len(text) > _MESSAGE_LIMIT:
+        text = text[:_MESSAGE_LIMIT - 1] + "…"
+    
+    keyboard = [[InlineKeyboardButton("« Назад", callback_data="admin_panel")]]
+    reply_markup = InlineKeyboardMarkup(keyboard)
+    
+    await query.edit_message_text(text, reply_markup=reply_markup)
+
+
 # ============================================
 # ТЕСТОВЫЕ ФУНКЦИИ (только superadmin)
 # ============================================
 
+async def _find_test_reminders():
+    """Напоминания о мероприятиях, которые начнутся в ближайшие 35 минут."""
+    until = datetime.now() + timedelta(minutes=35) - REMINDER_LEAD
+    reminders = await find_scheduled_reminders(until)
+    return [r for r in reminders if r['notification_type'] == NOTIFICATION_REMINDER]
+
+
 @require_roles(['superadmin'])
 async def admin_test_reminders_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -238,10 +301,8 @@ async def admin_test_reminders_handler(update: Update, context: ContextTypes.DEF
     query = update.callback_query
     await query.answer()
     
-    pool = get_db_pool()
-    
     # Получаем ближайшие события
-    events = await find_upcoming_events(minutes_before=35)
+    events = await _find_test_reminders()
     
     if not events:
         await query.edit_message_text(
@@ -279,14 +340,20 @@ async def admin_send_test_reminder_handler(update: Update, context: ContextTypes
     query = update.callback_query
     await query.answer()
     
-    events = await find_upcoming_events(minutes_before=35)
+    events = await _find_test_reminders()
     
     if not events:
         await query.edit_message_text("❌ Нет событий для тестирования.")
         return
     
     event = events[0]
-    await send_reminder(event, context.bot)
+    if not await enqueue_due_reminder(event):
+        await query.edit_message_text(
+            f"ℹ️ Напоминание уже неактуально или отправлялось менее 2 часов назад.\n\n"
+            f"Событие: {event['title']}\n"
+            f"Инженер: {event['engineer_name']}"
+        )
+        return
     
     await query.edit_message_text(
         f"✅ Тестовое напоминание отправлено!\n\n"
@@ -313,7 +380,7 @@ async def admin_test_completion_handler(update: Update, context: ContextTypes.DE
     await query.answer()
     
     # Запускаем автоматическое завершение
-    count = await auto_complete_events()
+    count = len(await auto_complete_events())
     
     # Проверяем, какие мероприятия должны были завершиться
     pool = get_db_pool()
@@ -556,6 +623,7 @@ admin_callbacks = {
     "admin_panel": admin_panel_handler,
     "admin_sync": admin_sync_handler,
     "admin_db_stats": admin_db_stats_handler,
+    "admin_query_stats": admin_query_stats_handler,
 }
 
 # Тестовые обработчики (только для superadmin)
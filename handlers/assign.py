@@ -16,7 +16,7 @@
 """
 
 import logging
-from datetime import datetime, timedelta 
+from datetime import datetime
 
 import cyrtranslit
 
@@ -25,12 +25,33 @@ from telegram.ext import ContextTypes
 
 from config import config
 from database import get_db_pool
+from repositories.events import (
+    create_assignment,
+    day_range,
+    get_assignment,
+    get_event,
+    get_event_engineers,
+    get_events_between,
+    set_assignment_status,
+)
 from utils.auditory_names import get_russian_name
 from utils.roles import require_roles
 from utils.translit import to_cyrillic
 
 logger = logging.getLogger(__name__)
 
+
+async def get_assignable_events():
+    """
+    Возвращает ещё не начавшиеся мероприятия на `ASSIGN_DAYS_RANGE` дней вперёд.
+
+    Примечания:
+        Общий источник данных для `/assign` и возврата к списку из callback.
+    """
+    days_range = getattr(config, 'ASSIGN_DAYS_RANGE', 5)
+    _, end = day_range(datetime.now().date(), days=days_range)
+    return await get_events_between(datetime.now(), end)
+
 @require_roles(['superadmin', 'manager'])
 async def assign_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -63,38 +84,8 @@ async def assign_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"Пользователь {user_id} вызвал /assign")
     
     # Получаем мероприятия на ближайший диапазон дней из конфига.
-    pool = get_db_pool()
-    today = datetime.now().date()
-    
-    # Создаем список дат на количество дней из конфига
-    days_range = getattr(config, 'ASSIGN_DAYS_RANGE', 5)
-    dates = [today + timedelta(days=i) for i in range(days_range)]
-    
-    logger.info(f"Ищем мероприятия на даты: {dates}")
-    
-    # 🔥 ВАЖНО: используем плейсхолдеры `$1..$N`, а не подстановку дат в строку,
-    # чтобы избежать SQL‑инъекций и сохранить кросс‑совместимость с asyncpg.
-    placeholders = ','.join([f'${i+1}' for i in range(len(dates))])
-    
-    rows = await pool.fetch(
-        f"""
-        SELECT 
-            ce.id,
-            ce.title,
-            ce.start_time,
-            ce.end_time,
-            a.name as auditory_name,
-            a.building
-        FROM calendar_events ce
-        LEFT JOIN auditories a ON ce.auditory_id = a.id
-        WHERE DATE(ce.start_time) IN ({placeholders})
-          AND ce.status = 'confirmed'
-          AND ce.start_time > NOW()
-        ORDER BY ce.start_time
-        """,
-        *dates
-    )
-    
+    rows = await get_assignable_events()
+
     logger.info(f"Найдено мероприятий: {len(rows)}")
     
     if not rows:
@@ -169,26 +160,11 @@ async def show_engineers_for_event(query, event_id):
         чтобы в интерфейсе отображались как уже назначенные, так и ещё не
         назначенные инженеры.
     """
-    pool = get_db_pool()
-    
-    # 🔥 ВАЖНО: фильтруем только будущие мероприятия (`start_time > NOW()`),
-    # чтобы не позволить назначать инженеров на прошедшие события.
-    event_row = await pool.fetchrow(
-        """
-        SELECT 
-            ce.title,
-            ce.start_time,
-            a.name as auditory_name,
-            a.building
-        FROM calendar_events ce
-        LEFT JOIN auditories a ON ce.auditory_id = a.id
-        WHERE ce.id = $1
-          AND ce.start_time > NOW()
-        """,
-        int(event_id)
-    )
+    # 🔥 ВАЖНО: показываем только будущие мероприятия, чтобы не позволить
+    # назначать инженеров на прошедшие события.
+    event_row = await get_event(int(event_id))
     
-    if not event_row:
+    if not event_row or event_row["start_time"] <= datetime.now():
         await query.edit_message_text(
             "❌ Мероприятие не найдено или уже завершено",
             reply_markup=InlineKeyboardMarkup([[
@@ -198,24 +174,7 @@ async def show_engineers_for_event(query, event_id):
         return
     
     # Получаем список инженеров и статусы их назначений по данному событию.
-    engineers = await pool.fetch(
-        """
-        SELECT 
-            u.telegram_id,
-            u.full_name,
-            u.role,
-            ea.id as assignment_id,
-            ea.status as assignment_status,
-            ea.role as assigned_role
-        FROM users u
-        LEFT JOIN event_assignments ea ON u.telegram_id = ea.assigned_to AND ea.event_id = $1
-        WHERE u.role IN ('superadmin', 'engineer', 'manager')
-        ORDER BY 
-            CASE WHEN ea.id IS NOT NULL THEN 0 ELSE 1 END,
-            u.full_name
-        """,
-        int(event_id)
-    )
+    engineers = await get_event_engineers(int(event_id))
     
     # Форматируем дату
     date_str = event_row["start_time"].strftime("%d.%m.%Y %H:%M")
@@ -326,24 +285,18 @@ async def assign_engineer_to_event(query, context, user_id, event_id, engineer_i
 
     # 🔥 ВАЖНО: дополнительная проверка, что мероприятие ещё не началось
     # и всё ещё подтверждено. Это защита от "застывших" кнопок в старых сообщениях.
-    event = await pool.fetchrow(
-        """
-        SELECT start_time FROM calendar_events 
-        WHERE id = $1 AND start_time > NOW() AND status = 'confirmed'
-        """,
-        int(event_id)
-    )
+    event_info = await get_event(int(event_id))
     
-    if not event:
+    if (
+        not event_info
+        or event_info["status"] != "confirmed"
+        or event_info["start_time"] <= datetime.now()
+    ):
         await query.answer("❌ Нельзя назначить на прошедшее мероприятие", show_alert=True)
         return
     
     # Проверяем, не назначен ли уже данный инженер на это мероприятие.
-    existing = await pool.fetchrow(
-        "SELECT id, status FROM event_assignments WHERE event_id = $1 AND assigned_to = $2",
-        int(event_id),
-        int(engineer_id)
-    )
+    existing = await get_assignment(int(event_id), int(engineer_id))
     
     if existing:
         await query.answer("Этот инженер уже назначен на мероприятие", show_alert=True)
@@ -352,25 +305,13 @@ async def assign_engineer_to_event(query, context, user_id, event_id, engineer_i
         return
     
     # Вставляем новое назначение в таблицу event_assignments.
-    await pool.execute(
-        """
-        INSERT INTO event_assignments 
-        (event_id, assigned_to, assigned_by, role, status, assigned_at)
-        VALUES ($1, $2, $3, 'primary', 'assigned', NOW())
-        """,
-        int(event_id),
-        int(engineer_id),
-        int(user_id)
-    )
+    # Таймер напоминания ставит ведущий экземпляр по уведомлению
+    # reminder_invalidate (триггер таблицы event_assignments).
+    await create_assignment(int(event_id), int(engineer_id), int(user_id))
     
     await query.answer("✅ Инженер назначен!")
     
     # Получаем информацию для уведомления
-    event_info = await pool.fetchrow(
-        "SELECT title, start_time FROM calendar_events WHERE id = $1",
-        int(event_id)
-    )
-    
     engineer_info = await pool.fetchrow(
         "SELECT full_name FROM users WHERE telegram_id = $1",
         int(engineer_id)
@@ -426,17 +367,7 @@ async def accept_assignment(query, user_id, event_id):
         🔥 ВАЖНО: статус меняется на `accepted`, а время подтверждения фиксируется
         в поле `confirmed_at`, чтобы по логам можно было понять скорость реакции.
     """
-    pool = get_db_pool()
-    
-    await pool.execute(
-        """
-        UPDATE event_assignments 
-        SET status = 'accepted', confirmed_at = NOW()
-        WHERE event_id = $1 AND assigned_to = $2
-        """,
-        int(event_id),
-        int(user_id)
-    )
+    await set_assignment_status(int(event_id), int(user_id), 'accepted')
     
     await query.answer("✅ Назначение принято!")
     await query.edit_message_text(
@@ -456,36 +387,10 @@ async def show_assign_list(query, context):
         query: `CallbackQuery`, по которому редактируется сообщение.
         context: контекст бота (используется только для совместимости интерфейса).
     """
-    # Получаем пул для запросов к БД.
-    pool = get_db_pool()
-    today = datetime.now().date()
-    
     # Получаем те же данные, что и в assign_handler, чтобы интерфейсы
     # из команды и из callback выглядели одинаково.
-    days_range = getattr(config, 'ASSIGN_DAYS_RANGE', 5)
-    dates = [today + timedelta(days=i) for i in range(days_range)]
-    
-    placeholders = ','.join([f'${i+1}' for i in range(len(dates))])
-    
-    rows = await pool.fetch(
-        f"""
-        SELECT 
-            ce.id,
-            ce.title,
-            ce.start_time,
-            ce.end_time,
-            a.name as auditory_name,
-            a.building
-        FROM calendar_events ce
-        LEFT JOIN auditories a ON ce.auditory_id = a.id
-        WHERE DATE(ce.start_time) IN ({placeholders})
-          AND ce.status = 'confirmed'
-          AND ce.start_time > NOW()
-        ORDER BY ce.start_time
-        """,
-        *dates
-    )
-    
+    rows = await get_assignable_events()
+
     if not rows:
         await query.edit_message_text("📅 На ближайшие дни нет мероприятий для назначения.")
         return
@@ -588,46 +493,15 @@ async def show_multi_assign(query, context, event_id):
         сериализоваться в persistent‑storage — здесь контекст используется
         только в рамках текущей сессии менеджера.
     """
-    pool = get_db_pool()
-    
     # Получаем информацию о мероприятии, чтобы показать её в заголовке экрана.
-    event_row = await pool.fetchrow(
-        """
-        SELECT 
-            ce.title,
-            ce.start_time,
-            a.name as auditory_name,
-            a.building
-        FROM calendar_events ce
-        LEFT JOIN auditories a ON ce.auditory_id = a.id
-        WHERE ce.id = $1
-        """,
-        int(event_id)
-    )
+    event_row = await get_event(int(event_id))
     
     if not event_row:
         await query.edit_message_text("Мероприятие не найдено")
         return
     
     # Получаем список инженеров с их текущими статусами по этому событию.
-    engineers = await pool.fetch(
-        """
-        SELECT 
-            u.telegram_id,
-            u.full_name,
-            u.role,
-            ea.id as assignment_id,
-            ea.status as assignment_status,
-            ea.role as assigned_role
-        FROM users u
-        LEFT JOIN event_assignments ea ON u.telegram_id = ea.assigned_to AND ea.event_id = $1
-        WHERE u.role IN ('engineer', 'manager', 'superadmin')
-        ORDER BY 
-            CASE WHEN ea.id IS NOT NULL THEN 0 ELSE 1 END,
-            u.full_name
-        """,
-        int(event_id)
-    )
+    engineers = await get_event_engineers(int(event_id))
     
     # Форматируем дату
     date_str = event_row["start_time"].strftime("%d.%m.%Y %H:%M")
@@ -760,33 +634,19 @@ async def multi_confirm_handler(query, context, user_id, event_id):
         await query.answer("❌ Никто не выбран", show_alert=True)
         return
     
-    pool = get_db_pool()
     success_count = 0
     already_count = 0
     
     for engineer_id in selected:
         # Проверяем, не назначен ли уже
-        existing = await pool.fetchrow(
-            "SELECT id FROM event_assignments WHERE event_id = $1 AND assigned_to = $2",
-            int(event_id),
-            int(engineer_id)
-        )
+        existing = await get_assignment(int(event_id), int(engineer_id))
         
         if existing:
             already_count += 1
             continue
         
         # Назначаем инженера
-        await pool.execute(
-            """
-            INSERT INTO event_assignments 
-            (event_id, assigned_to, assigned_by, role, status, assigned_at)
-            VALUES ($1, $2, $3, 'primary', 'assigned', NOW())
-            """,
-            int(event_id),
-            int(engineer_id),
-            int(user_id)
-        )
+        await create_assignment(int(event_id), int(engineer_id), int(user_id))
         
         # Отправляем уведомление
         await send_assignment_notification(context, event_id, engineer_id)
@@ -817,18 +677,7 @@ async def send_assignment_notification(context, event_id, engineer_id):
         назначением (`assign_engineer_to_event`), чтобы поведение было
         одинаковым независимо от того, назначен инженер один или в группе.
     """
-    pool = get_db_pool()
-    
-    event_info = await pool.fetchrow(
-        """
-        SELECT 
-            ce.title,
-            ce.start_time
-        FROM calendar_events ce
-        WHERE ce.id = $1
-        """,
-        int(event_id)
-    )
+    event_info = await get_event(int(event_id))
     
     if not event_info:
         return
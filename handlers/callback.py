@@ -22,17 +22,26 @@ from core.constants import (
     ASSIGNMENT_STATUS_ACCEPTED,
     ASSIGNMENT_STATUS_ASSIGNED,
     ASSIGNMENT_STATUS_DONE,
+    ASSIGNMENT_STATUS_REPLACEMENT_REQUESTED,
 )
 from database import Database, get_db_pool
+from repositories.events import (
+    day_range,
+    get_assignment,
+    get_event_with_engineer,
+    get_events_between,
+    get_events_by_day,
+    set_assignment_status,
+)
 from repositories.auditories import (
     get_active_auditories,
     get_auditory_name_by_id,
 )
 from utils.auditory_names import get_russian_name
 from utils.translit import to_cyrillic
-from handlers.today import get_events_for_date
 from handlers import start
 from handlers.admin import admin_callbacks
+from handlers.router import CallbackRouter
 
 from handlers.help import (
     show_help_menu,
@@ -61,8 +70,9 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 
     Сценарий:
         1. Считывает `callback_query.data` и определяет тип действия.
-        2. В зависимости от префикса/значения `data` вызывает конкретный хендлер
-           (аудитории, расписание, помощь, назначения, подтверждение и т.д.).
+        2. По таблице `callback_router` (точное значение или самый длинный
+           префикс) вызывает конкретный хендлер (аудитории, расписание,
+           помощь, назначения, подтверждение и т.д.).
         3. Ведёт учёт активности пользователя через `Database.update_user_last_active`.
 
     Аргументы:
@@ -70,10 +80,9 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         context: контекст Telegram‑бота.
 
     Примечания:
-        🔥 ВАЖНО: порядок `elif`‑веток имеет значение — более специфичные префиксы
-        (например, `engineer_complete_`) должны идти до более общих, чтобы не
-        перехватываться чужой логикой. При добавлении новых кнопок следите за
-        уникальностью префиксов.
+        🔥 ВАЖНО: новые кнопки регистрируются в `_build_callback_router`;
+        порядок регистрации не важен, повтор значения или префикса — ошибка
+        при старте.
     """
     query = update.callback_query
     await query.answer()
@@ -83,140 +92,109 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     
     await Database.update_user_last_active(user_id)
     
-    if data == "list_auditories":
-        await show_auditories(query)
-
-    elif data == "schedule_menu":
-        await show_schedule_menu(query)
-
-    elif data == "today_schedule":
-        await show_today_schedule_calendar(query)
-
-    elif data == "tomorrow_schedule":
-        await show_tomorrow_schedule_calendar(query)
-
-    elif data == "week_schedule":
-        await show_week_schedule_calendar(query)
-
-    elif data.startswith("aud_"):
-        auditory_id = data[4:]
-        await show_status_buttons(query, auditory_id, context)
-
-    elif data.startswith("set_"):
-        parts = data.split("_")
-        if len(parts) >= 3:
-            auditory_id = parts[1]
-            status = parts[2]
-            if status == "green":
-                await set_status_from_button(query, context, user_id, auditory_id, status, None)
-            else:
-                context.user_data["waiting_for"] = {
-                    "type": "status_comment",
-                    "auditory_id": auditory_id,
-                    "status": status,
-                    "query": query
-                }
-                await query.edit_message_text(
-                    f"📝 Опишите проблему для статуса **{status.upper()}**:\n\n"
-                    "(отправьте текстовое сообщение или /cancel для отмены)",
-                    parse_mode="Markdown"
-                )
-
-    elif data == "back_to_main":
-        await show_persistent_menu(query)
-
-    elif data == "help":
-        # Перенаправляем на новое меню помощи
-        from handlers.help import show_help_menu
-        await show_help_menu(query)
-
-    elif data == "first_start":
-        await start.first_start_handler(update, context)
-
-    elif data == "assign_list":
-        await show_assign_list(query, context)
-
-    elif data.startswith("assign_event_"):
-        event_id = data.split("_")[2]
-        await show_engineers_for_event(query, event_id)
-
-    elif data.startswith("assign_to_"):
-        parts = data.split("_")
-        if len(parts) >= 4:
-            event_id = parts[2]
-            engineer_id = parts[3]
-            await assign_engineer_to_event(query, context, user_id, event_id, engineer_id)
-
-    elif data.startswith("confirm_"):
-        event_id = int(data.split("_")[1])
-        await confirm_assignment(query, user_id, event_id, context)
-
-    elif data.startswith("replace_"):
-        event_id = int(data.split("_")[1])
-        await request_replacement(query, user_id, event_id, context)
-
-    elif data.startswith("accept_"):
-        event_id = data.split("_")[1]
-        await accept_assignment(query, user_id, event_id)
-
-    elif data.startswith("decline_"):
-        event_id = data.split("_")[1]
-        await decline_assignment(query, user_id, event_id)
-
-    elif data.startswith("complete_"):
-        event_id = int(data.split("_")[1])
-        await complete_event_manually(query, user_id, event_id, context)
-
-    elif data in admin_callbacks:
-        await admin_callbacks[data](update, context)
-
-    elif data == "help_main":
-        from handlers.help import show_help_menu
-        await show_help_menu(query)
-
-    elif data == "help_commands":
-        await help_commands_handler(query)
-
-    elif data == "help_roles":
-        await help_roles_handler(query)
-
-    elif data == "help_statuses":
-        await help_statuses_handler(query)
-
-    elif data == "help_schedule":
-        await help_schedule_handler(query)
-
-    elif data == "help_assign":
-        await help_assign_handler(query)
-
-    elif data == "help_notifications":
-        await help_notifications_handler(query)
-
-    elif data == "help_faq":
-        await help_faq_handler(query)
+    if not await callback_router.dispatch(data, update, context):
+        await query.edit_message_text("Неизвестная команда")
 
-    elif data.startswith("engineer_complete_"):
-        event_id = int(data.split("_")[2])
-        await engineer_complete_handler(query, user_id, event_id, context)
 
-    elif data.startswith("assign_multi_"):
-        event_id = data.split("_")[2]
-        await show_multi_assign(query, context, event_id)
+async def _route_set_status(update: Update, context: ContextTypes.DEFAULT_TYPE, auditory_id: str, status: str) -> None:
+    """Кнопка статуса аудитории: зелёный ставится сразу, для остальных запрашивается комментарий."""
+    query = update.callback_query
+    if status == "green":
+        await set_status_from_button(query, context, query.from_user.id, auditory_id, status, None)
+        return
+    context.user_data["waiting_for"] = {
+        "type": "status_comment",
+        "auditory_id": auditory_id,
+        "status": status,
+        "query": query
+    }
+    await query.edit_message_text(
+        f"📝 Опишите проблему для статуса **{status.upper()}**:\n\n"
+        "(отправьте текстовое сообщение или /cancel для отмены)",
+        parse_mode="Markdown"
+    )
 
-    elif data.startswith("multi_toggle_"):
-        parts = data.split("_")
-        if len(parts) >= 4:
-            event_id = parts[2]
-            engineer_id = parts[3]
-            await multi_toggle_handler(query, context, user_id, event_id, engineer_id)
 
-    elif data.startswith("multi_confirm_"):
-        event_id = data.split("_")[2]
-        await multi_confirm_handler(query, context, user_id, event_id)
+def _build_callback_router() -> CallbackRouter:
+    """
+    Регистрирует все inline‑кнопки, которые обрабатывает `callback_handler`.
 
-    else:
-        await query.edit_message_text("Неизвестная команда")
-    
+    Примечания:
+        Обработчик маршрута получает `(update, context, **аргументы кнопки)`.
+        Типы аргументов сохранены такими, какими их раньше передавала цепочка
+        `elif`: где ID приводился к `int`, указан `int`, иначе — строка.
+    """
+    router = CallbackRouter()
+
+    def q(update):
+        return update.callback_query
+
+    # Аудитории и статусы
+    router.exact("list_auditories", lambda update, context: show_auditories(q(update)))
+    router.prefix("aud_", lambda update, context, auditory_id: show_status_buttons(q(update), auditory_id, context),
+                  auditory_id=str)
+    router.prefix("set_", _route_set_status, auditory_id=str, status=str)
+
+    # Расписание
+    router.exact("schedule_menu", lambda update, context: show_schedule_menu(q(update)))
+    router.exact("today_schedule", lambda update, context: show_today_schedule_calendar(q(update)))
+    router.exact("tomorrow_schedule", lambda update, context: show_tomorrow_schedule_calendar(q(update)))
+    router.exact("week_schedule", lambda update, context: show_week_schedule_calendar(q(update)))
+
+    # Меню и помощь
+    router.exact("back_to_main", lambda update, context: show_persistent_menu(q(update)))
+    router.exact("first_start", start.first_start_handler)
+    router.exact("help", lambda update, context: show_help_menu(q(update)))
+    router.exact("help_main", lambda update, context: show_help_menu(q(update)))
+    router.exact("help_commands", lambda update, context: help_commands_handler(q(update)))
+    router.exact("help_roles", lambda update, context: help_roles_handler(q(update)))
+    router.exact("help_statuses", lambda update, context: help_statuses_handler(q(update)))
+    router.exact("help_schedule", lambda update, context: help_schedule_handler(q(update)))
+    router.exact("help_assign", lambda update, context: help_assign_handler(q(update)))
+    router.exact("help_notifications", lambda update, context: help_notifications_handler(q(update)))
+    router.exact("help_faq", lambda update, context: help_faq_handler(q(update)))
+
+    # Назначения (менеджер)
+    router.exact("assign_list", lambda update, context: show_assign_list(q(update), context))
+    router.prefix("assign_event_", lambda update, context, event_id: show_engineers_for_event(q(update), event_id),
+                  event_id=str)
+    router.prefix("assign_to_", lambda update, context, event_id, engineer_id: assign_engineer_to_event(
+        q(update), context, q(update).from_user.id, event_id, engineer_id
+    ), event_id=str, engineer_id=str)
+    router.prefix("assign_multi_", lambda update, context, event_id: show_multi_assign(q(update), context, event_id),
+                  event_id=str)
+    router.prefix("multi_toggle_", lambda update, context, event_id, engineer_id: multi_toggle_handler(
+        q(update), context, q(update).from_user.id, event_id, engineer_id
+    ), event_id=str, engineer_id=str)
+    router.prefix("multi_confirm_", lambda update, context, event_id: multi_confirm_handler(
+        q(update), context, q(update).from_user.id, event_id
+    ), event_id=str)
+
+    # Ответы инженера на назначение
+    router.prefix("confirm_", lambda update, context, event_id: confirm_assignment(
+        q(update), q(update).from_user.id, event_id, context
+    ), event_id=int)
+    router.prefix("replace_", lambda update, context, event_id: request_replacement(
+        q(update), q(update).from_user.id, event_id, context
+    ), event_id=int)
+    router.prefix("accept_", lambda update, context, event_id: accept_assignment(
+        q(update), q(update).from_user.id, event_id
+    ), event_id=str)
+    router.prefix("decline_", lambda update, context, event_id: decline_assignment(
+        q(update), q(update).from_user.id, event_id
+    ), event_id=str)
+    router.prefix("complete_", lambda update, context, event_id: complete_event_manually(
+        q(update), q(update).from_user.id, event_id, context
+    ), event_id=int)
+    router.prefix("engineer_complete_", lambda update, context, event_id: engineer_complete_handler(
+        q(update), q(update).from_user.id, event_id, context
+    ), event_id=int)
+
+    # Админ‑панель
+    for data, handler in admin_callbacks.items():
+        router.exact(data, handler)
+
+    return router
 
 
 async def confirm_assignment(query, user_id, event_id, context):
@@ -234,38 +212,16 @@ async def confirm_assignment(query, user_id, event_id, context):
         запись в таблице `notifications`, а менеджер получает отдельное
         уведомление в групповой чат.
     """
-    pool = get_db_pool()
-    
     try:
         # 🔥 ВАЖНО (SQL): обновляем только запись конкретного инженера по event_id,
         # выставляя статус 'accepted' и фиксируя момент подтверждения.
-        result = await pool.execute(
-            """
-            UPDATE event_assignments 
-            SET status = 'accepted', confirmed_at = NOW()
-            WHERE event_id = $1 AND assigned_to = $2
-            """,
-            event_id,
-            user_id
-        )
+        await set_assignment_status(event_id, user_id, ASSIGNMENT_STATUS_ACCEPTED)
         
         # Логируем
         await log_notification(event_id, user_id, 'confirmation')
         
         # Получаем информацию о мероприятии для уведомления менеджера.
-        event_info = await pool.fetchrow(
-            """
-            SELECT 
-                ce.title,
-                ce.start_time,
-                u.full_name as engineer_name
-            FROM calendar_events ce
-            LEFT JOIN users u ON u.telegram_id = $2
-            WHERE ce.id = $1
-            """,
-            event_id,
-            user_id
-        )
+        event_info = await get_event_with_engineer(event_id, user_id)
         
         await query.answer("✅ Участие подтверждено!")
         await query.edit_message_text(
@@ -297,23 +253,9 @@ async def request_replacement(query, user_id, event_id, context):
         а менеджеру уходит уведомление с кнопкой для быстрого перехода
         в список назначений и поиска замены.
     """
-    pool = get_db_pool()
-    
     try:
         # Получаем информацию о мероприятии и инженере для уведомления менеджера.
-        event_info = await pool.fetchrow(
-            """
-            SELECT 
-                ce.title,
-                ce.start_time,
-                u.full_name as engineer_name
-            FROM calendar_events ce
-            LEFT JOIN users u ON u.telegram_id = $2
-            WHERE ce.id = $1
-            """,
-            event_id,
-            user_id
-        )
+        event_info = await get_event_with_engineer(event_id, user_id)
         
         if event_info:
             # Обратная транслитерация названия
@@ -324,15 +266,7 @@ async def request_replacement(query, user_id, event_id, context):
         
         # Меняем статус на 'replacement_requested', чтобы в аналитике и интерфейсе
         # было видно, что по мероприятию требуется замена.
-        await pool.execute(
-            """
-            UPDATE event_assignments 
-            SET status = 'replacement_requested'
-            WHERE event_id = $1 AND assigned_to = $2
-            """,
-            event_id,
-            user_id
-        )
+        await set_assignment_status(event_id, user_id, ASSIGNMENT_STATUS_REPLACEMENT_REQUESTED)
         
         await query.answer("🔄 Запрос на замену отправлен")
         await query.edit_message_text(
@@ -440,33 +374,16 @@ async def complete_event_manually(query, user_id, event_id, context):
         🔥 ВАЖНО: перед изменением статуса проверяется, что инженер действительно
         назначен на мероприятие, чтобы исключить чужие нажатия.
     """
-    pool = get_db_pool()
-    
     try:
         # Проверяем, что инженер действительно назначен на это мероприятие.
-        assignment = await pool.fetchrow(
-            """
-            SELECT status FROM event_assignments 
-            WHERE event_id = $1 AND assigned_to = $2
-            """,
-            event_id,
-            user_id
-        )
+        assignment = await get_assignment(event_id, user_id)
         
         if not assignment:
             await query.answer("❌ Вы не назначены на это мероприятие", show_alert=True)
             return
         
         # Обновляем статус назначения на 'done' и фиксируем время завершения.
-        await pool.execute(
-            """
-            UPDATE event_assignments 
-            SET status = 'done', completed_at = NOW()
-            WHERE event_id = $1 AND assigned_to = $2
-            """,
-            event_id,
-            user_id
-        )
+        await set_assignment_status(event_id, user_id, ASSIGNMENT_STATUS_DONE)
         
         # Логируем
         await log_notification(event_id, user_id, 'manual_completion')
@@ -498,22 +415,8 @@ async def notify_manager_about_completion(event_id, user_id, context):
     if not config.GROUP_CHAT_ID:
         return
     
-    pool = get_db_pool()
-    
     # Получаем информацию о мероприятии и инженере
-    info = await pool.fetchrow(
-        """
-        SELECT 
-            ce.title,
-            ce.start_time,
-            u.full_name as engineer_name
-        FROM calendar_events ce
-        LEFT JOIN users u ON u.telegram_id = $2
-        WHERE ce.id = $1
-        """,
-        event_id,
-        user_id
-    )
+    info = await get_event_with_engineer(event_id, user_id)
     
     if info:
         title = info['title']
@@ -592,10 +495,8 @@ async def show_schedule_menu(query):
 
 async def show_today_schedule_calendar(query):
     """Показывает расписание мероприятий на сегодня (через inline‑сообщение)."""
-    from handlers.today import get_events_for_date
-    
     today = datetime.now().date()
-    events = await get_events_for_date(today)
+    events = await get_events_between(*day_range(today))
     
     if not events:
         keyboard = [
@@ -645,10 +546,8 @@ async def show_today_schedule_calendar(query):
 
 async def show_tomorrow_schedule_calendar(query):
     """Показывает расписание мероприятий на завтра (через inline‑сообщение)."""
-    from handlers.today import get_events_for_date
-    
     tomorrow = datetime.now().date() + timedelta(days=1)
-    events = await get_events_for_date(tomorrow)
+    events = await get_events_between(*day_range(tomorrow))
     
     if not events:
         keyboard = [
@@ -699,16 +598,9 @@ async def show_tomorrow_schedule_calendar(query):
 
 async def show_week_schedule_calendar(query):
     """Показывает расписание мероприятий на неделю (через inline‑сообщение)."""
-    from handlers.today import get_events_for_date
-    
     today = datetime.now().date()
-    events_by_day = {}
-    
-    for i in range(7):
-        date = today + timedelta(days=i)
-        events = await get_events_for_date(date)
-        if events:
-            events_by_day[date] = events
+    # Одна выборка на всю неделю, разбивка по дням — в Python.
+    events_by_day = await get_events_by_day(today, 7)
     
     if not events_by_day:
         keyboard = [
@@ -934,33 +826,16 @@ async def engineer_complete_handler(query, user_id, event_id, context):
         - проверяет назначение и меняет статус на 'done';
         - отправляет уведомление менеджеру о досрочном завершении.
     """
-    pool = get_db_pool()
-    
     try:
         # Проверяем, что инженер назначен на это мероприятие
-        assignment = await pool.fetchrow(
-            """
-            SELECT status FROM event_assignments 
-            WHERE event_id = $1 AND assigned_to = $2
-            """,
-            event_id,
-            user_id
-        )
+        assignment = await get_assignment(event_id, user_id)
         
         if not assignment:
             await query.answer("❌ Вы не назначены на это мероприятие", show_alert=True)
             return
         
         # Обновляем статус
-        await pool.execute(
-            """
-            UPDATE event_assignments 
-            SET status = 'done', completed_at = NOW()
-            WHERE event_id = $1 AND assigned_to = $2
-            """,
-            event_id,
-            user_id
-        )
+        await set_assignment_status(event_id, user_id, ASSIGNMENT_STATUS_DONE)
         
         # Логируем
         await log_notification(event_id, user_id, 'early_completion')
@@ -995,22 +870,7 @@ async def notify_manager_about_early_completion(event_id, user_id, context):
     if not config.GROUP_CHAT_ID:
         return
     
-    pool = get_db_pool()
-    
-    info = await pool.fetchrow(
-        """
-        SELECT 
-            ce.title,
-            ce.start_time,
-            ce.end_time,
-            u.full_name as engineer_name
-        FROM calendar_events ce
-        LEFT JOIN users u ON u.telegram_id = $2
-        WHERE ce.id = $1
-        """,
-        event_id,
-        user_id
-    )
+    info = await get_event_with_engineer(event_id, user_id)
     
     if info:
         title = info['title']
@@ -1029,4 +889,8 @@ async def notify_manager_about_early_completion(event_id, user_id, context):
                 f"Завершено досрочно!"
             ),
             parse_mode="Markdown"
-        )
\ No newline at end of file
+        )
+
+
+# 🔥 ВАЖНО: таблица строится после определения всех обработчиков модуля.
+callback_router = _build_callback_router()
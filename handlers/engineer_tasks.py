@@ -8,6 +8,7 @@
 
 Используемые компоненты:
 - `database.get_db_pool` — доступ к пулу подключений PostgreSQL;
+- `repositories.outbox.enqueue_broadcast` — постановка уведомлений в очередь в транзакции изменения статуса;
 - `utils.translit.to_cyrillic`, `utils.auditory_names.get_russian_name` — восстановление человекочитаемых названий;
 - обработчики `telegram.ext` (CallbackQueryHandler, ConversationHandler и др.) для построения диалогов Telegram.
 """
@@ -26,6 +27,14 @@ from telegram.ext import (
 )
 
 from database import get_db_pool
+from repositories.events import (
+    day_range,
+    get_engineer_assignment,
+    get_engineer_events_between,
+    get_event,
+    set_assignment_status,
+)
+from repositories.outbox import enqueue_broadcast
 from utils.auditory_names import get_russian_name
 from utils.translit import to_cyrillic
 
@@ -57,35 +66,10 @@ async def show_my_events(message, user_id: int):
     Пример:
         await show_my_events(update.message, update.effective_user.id)
     """
-    pool = get_db_pool()
-    today = datetime.now().date()
-    
     # 🔥 ВАЖНО: выбираем только подтверждённые мероприятия на текущую дату,
     # привязанные к конкретному инженеру и ещё находящиеся в активном статусе.
-    rows = await pool.fetch(
-        """
-        SELECT 
-            ce.id,
-            ce.title,
-            ce.start_time,
-            ce.end_time,
-            a.name as auditory_name,
-            a.building,
-            ea.status,
-            ea.confirmed_at
-        FROM calendar_events ce
-        JOIN event_assignments ea ON ce.id = ea.event_id
-        LEFT JOIN auditories a ON ce.auditory_id = a.id
-        WHERE ea.assigned_to = $1
-          AND DATE(ce.start_time) = $2
-          AND ce.status = 'confirmed'
-          AND ea.status IN ('accepted', 'assigned')
-        ORDER BY ce.start_time
-        """,
-        user_id,
-        today
-    )
-    
+    rows = await get_engineer_events_between(user_id, *day_range(datetime.now().date()))
+
     if not rows:
         await message.reply_text(
             "📋 **У вас нет мероприятий на сегодня.**\n\n"
@@ -167,29 +151,10 @@ async def event_select_handler(update: Update, context: ContextTypes.DEFAULT_TYP
         return
     
     user_id = query.from_user.id
-    pool = get_db_pool()
     
     # 🔥 ВАЖНО: жёстко ограничиваем мероприятие конкретным инженером в WHERE,
     # чтобы инженер не смог открыть карточку чужого назначения.
-    event = await pool.fetchrow(
-        """
-        SELECT 
-            ce.id,
-            ce.title,
-            ce.start_time,
-            ce.end_time,
-            ce.description,
-            a.name as auditory_name,
-            a.building,
-            ea.status,
-            ea.confirmed_at
-        FROM calendar_events ce
-        JOIN event_assignments ea ON ce.id = ea.event_id
-        LEFT JOIN auditories a ON ce.auditory_id = a.id
-        WHERE ce.id = $1 AND ea.assigned_to = $2
-        """,
-        event_id, user_id
-    )
+    event = await get_engineer_assignment(event_id, user_id)
     
     if not event:
         await query.edit_message_text("❌ Мероприятие не найдено")
@@ -323,14 +288,7 @@ async def event_complete_handler(update: Update, context: ContextTypes.DEFAULT_T
             russian_title = to_cyrillic(event['title'])
             
             # 1. Помечаем текущего инженера как выполнившего
-            await conn.execute(
-                """
-                UPDATE event_assignments 
-                SET status = 'done', completed_at = NOW()
-                WHERE event_id = $1 AND assigned_to = $2
-                """,
-                event_id, user_id
-            )
+            await set_assignment_status(event_id, user_id, 'done', conn=conn)
             
             # 2. Находим всех других инженеров, у кого ещё активный статус по этому мероприятию.
             other_engineers = await conn.fetch(
@@ -365,24 +323,23 @@ async def event_complete_handler(update: Update, context: ContextTypes.DEFAULT_T
                     event_id, user_id
                 )
                 
-                # 4. Отправляем уведомления остальным инженерам
+                # 4. Уведомляем остальных инженеров
                 completer_name = query.from_user.full_name
-                for eng in other_engineers:
-                    try:
-                        await context.bot.send_message(
-                            chat_id=eng['telegram_id'],
-                            text=(
-                                f"👥 *Мероприятие автоматически завершено*\n\n"
-                                f"📅 *{russian_title}*\n"
-                                f"✅ Завершил: {completer_name}\n\n"
-                                f"Вы автоматически отмечены как выполнивший задачу.\n"
-                                f"Спасибо за работу!"
-                            ),
-                            parse_mode="Markdown"
-                        )
-                        logger.info(f"Уведомление отправлено инженеру {eng['telegram_id']} о автоматическом завершении")
-                    except Exception as e:
-                        logger.error(f"Не удалось уведомить инженера {eng['telegram_id']}: {e}")
+                engineer_text = (
+                    f"👥 *Мероприятие автоматически завершено*\n\n"
+                    f"📅 *{russian_title}*\n"
+                    f"✅ Завершил: {completer_name}\n\n"
+                    f"Вы автоматически отмечены как выполнивший задачу.\n"
+                    f"Спасибо за работу!"
+                )
+                # Уведомления ставятся в очередь в этой же транзакции и
+                # уйдут только если завершение будет зафиксировано.
+                await enqueue_broadcast(
+                    conn,
+                    [eng['telegram_id'] for eng in other_engineers],
+                    engineer_text,
+                    parse_mode="Markdown",
+                )
             
             # Определяем тип завершения для основного пользователя
             now = datetime.now()
@@ -429,16 +386,10 @@ async def event_complete_handler(update: Update, context: ContextTypes.DEFAULT_T
                 f"{others_text}"
             )
             
-            # Отправляем уведомления менеджерам
-            for manager in managers:
-                try:
-                    await context.bot.send_message(
-                        chat_id=manager['telegram_id'],
-                        text=manager_text,
-                        parse_mode="Markdown"
-                    )
-                except Exception as e:
-                    logger.error(f"Не удалось уведомить менеджера {manager['telegram_id']}: {e}")
+            # Ставим уведомления менеджерам в очередь
+            await enqueue_broadcast(
+                conn, [manager['telegram_id'] for manager in managers], manager_text, parse_mode="Markdown"
+            )
     
     # Логируем действие для аудита и последующей отладки.
     logger.info(
@@ -492,15 +443,7 @@ async def event_cancel_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     # 🔥 ВАЖНО: в этом запросе нас интересует только заголовок,
     # чтобы инженер мог визуально подтвердить, что отменяет нужное мероприятие.
-    pool = get_db_pool()
-    event = await pool.fetchrow(
-        """
-        SELECT ce.title
-        FROM calendar_events ce
-        WHERE ce.id = $1
-        """,
-        event_id
-    )
+    event = await get_event(event_id)
     
     title = to_cyrillic(event['title']) if event else "Неизвестное мероприятие"
     
@@ -559,57 +502,12 @@ async def event_cancel_reason(update: Update, context: ContextTypes.DEFAULT_TYPE
     try:
         # 🔥 ВАЖНО: в запросе объединяются данные о мероприятии, инженере и аудитории,
         # чтобы в уведомлении менеджеру была полноценная картина (кто, где и когда отменил).
-        event_info = await pool.fetchrow(
-            """
-            SELECT 
-                ce.title,
-                ce.start_time,
-                u.full_name as engineer_name,
-                a.name as auditory_name
-            FROM calendar_events ce
-            JOIN event_assignments ea ON ce.id = ea.event_id
-            JOIN users u ON ea.assigned_to = u.telegram_id
-            LEFT JOIN auditories a ON ce.auditory_id = a.id
-            WHERE ce.id = $1 AND ea.assigned_to = $2
-            """,
-            event_id, user_id
-        )
+        event_info = await get_engineer_assignment(event_id, user_id)
         
         if not event_info:
             await update.message.reply_text("❌ Мероприятие не найдено")
             return ConversationHandler.END
         
-        # 1. Обновляем статус назначений для текущего инженера.
-        await pool.execute(
-            """
-            UPDATE event_assignments 
-            SET status = 'cancelled'
-            WHERE event_id = $1 AND assigned_to = $2
-            """,
-            event_id, user_id
-        )
-        
-        # 2. Записываем событие отмены в `cancellation_log` для аудита.
-        await pool.execute(
-            """
-            INSERT INTO cancellation_log 
-            (event_id, cancelled_by, cancelled_at, source, reason, notification_sent)
-            VALUES ($1, $2, NOW(), $3, $4, $5)
-            """,
-            event_id, user_id, 'bot', reason, False
-        )
-        
-        # 3. Отменяем другие активные назначения по этому мероприятию,
-        # чтобы оно полностью исчезло из активных задач команды.
-        await pool.execute(
-            """
-            UPDATE event_assignments 
-            SET status = 'cancelled'
-            WHERE event_id = $1 AND status IN ('assigned', 'accepted')
-            """,
-            event_id
-        )
-        
         russian_title = to_cyrillic(event_info['title'])
         auditory = get_russian_name(event_info['auditory_name']) if event_info['auditory_name'] else "Не указана"
         
@@ -637,28 +535,40 @@ async def event_cancel_reason(update: Update, context: ContextTypes.DEFAULT_TYPE
             f"⚠️ Мероприятие не состоялось."
         )
         
-        notification_sent = False
-        for manager in managers:
-            try:
-                await context.bot.send_message(
-                    chat_id=manager['telegram_id'],
-                    text=manager_text,
-                    parse_mode="Markdown"
+        # 🔥 ВАЖНО: отмена, запись в лог и уведомления менеджерам фиксируются
+        # одной транзакцией — уведомление не потеряется и не уйдёт без отмены.
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                # 1. Обновляем статус назначений для текущего инженера.
+                await set_assignment_status(event_id, user_id, 'cancelled', conn=conn)
+                
+                # 2. Записываем событие отмены в `cancellation_log` для аудита.
+                # `notification_sent` означает, что уведомление поставлено
+                # в очередь (доставку гарантирует services.outbox).
+                await conn.execute(
+                    """
+                    INSERT INTO cancellation_log 
+                    (event_id, cancelled_by, cancelled_at, source, reason, notification_sent)
+                    VALUES ($1, $2, NOW(), $3, $4, $5)
+                    """,
+                    event_id, user_id, 'bot', reason, bool(managers)
+                )
+                
+                # 3. Отменяем другие активные назначения по этому мероприятию,
+                # чтобы оно полностью исчезло из активных задач команды.
+                await conn.execute(
+                    """
+                    UPDATE event_assignments 
+                    SET status = 'cancelled'
+                    WHERE event_id = $1 AND status IN ('assigned', 'accepted')
+                    """,
+                    event_id
+                )
+                
+                # 4. Ставим уведомления менеджерам в очередь.
+                await enqueue_broadcast(
+                    conn, [manager['telegram_id'] for manager in managers], manager_text, parse_mode="Markdown"
                 )
-                notification_sent = True
-            except Exception as e:
-                logger.error(f"Не удалось уведомить менеджера {manager['telegram_id']}: {e}")
-        
-        # Обновляем флаг
-        if notification_sent:
-            await pool.execute(
-                """
-                UPDATE cancellation_log 
-                SET notification_sent = TRUE 
-                WHERE event_id = $1 AND cancelled_by = $2
-                """,
-                event_id, user_id
-            )
         
         # Подтверждение инженеру
         await update.message.reply_text(
@@ -729,34 +639,12 @@ async def event_replace_handler(update: Update, context: ContextTypes.DEFAULT_TY
     pool = get_db_pool()
     
     # Получаем информацию о мероприятии и инженере
-    event_info = await pool.fetchrow(
-        """
-        SELECT 
-            ce.title,
-            ce.start_time,
-            u.full_name as engineer_name
-        FROM calendar_events ce
-        JOIN event_assignments ea ON ce.id = ea.event_id
-        JOIN users u ON ea.assigned_to = u.telegram_id
-        WHERE ce.id = $1 AND ea.assigned_to = $2
-        """,
-        event_id, user_id
-    )
+    event_info = await get_engineer_assignment(event_id, user_id)
     
     if not event_info:
         await query.edit_message_text("❌ Мероприятие не найдено")
         return ConversationHandler.END
     
-    # Обновляем статус назначения на 'replacing'
-    await pool.execute(
-        """
-        UPDATE event_assignments 
-        SET status = 'replacing'
-        WHERE event_id = $1 AND assigned_to = $2
-        """,
-        event_id, user_id
-    )
-    
     # Получаем список менеджеров
     managers = await pool.fetch(
         "SELECT telegram_id FROM users WHERE role IN ('manager', 'superadmin') AND is_active = true"
@@ -766,22 +654,22 @@ async def event_replace_handler(update: Update, context: ContextTypes.DEFAULT_TY
     time_str = event_info['start_time'].strftime("%d.%m.%Y %H:%M")
     russian_title = to_cyrillic(event_info['title'])
     
-    # Уведомление менеджерам
-    for manager in managers:
-        try:
-            await context.bot.send_message(
-                chat_id=manager['telegram_id'],
-                text=(
-                    f"🔄 **Инженер ищет замену**\n\n"
-                    f"👤 Инженер: {event_info['engineer_name']}\n"
-                    f"📅 Мероприятие: {russian_title}\n"
-                    f"🕐 Время: {time_str}\n\n"
-                    f"Требуется найти замену."
-                ),
-                parse_mode="Markdown"
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            # Обновляем статус назначения на 'replacing'
+            await set_assignment_status(event_id, user_id, 'replacing', conn=conn)
+            
+            # Уведомление менеджерам — в той же транзакции
+            await enqueue_broadcast(
+                conn,
+                [manager['telegram_id'] for manager in managers],
+                f"🔄 **Инженер ищет замену**\n\n"
+                f"👤 Инженер: {event_info['engineer_name']}\n"
+                f"📅 Мероприятие: {russian_title}\n"
+                f"🕐 Время: {time_str}\n\n"
+                f"Требуется найти замену.",
+                parse_mode="Markdown",
             )
-        except Exception as e:
-            logger.error(f"Не удалось уведомить менеджера {manager['telegram_id']}: {e}")
     
     # Подтверждение инженеру
     await query.edit_message_text(
@@ -0,0 +1,151 @@
+"""Измерение времени обработки апдейтов Telegram.
+
+Задачи модуля:
+- оборачивать callback каждого зарегистрированного обработчика
+  (`CommandHandler`, `CallbackQueryHandler`, `MessageHandler`, в том числе
+  внутри `ConversationHandler`) без изменения кода самих обработчиков;
+- вести по каждому обработчику гистограмму длительности, число ошибок и
+  число одновременно выполняющихся вызовов.
+
+Использование:
+    # в main.py — после регистрации всех обработчиков
+    instrument_application(application)
+    ...
+    handler_metrics.summary()
+
+Примечания:
+    🔥 ВАЖНО: измеряется весь вызов обработчика — проверка роли
+    (`require_roles`), запросы к БД и ответы в Telegram
+    (`edit_message_text`, `reply_text`). Поэтому время здесь больше суммы
+    запросов из `database.InstrumentedPool`.
+
+    ⚠️ ВНИМАНИЕ: все inline‑кнопки без отдельного `CallbackQueryHandler`
+    учитываются одной строкой `handlers.callback.callback_handler`;
+    разбивка по кнопкам — в `callback_router.stats()`.
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable
+
+from telegram.ext import Application, BaseHandler, ConversationHandler
+
+from utils.metrics import LatencyHistogram
+
+
+@dataclass
+class HandlerStats:
+    """
+    Статистика одного обработчика.
+
+    Атрибуты:
+        latency: длительность вызовов (с ошибками — `latency.errors`).
+        in_flight: выполняется вызовов сейчас.
+        max_in_flight: максимум одновременных вызовов.
+    """
+
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+
+class HandlerMetrics:
+    """Статистика по всем обработчикам приложения, ключ — `модуль.функция`."""
+
+    def __init__(self) -> None:
+        self.handlers: Dict[str, HandlerStats] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def wrap(self, callback: Callable[..., Any]) -> Callable[..., Any]:
+        """Возвращает обёртку над callback обработчика, измеряющую каждый вызов."""
+        if getattr(callback, "__instrumented__", False):
+            return callback
+        name = f"{callback.__module__}.{getattr(callback, '__qualname__', repr(callback))}"
+        stats = self.handlers.setdefault(name, HandlerStats())
+
+        @functools.wraps(callback)
+        async def instrumented(update: Any, context: Any) -> Any:
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            started = time.perf_counter()
+            failed = False
+            try:
+                return await callback(update, context)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                stats.latency.observe(time.perf_counter() - started, error=failed)
+                stats.in_flight -= 1
+                self.in_flight -= 1
+
+        instrumented.__instrumented__ = True  # type: ignore[attr-defined]
+        return instrumented
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Сводка для структурированного лога.
+
+        Возвращает:
+            Словарь: `in_flight`, `max_in_flight` и `handlers` — по каждому
+            вызывавшемуся обработчику n, p50/p95/p99/max (мс), errors,
+            max_in_flight.
+        """
+        handlers = {}
+        for name, stats in sorted(self.handlers.items()):
+            latency = stats.latency
+            if not latency.count:
+                continue
+            handlers[name] = {
+                "n": latency.count,
+                "p50_ms": round(latency.percentile(0.5) * 1000),
+                "p95_ms": round(latency.percentile(0.95) * 1000),
+                "p99_ms": round(latency.percentile(0.99) * 1000),
+                "max_ms": round(latency.max * 1000),
+                "errors": latency.errors,
+                "max_in_flight": stats.max_in_flight,
+            }
+        return {"in_flight": self.in_flight, "max_in_flight": self.max_in_flight, "handlers": handlers}
+
+
+handler_metrics = HandlerMetrics()
+
+
+def _iter_handlers(handlers: Iterable[BaseHandler]) -> Iterable[BaseHandler]:
+    for handler in handlers:
+        if isinstance(handler, ConversationHandler):
+            yield from _iter_handlers(handler.entry_points)
+            for state_handlers in handler.states.values():
+                yield from _iter_handlers(state_handlers)
+            yield from _iter_handlers(handler.fallbacks)
+        else:
+            yield handler
+
+
+def instrument_application(application: Application, metrics: HandlerMetrics = handler_metrics) -> int:
+    """
+    Оборачивает callback всех уже зарегистрированных обработчиков.
+
+    Аргументы:
+        application: приложение Telegram‑бота.
+        metrics: куда писать статистику.
+
+    Возвращает:
+        Сколько обработчиков обёрнуто.
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: вызывать после регистрации всех обработчиков —
+        добавленные позже измеряться не будут. Повторный вызов безопасен.
+    """
+    count = 0
+    for group_handlers in application.handlers.values():
+        for handler in _iter_handlers(group_handlers):
+            handler.callback = metrics.wrap(handler.callback)
+            count += 1
+    return count
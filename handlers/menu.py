@@ -27,9 +27,9 @@ async def get_main_menu_keyboard(user_id: int):
     набором кнопок. В runtime именно она переопределяет текущую реализацию.
     Сохранена для совместимости/истории правок.
     """
-    from database import Database
+    from repositories.users import get_user
     
-    user = await Database.get_user(user_id)
+    user = await get_user(user_id)
     role = user.get('role', 'engineer') if user else 'engineer'
     
     # Базовое меню для всех
@@ -191,9 +191,9 @@ async def get_main_menu_keyboard(user_id: int):
         - для всех добавлена кнопка «Обновить меню» для пересборки клавиатуры
           после изменения ролей.
     """
-    from database import Database
+    from repositories.users import get_user
     
-    user = await Database.get_user(user_id)
+    user = await get_user(user_id)
     role = user.get('role', 'engineer') if user else 'engineer'
     
     # Базовое меню для всех
@@ -0,0 +1,194 @@
+"""Маршрутизатор callback‑данных inline‑кнопок.
+
+Задачи модуля:
+- находить обработчик по `callback_data` за время, не зависящее от числа
+  зарегистрированных кнопок: точные значения — поиск в словаре,
+  параметризованные (`assign_to_<event>_<engineer>`) — префиксное дерево
+  по сегментам `callback_data`, разделённым `_`;
+- разбирать аргументы кнопки один раз и с приведением типов;
+- вести статистику длительности по каждому маршруту.
+
+Использование:
+    router = CallbackRouter()
+    router.exact("help", show_help_route)
+    router.prefix("assign_to_", assign_to_route, event_id=str, engineer_id=str)
+    ...
+    if not await router.dispatch(query.data, update, context):
+        ...  # неизвестная кнопка
+
+Примечания:
+    🔥 ВАЖНО: при пересечении префиксов побеждает самый длинный
+    (`engineer_complete_` не перехватывается `complete_`), поэтому порядок
+    регистрации не важен. Точное совпадение проверяется раньше префиксов.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.metrics import TimingStats
+
+logger = logging.getLogger(__name__)
+
+RouteHandler = Callable[..., Awaitable[Any]]
+
+
+class CallbackArgumentError(ValueError):
+    """Аргументы кнопки не соответствуют маршруту (не хватает частей или неверный тип)."""
+
+
+@dataclass
+class Route:
+    """
+    Зарегистрированный маршрут.
+
+    Атрибуты:
+        name: шаблон маршрута для логов (`assign_to_<event_id>_<engineer_id>`).
+        handler: корутина; вызывается с позиционными аргументами `dispatch`
+            и именованными аргументами кнопки.
+        prefix: префикс для параметризованного маршрута (None — точное значение).
+        params: имена и типы аргументов в порядке следования через `_`.
+        stats: длительность выполнения обработчика.
+    """
+
+    name: str
+    handler: RouteHandler
+    prefix: Optional[str] = None
+    params: List[Tuple[str, Callable[[str], Any]]] = field(default_factory=list)
+    stats: TimingStats = field(default_factory=TimingStats)
+
+    def parse(self, data: str) -> Dict[str, Any]:
+        """
+        Разбирает аргументы кнопки.
+
+        Примечания:
+            Остаток после префикса делится по `_` на `len(params)` частей;
+            последний аргумент получает всё оставшееся (может содержать `_`).
+        """
+        params = self.params
+        if not params:
+            return {}
+        raw = data[len(self.prefix):].split("_", len(params) - 1)
+        if len(raw) != len(params) or "" in raw:
+            raise CallbackArgumentError(f"{self.name}: ожидалось аргументов: {len(params)}, получено {data!r}")
+        kwargs = {}
+        try:
+            for (name, convert), value in zip(params, raw):
+                kwargs[name] = convert(value)
+        except ValueError as e:
+            raise CallbackArgumentError(f"{self.name}: {e}") from e
+        return kwargs
+
+
+class _TrieNode:
+    __slots__ = ("children", "route")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _TrieNode] = {}
+        self.route: Optional[Route] = None
+
+
+class CallbackRouter:
+    """
+    Таблица маршрутов `callback_data` → обработчик.
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: повторная регистрация того же значения или префикса —
+        ошибка конфигурации и приводит к `ValueError` при старте.
+    """
+
+    def __init__(self) -> None:
+        self._exact: Dict[str, Route] = {}
+        self._root = _TrieNode()
+        self._routes: List[Route] = []
+
+    def exact(self, data: str, handler: RouteHandler) -> Route:
+        """Регистрирует кнопку с фиксированным `callback_data`."""
+        if data in self._exact:
+            raise ValueError(f"Маршрут '{data}' уже зарегистрирован")
+        route = Route(name=data, handler=handler)
+        self._exact[data] = route
+        self._routes.append(route)
+        return route
+
+    def prefix(self, prefix: str, handler: RouteHandler, **params: Callable[[str], Any]) -> Route:
+        """
+        Регистрирует параметризованную кнопку.
+
+        Аргументы:
+            prefix: общий префикс `callback_data`, например `assign_to_`;
+                должен заканчиваться на `_`.
+            handler: обработчик маршрута.
+            **params: имена аргументов и функции приведения типа
+                (`int`, `str`) в порядке их следования в `callback_data`.
+        """
+        if not prefix.endswith("_"):
+            raise ValueError(f"Префикс '{prefix}' должен заканчиваться на '_'")
+        node = self._root
+        for segment in prefix[:-1].split("_"):
+            node = node.children.setdefault(segment + "_", _TrieNode())
+        if node.route is not None:
+            raise ValueError(f"Префикс '{prefix}' уже зарегистрирован")
+        name = prefix + "_".join(f"<{param}>" for param in params)
+        node.route = Route(name=name, handler=handler, prefix=prefix, params=list(params.items()))
+        self._routes.append(node.route)
+        return node.route
+
+    def resolve(self, data: str) -> Optional[Route]:
+        """Находит маршрут: точное совпадение, иначе самый длинный префикс."""
+        route = self._exact.get(data)
+        if route is not None:
+            return route
+        # Спуск по сегментам: "engineer_complete_42" → "engineer_", "complete_".
+        node = self._root
+        start = 0
+        while (end := data.find("_", start)) >= 0:
+            node = node.children.get(data[start:end + 1])
+            if node is None:
+                break
+            if node.route is not None:
+                route = node.route
+            start = end + 1
+        return route
+
+    async def dispatch(self, data: str, *args: Any) -> bool:
+        """
+        Вызывает обработчик для `data`.
+
+        Аргументы:
+            data: `callback_data` нажатой кнопки.
+            *args: передаются обработчику первыми (обычно `update, context`).
+
+        Возвращает:
+            False, если маршрут не найден или аргументы не разобрались.
+
+        Примечания:
+            Исключения обработчика пробрасываются дальше (в обработчик ошибок
+            приложения), но учитываются в статистике маршрута.
+        """
+        route = self.resolve(data)
+        if route is None:
+            return False
+        try:
+            kwargs = route.parse(data)
+        except CallbackArgumentError as e:
+            logger.warning(f"Некорректные данные кнопки: {e}")
+            return False
+
+        started = time.perf_counter()
+        failed = False
+        try:
+            await route.handler(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            route.stats.add(time.perf_counter() - started, error=failed)
+        return True
+
+    def stats(self) -> Dict[str, TimingStats]:
+        """Статистика по маршрутам, которые уже вызывались."""
+        return {route.name: route.stats for route in self._routes if route.stats.count}
@@ -1,12 +1,13 @@
 """Обработчик команды /today."""
 
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
 
-from database import Database, get_db_pool
+from database import Database
+from repositories.events import day_range, get_events_between
 from utils.auditory_names import get_russian_name
 
 logger = logging.getLogger(__name__)
@@ -82,35 +83,12 @@ async def get_events_for_date(date) -> list:
         date: объект `date`, для которого нужно получить мероприятия.
 
     Возвращает:
-        Список словарей с полями из `calendar_events` и дополнительным
-        полем `auditory_name` (техническое имя аудитории).
+        Список строк `ScheduleEventRow` с полями из `calendar_events` и
+        дополнительным полем `auditory_name` (техническое имя аудитории).
 
     Примечания:
-        🔥 ВАЖНО (SQL): выборка:
-        - ограничена интервалом [date; date+1 день);
-        - фильтрует только подтверждённые события (`ce.status = 'confirmed'`);
-        - использует LEFT JOIN с `auditories`, чтобы не терять события
-          без привязанной аудитории.
+        🔥 ВАЖНО: обёртка над `repositories.events.get_events_between` для
+        интервала [date; date+1 день) — только подтверждённые события,
+        включая события без привязанной аудитории.
     """
-    pool = get_db_pool()
-    
-    start_date = datetime.combine(date, datetime.min.time())
-    end_date = start_date + timedelta(days=1)
-    
-    rows = await pool.fetch(
-        """
-        SELECT 
-            ce.*,
-            a.name as auditory_name
-        FROM calendar_events ce
-        LEFT JOIN auditories a ON ce.auditory_id = a.id
-        WHERE ce.start_time >= $1 
-          AND ce.start_time < $2
-          AND ce.status = 'confirmed'
-        ORDER BY ce.start_time
-        """,
-        start_date,
-        end_date
-    )
-    
-    return [dict(row) for row in rows]
\ No newline at end of file
+    return await get_events_between(*day_range(date))
\ No newline at end of file
@@ -14,8 +14,9 @@
 """
 
 import asyncio
+import json
 import logging
-from datetime import datetime, timedelta
+from datetime import time
 
 from telegram import Update
 from telegram.ext import (
@@ -31,18 +32,28 @@ from config import config
 from database import close_db_pool, init_db_pool
 from handlers import start, status, today
 from handlers.callback import callback_handler
+from handlers.instrumentation import handler_metrics, instrument_application
 from handlers.message import message_handler
 from handlers.menu import menu_button_handler
 from handlers.assign import assign_handler
 from services.sync_scheduler import sync_loop
+from services.calendar_webhook import (
+    calendar_push_listener_loop,
+    is_enabled as webhook_enabled,
+    start_webhook_server,
+    watch_renewal_loop,
+)
+from services.metrics_server import handler_metrics_log_loop, start_metrics_server
+from services.outbox import outbox_loop
+from repositories.users import last_active_buffer, last_active_flush_loop, user_cache_listener_loop
+from services.job_runner import JobRunner, JobSpec
+from services.leader import LeaderElector
 from services.reminder import (
-    find_upcoming_events, 
-    send_reminder, 
-    auto_complete_events,
-    find_completed_events,      # ← новая функция
-    send_completion_reminder,    # ← новая функция (опционально)
-    log_notification
+    send_afternoon_report,
+    send_manager_evening_reminder,
+    send_morning_summary,
 )
+from services.reminder_scheduler import reminder_scheduler_loop
 from handlers.admin import admin_panel_handler, manage_roles_handler
 
 logging.basicConfig(
@@ -61,131 +72,12 @@ async def new_chat_member_handler(update: Update, context: ContextTypes.DEFAULT_
         await show_persistent_menu(update)
 
 
-async def reminder_loop(application: Application):
-    """
-    Бесконечный цикл проверки событий для отправки напоминаний и авто‑завершения.
-
-    Сценарий:
-        1. Периодически ищет предстоящие мероприятия и отправляет напоминания.
-        2. Ищет завершившиеся мероприятия и напоминает инженерам отметить выполнение.
-        3. Автоматически завершает «подвисшие» мероприятия по истечении времени.
-
-    Примечания:
-        🔥 ВАЖНО: цикл обёрнут в try/except, чтобы единичные ошибки в БД или сети
-        не останавливали фоновую задачу. Между итерациями выдерживается пауза 5 минут.
-    """
-    while True:
-        try:
-            # 1. Напоминания о предстоящих событиях
-            upcoming_events = await find_upcoming_events(minutes_before=35)
-            for event in upcoming_events:
-                if event.get('telegram_id'):
-                    await send_reminder(event, application.bot)
-                    await asyncio.sleep(1)
-            
-            # 2. Напоминания о завершении
-            completed_events = await find_completed_events()
-            for event in completed_events:
-                if event.get('telegram_id'):
-                    await send_completion_reminder(event, application.bot)
-                    await asyncio.sleep(1)
-            
-            # 3. Автоматическое завершение
-            auto_completed = await auto_complete_events()
-            if auto_completed > 0:
-                logger.info(f"Автоматически завершено {auto_completed} мероприятий")
-            
-        except Exception as e:
-            logger.error(f"Ошибка в цикле напоминаний: {e}", exc_info=True)
-        
-        await asyncio.sleep(300)  # каждые 5 минут
-
-
-async def morning_summary_loop(application: Application):
-    """
-    Фоновый цикл отправки утренней сводки в 9:00 каждый день.
-
-    Логика:
-        - вычисляет ближайшее время запуска (сдвигает на следующий день, если время ушло);
-        - спит до нужного момента;
-        - вызывает `services.reminder.send_morning_summary`.
-
-    Примечания:
-        ⚠️ ВНИМАНИЕ: цикл не использует cron, поэтому при долгих остановках
-        бота сводка может прийти позже 9:00, но сам механизм сохраняется простым.
-    """
-    while True:
-        try:
-            now = datetime.now()
-            # Вычисляем время до следующего 9:00
-            next_run = now.replace(hour=9, minute=0, second=0, microsecond=0)
-            if now >= next_run:
-                next_run += timedelta(days=1)
-            
-            wait_seconds = (next_run - now).total_seconds()
-            logger.info(f"Утренняя сводка запланирована через {wait_seconds/3600:.1f} часов")
-            
-            await asyncio.sleep(wait_seconds)
-            
-            # Отправляем сводку
-            from services.reminder import send_morning_summary
-            await send_morning_summary(application.bot)
-            
-        except Exception as e:
-            logger.error(f"Ошибка в цикле утренней сводки: {e}", exc_info=True)
-
-
-async def afternoon_report_loop(application: Application):
-    """
-    Фоновый цикл отправки дневного отчёта менеджеру в 14:00 каждый день.
-
-    Логика аналогична `morning_summary_loop`, но использует функцию
-    `services.reminder.send_afternoon_report`.
-    """
-    while True:
-        try:
-            now = datetime.now()
-            # Вычисляем время до следующего 14:00
-            next_run = now.replace(hour=14, minute=0, second=0, microsecond=0)
-            if now >= next_run:
-                next_run += timedelta(days=1)
-            
-            wait_seconds = (next_run - now).total_seconds()
-            logger.info(f"Дневной отчёт запланирован через {wait_seconds/3600:.1f} часов")
-            
-            await asyncio.sleep(wait_seconds)
-            
-            # Отправляем отчёт
-            from services.reminder import send_afternoon_report
-            await send_afternoon_report(application.bot)
-            
-        except Exception as e:
-            logger.error(f"Ошибка в цикле дневного отчёта: {e}", exc_info=True)
-
-async def evening_reminder_loop(application: Application):
-    """
-    Цикл для вечернего напоминания менеджеру о назначениях.
-    Запускается в 18:00 каждый день.
-    """
-    while True:
-        try:
-            now = datetime.now()
-            # Вычисляем время до следующего 18:00
-            next_run = now.replace(hour=18, minute=0, second=0, microsecond=0)
-            if now >= next_run:
-                next_run += timedelta(days=1)
-            
-            wait_seconds = (next_run - now).total_seconds()
-            logger.info(f"Вечернее напоминание запланировано через {wait_seconds/3600:.1f} часов")
-            
-            await asyncio.sleep(wait_seconds)
-            
-            # Отправляем напоминание
-            from services.reminder import send_manager_evening_reminder
-            await send_manager_evening_reminder(application.bot)
-            
-        except Exception as e:
-            logger.error(f"Ошибка в цикле вечернего напоминания: {e}", exc_info=True)
+# Ежедневные задачи: время — в часовом поясе config.TIMEZONE.
+DAILY_JOBS = [
+    JobSpec("morning_summary", time(9, 0), send_morning_summary),
+    JobSpec("afternoon_report", time(14, 0), send_afternoon_report),
+    JobSpec("manager_evening_reminder", time(18, 0), send_manager_evening_reminder),
+]
 
 
 async def main() -> None:
@@ -258,30 +150,65 @@ async def main() -> None:
         new_chat_member_handler, 
         ChatMemberHandler.MY_CHAT_MEMBER
     ))
+    
+    # 6. Замер времени всех обработчиков (после регистрации последнего из них).
+    instrumented = instrument_application(application)
+    logger.info(f"Замер времени обработчиков подключён: {instrumented} шт.")
 
     # ============================================
     # ЗАПУСК ФОНОВЫХ ЗАДАЧ
     # ============================================
     
-    # Синхронизация календаря (каждые 6 часов).
-    asyncio.create_task(sync_loop())
-    logger.info("Фоновая синхронизация календаря запущена")
+    # Циклы, работающие на каждом экземпляре; останавливаются в finally.
+    background_tasks: list[asyncio.Task] = []
+
+    # 🔥 ВАЖНО: синхронизация, напоминания и ежедневные задачи выполняет
+    # только ведущий экземпляр (services/leader.py); обработка апдейтов,
+    # приём push‑уведомлений и доставка очереди работают на всех.
+    leader_jobs = {
+        # Синхронизация календаря (изменения — каждые несколько минут, полная — раз в 6 часов).
+        "calendar_sync": sync_loop,
+        # Напоминания и авто‑завершение мероприятий (точные таймеры).
+        "reminders": reminder_scheduler_loop,
+        # Утренняя сводка, дневной отчёт и вечернее напоминание менеджеру.
+        "daily_jobs": JobRunner(application.bot, DAILY_JOBS).run,
+    }
+    
+    # Push‑уведомления Google Calendar (только если задан GOOGLE_WEBHOOK_URL).
+    webhook_server = None
+    try:
+        webhook_server = await start_webhook_server()
+    except OSError as e:
+        logger.error("Не удалось запустить приёмник push‑уведомлений: %s", e)
+    if webhook_server is not None:
+        leader_jobs["watch_renewal"] = watch_renewal_loop
+        logger.info("Приёмник push‑уведомлений календаря запущен")
+    # Уведомления принимает любой экземпляр, синхронизирует по ним ведущий.
+    if webhook_enabled():
+        leader_jobs["calendar_push"] = calendar_push_listener_loop
     
-    # Напоминания о мероприятиях (каждые 5 минут).
-    asyncio.create_task(reminder_loop(application))
-    logger.info("Фоновая проверка напоминаний запущена")
+    # Сброс кэша пользователей по уведомлениям users_changed (на всех экземплярах).
+    background_tasks.append(asyncio.create_task(user_cache_listener_loop(), name="user_cache_listener"))
     
-    # Утренняя сводка (в 9:00).
-    asyncio.create_task(morning_summary_loop(application))
-    logger.info("Планировщик утренней сводки запущен")
+    # Отложенная запись last_active (одним запросом раз в несколько секунд).
+    background_tasks.append(asyncio.create_task(last_active_flush_loop(), name="last_active_flush"))
     
-    # Дневной отчёт (в 14:00).
-    asyncio.create_task(afternoon_report_loop(application))
-    logger.info("Планировщик дневного отчёта запущен")
-
-    # Вечернее напоминание менеджеру (в 18:00)
-    asyncio.create_task(evening_reminder_loop(application))
-    logger.info("Планировщик вечернего напоминания запущен")
+    # Сводка по времени обработчиков в лог и эндпоинт Prometheus (если задан METRICS_PORT).
+    if config.METRICS_LOG_MINUTES > 0:
+        background_tasks.append(asyncio.create_task(handler_metrics_log_loop(), name="handler_metrics_log"))
+    metrics_server = None
+    try:
+        metrics_server = await start_metrics_server()
+    except OSError as e:
+        logger.error("Не удалось запустить эндпоинт метрик: %s", e)
+    
+    # Доставка уведомлений из очереди notification_outbox.
+    background_tasks.append(asyncio.create_task(outbox_loop(application.bot), name="outbox"))
+    logger.info("Доставка уведомлений из очереди запущена")
+    
+    leader = LeaderElector(leader_jobs)
+    leader.start()
+    logger.info("Выбор ведущего экземпляра для фоновых задач запущен")
 
     try:
         logger.info("Бот запущен")
@@ -298,10 +225,23 @@ async def main() -> None:
     except Exception as e:
         logger.critical("Ошибка при запуске бота: %s", e, exc_info=True)
     finally:
+        await leader.stop()
         if application.updater.running:
             await application.updater.stop()
         await application.stop()
         await application.shutdown()
+        if webhook_server is not None:
+            await webhook_server.stop()
+        if metrics_server is not None:
+            await metrics_server.stop()
+        # Фоновые циклы останавливаются до финальной записи и закрытия пула:
+        # иначе они обращались бы к уже закрытому пулу.
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        logger.info(f"Время обработчиков: {json.dumps(handler_metrics.summary(), ensure_ascii=False)}")
+        await last_active_buffer.flush()
+        logger.info(f"Отметки активности пользователей: {last_active_buffer.summary()}")
         await close_db_pool()
         logger.info("Бот остановлен")
 
@@ -0,0 +1,31 @@
+-- ========================================
+-- Версия: v0.10.0
+-- Описание: Каналы push-уведомлений Google Calendar (events.watch)
+-- Дата: 17.10.2026
+-- ========================================
+
+-- Каждый канал живёт ограниченное время (expiration), после чего Google
+-- перестаёт присылать уведомления. Бот заранее создаёт новый канал и
+-- останавливает старый (см. services/calendar_webhook.py).
+CREATE TABLE IF NOT EXISTS calendar_watch_channels (
+    channel_id VARCHAR(64) PRIMARY KEY,
+    calendar_id VARCHAR(255) NOT NULL,
+    resource_id VARCHAR(255) NOT NULL,
+    token VARCHAR(64) NOT NULL,
+    expiration TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    stopped_at TIMESTAMP,
+    last_notification_at TIMESTAMP
+);
+
+COMMENT ON TABLE calendar_watch_channels IS 'Каналы push-уведомлений Google Calendar';
+COMMENT ON COLUMN calendar_watch_channels.resource_id IS 'resourceId из ответа events.watch (нужен для channels.stop)';
+COMMENT ON COLUMN calendar_watch_channels.token IS 'Секрет канала, сверяется с заголовком X-Goog-Channel-Token';
+COMMENT ON COLUMN calendar_watch_channels.stopped_at IS 'Когда канал был остановлен (NULL — активен до expiration)';
+
+CREATE INDEX IF NOT EXISTS idx_calendar_watch_channels_active
+    ON calendar_watch_channels(calendar_id, expiration DESC)
+    WHERE stopped_at IS NULL;
+
+-- Права доступа (выполнять после создания пользователя bot_user)
+-- GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO bot_user;
@@ -0,0 +1,23 @@
+-- ========================================
+-- Версия: v0.11.0
+-- Описание: Синхронизация нескольких календарей Google
+-- Дата: 17.10.2026
+-- ========================================
+
+-- Состояние синхронизации по каждому календарю: длительность последнего
+-- прогона и счётчик ошибок подряд (сбрасывается после успешного прогона).
+ALTER TABLE calendar_sync_state
+ADD COLUMN IF NOT EXISTS last_duration_ms INTEGER,
+ADD COLUMN IF NOT EXISTS error_count INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS last_error TEXT,
+ADD COLUMN IF NOT EXISTS last_error_at TIMESTAMP;
+
+COMMENT ON COLUMN calendar_sync_state.error_count IS 'Количество неудачных синхронизаций подряд';
+COMMENT ON COLUMN calendar_sync_state.last_error IS 'Текст последней ошибки (NULL после успешной синхронизации)';
+
+-- Календарь, из которого событие синхронизировано впервые. Какие календари
+-- держат событие сейчас, хранит source_calendars (миграция v0.17.0).
+ALTER TABLE calendar_events
+ADD COLUMN IF NOT EXISTS calendar_id VARCHAR(255);
+
+COMMENT ON COLUMN calendar_events.calendar_id IS 'Календарь Google, из которого синхронизировано событие';
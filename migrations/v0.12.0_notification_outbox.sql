@@ -0,0 +1,41 @@
+-- ========================================
+-- Версия: v0.12.0
+-- Описание: Очередь исходящих уведомлений (outbox)
+-- Дата: 17.10.2026
+-- ========================================
+
+-- Уведомления записываются в outbox в той же транзакции, что и изменение
+-- состояния (завершение, отмена, замена, напоминание), и доставляются
+-- фоновым обработчиком (см. services/outbox.py). Несколько экземпляров бота
+-- могут разбирать очередь одновременно: строки захватываются через
+-- SELECT ... FOR UPDATE SKIP LOCKED и «арендуются» сдвигом next_attempt_at.
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    chat_id BIGINT NOT NULL,
+    text TEXT NOT NULL,
+    parse_mode VARCHAR(16),
+    reply_markup JSONB,
+    notification_id INTEGER REFERENCES notifications(id) ON DELETE SET NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'sent', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    last_error TEXT,
+    telegram_message_id BIGINT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    sent_at TIMESTAMP
+);
+
+COMMENT ON TABLE notification_outbox IS 'Очередь исходящих уведомлений Telegram';
+COMMENT ON COLUMN notification_outbox.reply_markup IS 'InlineKeyboardMarkup.to_dict()';
+COMMENT ON COLUMN notification_outbox.notification_id IS 'Запись в notifications, которая обновляется при доставке';
+COMMENT ON COLUMN notification_outbox.next_attempt_at IS 'Когда строку можно взять в работу (аренда или пауза перед повтором)';
+
+-- Очередь к отправке: только pending, в порядке готовности.
+CREATE INDEX IF NOT EXISTS idx_notification_outbox_pending
+    ON notification_outbox(next_attempt_at, id)
+    WHERE status = 'pending';
+
+-- Права доступа (выполнять после создания пользователя bot_user)
+-- GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO bot_user;
+-- GRANT ALL PRIVILEGES ON ALL SEQUENCES IN SCHEMA public TO bot_user;
@@ -0,0 +1,27 @@
+-- ========================================
+-- Версия: v0.13.0
+-- Описание: Отметки запусков ежедневных задач (services/job_runner.py)
+-- Дата: 17.10.2026
+-- ========================================
+
+-- Одна строка на задачу: последний отработанный «слот» расписания.
+-- По ней бот догоняет пропущенный запуск после простоя и не выполняет
+-- один слот дважды, даже если запущено несколько экземпляров бота
+-- (слот занимается одним upsert с условием last_slot < нового слота).
+CREATE TABLE IF NOT EXISTS scheduled_job_runs (
+    job_name VARCHAR(64) PRIMARY KEY,
+    last_slot TIMESTAMPTZ NOT NULL,
+    last_started_at TIMESTAMPTZ,
+    last_finished_at TIMESTAMPTZ,
+    last_duration_ms INTEGER,
+    last_error TEXT,
+    run_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+COMMENT ON TABLE scheduled_job_runs IS 'Последние запуски ежедневных задач бота';
+COMMENT ON COLUMN scheduled_job_runs.last_slot IS 'Плановое время последнего выполненного запуска';
+COMMENT ON COLUMN scheduled_job_runs.last_error IS 'Ошибка последнего запуска (NULL — успешно)';
+
+-- Права доступа (выполнять после создания пользователя bot_user)
+-- GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO bot_user;
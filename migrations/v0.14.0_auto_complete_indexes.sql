@@ -0,0 +1,29 @@
+-- ========================================
+-- Версия: v0.14.0
+-- Описание: Индексы для авто‑завершения назначений (services/reminder.py)
+-- Дата: 17.10.2026
+-- ========================================
+
+-- Авто‑завершение выбирает мероприятия по окну end_time
+-- (от AUTO_COMPLETE_LOOKBACK_DAYS до AUTO_COMPLETE_DELAY назад).
+CREATE INDEX IF NOT EXISTS idx_calendar_events_end_time
+    ON calendar_events (end_time);
+
+-- Активные назначения — малая доля таблицы: частичный индекс не растёт
+-- вместе с историей выполненных и отменённых назначений.
+CREATE INDEX IF NOT EXISTS idx_event_assignments_active
+    ON event_assignments (event_id)
+    WHERE status IN ('assigned', 'accepted');
+
+-- Данные миграция не меняет. Назначения мероприятий, закончившихся
+-- раньше окна AUTO_COMPLETE_LOOKBACK_DAYS, авто‑завершение больше не
+-- подбирает; закрыть их можно вручную (подставьте значение окна):
+--   UPDATE event_assignments ea
+--   SET status = 'done', completed_at = NOW()
+--   FROM calendar_events ce
+--   WHERE ce.id = ea.event_id
+--     AND ce.end_time <= NOW() - make_interval(days => <AUTO_COMPLETE_LOOKBACK_DAYS>)
+--     AND ea.status IN ('assigned', 'accepted');
+
+-- Права доступа (выполнять после создания пользователя bot_user)
+-- GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO bot_user;
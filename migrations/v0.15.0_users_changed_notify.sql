@@ -0,0 +1,38 @@
+-- ========================================
+-- Версия: v0.15.0
+-- Описание: Уведомления об изменении пользователей для кэша бота (repositories/users.py)
+-- Дата: 17.10.2026
+-- ========================================
+
+-- Каждый экземпляр бота держит кэш строк users и слушает канал
+-- users_changed (payload — telegram_id). Обновление одного last_active
+-- уведомления не порождает: оно происходит на каждое действие пользователя
+-- и на права/меню не влияет.
+CREATE OR REPLACE FUNCTION notify_users_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('users_changed', OLD.telegram_id::text);
+        RETURN OLD;
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        IF (to_jsonb(OLD) - 'last_active') = (to_jsonb(NEW) - 'last_active') THEN
+            RETURN NEW;
+        END IF;
+        IF OLD.telegram_id <> NEW.telegram_id THEN
+            PERFORM pg_notify('users_changed', OLD.telegram_id::text);
+        END IF;
+    END IF;
+
+    PERFORM pg_notify('users_changed', NEW.telegram_id::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_users_changed ON users;
+CREATE TRIGGER trg_users_changed
+    AFTER INSERT OR UPDATE OR DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION notify_users_changed();
+
+-- Права доступа (выполнять после создания пользователя bot_user)
+-- GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO bot_user;
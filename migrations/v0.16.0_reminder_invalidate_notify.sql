@@ -0,0 +1,46 @@
+-- ========================================
+-- Версия: v0.16.0
+-- Описание: Уведомления об изменении назначений и времени мероприятий для таймеров напоминаний (services/reminder_scheduler.py)
+-- Дата: 17.10.2026
+-- ========================================
+
+-- Таймеры напоминаний держит только ведущий экземпляр бота. Назначения
+-- меняются на любом экземпляре, в дашборде или ручным SQL, поэтому об
+-- изменениях сообщает триггер: канал reminder_invalidate, payload — id
+-- мероприятия. Уведомление доставляется после фиксации транзакции,
+-- одинаковые уведомления одной транзакции PostgreSQL схлопывает.
+CREATE OR REPLACE FUNCTION notify_reminder_invalidate() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'calendar_events' THEN
+        PERFORM pg_notify('reminder_invalidate', COALESCE(NEW.id, OLD.id)::text);
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM pg_notify('reminder_invalidate', OLD.event_id::text);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM pg_notify('reminder_invalidate', NEW.event_id::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_event_assignments_reminder_invalidate ON event_assignments;
+CREATE TRIGGER trg_event_assignments_reminder_invalidate
+    AFTER INSERT OR UPDATE OR DELETE ON event_assignments
+    FOR EACH ROW EXECUTE FUNCTION notify_reminder_invalidate();
+
+-- Для мероприятий важны только перенос и отмена: синхронизация календаря
+-- обновляет строки и при смене названия или описания.
+DROP TRIGGER IF EXISTS trg_calendar_events_reminder_invalidate ON calendar_events;
+CREATE TRIGGER trg_calendar_events_reminder_invalidate
+    AFTER UPDATE OF start_time, end_time, status ON calendar_events
+    FOR EACH ROW
+    WHEN (OLD.start_time IS DISTINCT FROM NEW.start_time
+          OR OLD.end_time IS DISTINCT FROM NEW.end_time
+          OR OLD.status IS DISTINCT FROM NEW.status)
+    EXECUTE FUNCTION notify_reminder_invalidate();
+
+-- Права доступа (выполнять после создания пользователя bot_user)
+-- GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO bot_user;
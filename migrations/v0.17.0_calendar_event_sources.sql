@@ -0,0 +1,23 @@
+-- ========================================
+-- Версия: v0.17.0
+-- Описание: Календари‑источники события (services/google_calendar.py)
+-- Дата: 17.10.2026
+-- ========================================
+
+-- Событие Google, забронированное в календарях нескольких аудиторий,
+-- хранится одной строкой. source_calendars — все календари, в которых
+-- событие сейчас есть: удаление из одного календаря снимает его из
+-- списка, а отменяется событие, только когда список опустел.
+ALTER TABLE calendar_events
+ADD COLUMN IF NOT EXISTS source_calendars VARCHAR(255)[] NOT NULL DEFAULT '{}';
+
+-- Пока известен только первый календарь; остальные добавятся при
+-- ближайшей полной синхронизации каждого календаря.
+UPDATE calendar_events
+SET source_calendars = ARRAY[calendar_id]
+WHERE calendar_id IS NOT NULL AND cardinality(source_calendars) = 0;
+
+COMMENT ON COLUMN calendar_events.source_calendars IS 'Календари Google, в которых событие есть сейчас';
+
+-- Права доступа (выполнять после создания пользователя bot_user)
+-- GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO bot_user;
@@ -0,0 +1,24 @@
+-- ========================================
+-- Версия: v0.8.0
+-- Описание: Состояние инкрементальной синхронизации Google Calendar
+-- Дата: 17.10.2026
+-- ========================================
+
+-- Таблица хранит nextSyncToken Google Calendar для каждого календаря.
+-- По токену следующая синхронизация запрашивает только изменения
+-- (включая отменённые события), а не всё окно целиком.
+CREATE TABLE IF NOT EXISTS calendar_sync_state (
+    calendar_id VARCHAR(255) PRIMARY KEY,
+    sync_token TEXT,
+    last_full_sync TIMESTAMP,
+    last_sync TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+COMMENT ON TABLE calendar_sync_state IS 'Состояние синхронизации календарей Google';
+COMMENT ON COLUMN calendar_sync_state.sync_token IS 'nextSyncToken из последней успешной синхронизации (NULL — нужна полная)';
+COMMENT ON COLUMN calendar_sync_state.last_full_sync IS 'Время последней полной синхронизации';
+COMMENT ON COLUMN calendar_sync_state.last_sync IS 'Время последней успешной синхронизации (любой)';
+
+-- Права доступа (выполнять после создания пользователя bot_user)
+-- GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO bot_user;
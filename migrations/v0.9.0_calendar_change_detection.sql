@@ -0,0 +1,24 @@
+-- ========================================
+-- Версия: v0.9.0
+-- Описание: Отпечаток содержимого событий календаря для пропуска холостых обновлений
+-- Дата: 17.10.2026
+-- ========================================
+
+-- content_hash — SHA-256 по всем синхронизируемым полям события (включая etag
+-- и updated из Google). Строка перезаписывается только при смене отпечатка,
+-- поэтому неизменившиеся события не порождают мёртвых версий строк и не
+-- трогают индексы idx_calendar_events_*.
+ALTER TABLE calendar_events
+ADD COLUMN IF NOT EXISTS content_hash CHAR(64),
+ADD COLUMN IF NOT EXISTS google_etag VARCHAR(64),
+ADD COLUMN IF NOT EXISTS google_updated TIMESTAMP,
+ADD COLUMN IF NOT EXISTS last_seen TIMESTAMP;
+
+COMMENT ON COLUMN calendar_events.content_hash IS 'SHA-256 синхронизируемых полей события';
+COMMENT ON COLUMN calendar_events.google_etag IS 'etag события в Google Calendar';
+COMMENT ON COLUMN calendar_events.google_updated IS 'Время последнего изменения события в Google Calendar (UTC)';
+COMMENT ON COLUMN calendar_events.last_seen IS 'Когда событие последний раз встречалось в выдаче Google (обновляется не чаще раза в час)';
+
+-- Существующие строки: считаем их увиденными при последней синхронизации.
+-- content_hash остаётся NULL — строки один раз перезапишутся при ближайшей синхронизации.
+UPDATE calendar_events SET last_seen = last_sync WHERE last_seen IS NULL;
@@ -3,7 +3,9 @@
 Задачи модуля:
 - инкапсулировать логику чтения активных аудиторий из базы;
 - предоставить простой кэш «в памяти процесса» для частых операций;
-- дать вспомогательные функции для получения аудитории и её имени по ID.
+- дать вспомогательные функции для получения аудитории и её имени по ID;
+- сопоставлять «сырые» названия аудиторий из Google Calendar с ID
+  (`AuditoryResolver`) без обращения к БД на каждое событие.
 
 Кэширование:
     🔥 ВАЖНО: используется очень простой TTL‑кэш на несколько минут
@@ -15,11 +17,18 @@
 
 from __future__ import annotations
 
+import logging
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
 from database import get_db_pool
 from core.types import AuditoryRow
+from utils.auditory_names import get_russian_name
+from utils.auditory_normalizer import AuditoryNormalizer
+from utils.translit import to_latin
+
+logger = logging.getLogger(__name__)
 
 
 _AUDITORIES_CACHE_TTL = timedelta(minutes=5)
@@ -124,3 +133,107 @@ async def get_auditory_name_by_id(auditory_id: int) -> Optional[str]:
     auditory = await get_auditory_by_id(auditory_id)
     return auditory.get("name") if auditory else None
 
+
+
+class AuditoryResolver:
+    """
+    Индекс для сопоставления названий аудиторий из календаря с их ID.
+
+    Сценарий:
+        - в начале синхронизации вызывается `await AuditoryResolver.load()`,
+          который читает таблицу `auditories` одним запросом;
+        - для каждого события вызывается `resolve(name)` — поиск идёт
+          только по словарям в памяти;
+        - в конце синхронизации `report_unresolved()` один раз логирует
+          все названия, которые не удалось сопоставить.
+
+    Индексируются:
+        - техническое имя аудитории из БД (результат `to_latin`);
+        - нормализованные ключи технического и русского названий;
+        - все варианты написания из `AuditoryNormalizer.ALIASES`.
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: в индекс попадают и неактивные аудитории — так же, как
+        и при прежнем поиске `SELECT id FROM auditories WHERE name = $1`.
+    """
+
+    def __init__(self, auditories: List[AuditoryRow]):
+        self._by_name: Dict[str, int] = {}
+        self._by_key: Dict[str, int] = {}
+        self._resolved: Dict[str, Optional[int]] = {}
+        self._unresolved: Counter = Counter()
+
+        normalize_key = AuditoryNormalizer.normalize_key
+        for auditory in auditories:
+            name, auditory_id = auditory["name"], auditory["id"]
+            self._by_name[name] = auditory_id
+            self._by_key.setdefault(normalize_key(name), auditory_id)
+            self._by_key.setdefault(normalize_key(get_russian_name(name)), auditory_id)
+
+        # Канонические русские названия из ALIASES приводим к ID через те же
+        # ключи, что и названия из БД.
+        for alias_key, canonical_name in AuditoryNormalizer.ALIASES.items():
+            auditory_id = self._by_key.get(normalize_key(canonical_name))
+            if auditory_id is not None:
+                self._by_key.setdefault(alias_key, auditory_id)
+
+    @classmethod
+    async def load(cls) -> "AuditoryResolver":
+        """
+        Загружает все аудитории из БД и строит индекс.
+
+        Возвращает:
+            Готовый к использованию `AuditoryResolver`.
+        """
+        pool = get_db_pool()
+        rows = await pool.fetch("SELECT id, name FROM auditories")
+        resolver = cls([dict(row) for row in rows])  # type: ignore[misc]
+        logger.debug(
+            "Индекс аудиторий построен: %s аудиторий, %s ключей",
+            len(rows),
+            len(resolver._by_key),
+        )
+        return resolver
+
+    def resolve(self, raw_auditory_name: Optional[str]) -> Optional[int]:
+        """
+        Возвращает ID аудитории по «сырому» названию из Google Calendar.
+
+        Алгоритм:
+        1. Точное совпадение транслитерации (`to_latin`) с именем в БД.
+        2. Поиск по нормализованному ключу (русские названия, синонимы).
+        3. При неудаче название запоминается для `report_unresolved`.
+        """
+        name = (raw_auditory_name or "").strip()
+        if not name:
+            return None
+
+        if name in self._resolved:
+            auditory_id = self._resolved[name]
+        else:
+            auditory_id = self._by_name.get(to_latin(name))
+            if auditory_id is None:
+                auditory_id = self._by_key.get(AuditoryNormalizer.normalize_key(name))
+            self._resolved[name] = auditory_id
+
+        if auditory_id is None:
+            self._unresolved[name] += 1
+        return auditory_id
+
+    def report_unresolved(self) -> None:
+        """
+        Логирует одним предупреждением все несопоставленные названия за прогон.
+
+        После вызова список сбрасывается, чтобы повторный вызов не дублировал
+        предупреждение.
+        """
+        if not self._unresolved:
+            return
+        details = ", ".join(f"'{name}' ×{count}" for name, count in self._unresolved.most_common())
+        logger.warning(
+            "Не найдено аудиторий для %s названий: %s. "
+            "Проверь справочник аудиторий и при необходимости добавь вариант в ALIASES.",
+            len(self._unresolved),
+            details,
+        )
+        self._unresolved.clear()
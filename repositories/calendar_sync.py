@@ -0,0 +1,121 @@
+"""Репозиторий для работы с таблицей calendar_sync_state.
+
+Задачи модуля:
+- хранить `nextSyncToken` Google Calendar для каждого календаря;
+- отмечать время последней полной и инкрементальной синхронизации;
+- сбрасывать токен, когда Google сообщает о его устаревании (HTTP 410);
+- вести по каждому календарю длительность прогона и счётчик ошибок.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from database import get_db_pool
+
+
+async def get_sync_token(calendar_id: str) -> Optional[str]:
+    """
+    Возвращает сохранённый `syncToken` календаря.
+
+    Аргументы:
+        calendar_id: идентификатор календаря Google.
+
+    Возвращает:
+        Токен или None, если полная синхронизация ещё не выполнялась
+        либо токен был сброшен.
+    """
+    pool = get_db_pool()
+    return await pool.fetchval(
+        "SELECT sync_token FROM calendar_sync_state WHERE calendar_id = $1",
+        calendar_id,
+    )
+
+
+async def save_sync_token(calendar_id: str, sync_token: str, full_sync: bool) -> None:
+    """
+    Сохраняет новый `syncToken` после успешной синхронизации.
+
+    Аргументы:
+        calendar_id: идентификатор календаря Google.
+        sync_token: значение `nextSyncToken` с последней страницы выдачи.
+        full_sync: True, если токен получен в результате полной синхронизации.
+
+    Примечания:
+        🔥 ВАЖНО: вызывать только после того, как все страницы выдачи
+        сохранены в БД. Иначе изменения из несохранённых страниц будут
+        потеряны — следующий запрос по токену их уже не вернёт.
+    """
+    pool = get_db_pool()
+    await pool.execute(
+        """
+        INSERT INTO calendar_sync_state (calendar_id, sync_token, last_full_sync, last_sync, updated_at)
+        VALUES ($1, $2, CASE WHEN $3 THEN NOW() END, NOW(), NOW())
+        ON CONFLICT (calendar_id) DO UPDATE SET
+            sync_token = EXCLUDED.sync_token,
+            last_full_sync = COALESCE(EXCLUDED.last_full_sync, calendar_sync_state.last_full_sync),
+            last_sync = NOW(),
+            updated_at = NOW()
+        """,
+        calendar_id,
+        sync_token,
+        full_sync,
+    )
+
+
+async def reset_sync_token(calendar_id: str) -> None:
+    """
+    Сбрасывает `syncToken`, чтобы следующая синхронизация была полной.
+
+    Аргументы:
+        calendar_id: идентификатор календаря Google.
+    """
+    pool = get_db_pool()
+    await pool.execute(
+        "UPDATE calendar_sync_state SET sync_token = NULL, updated_at = NOW() WHERE calendar_id = $1",
+        calendar_id,
+    )
+
+
+async def record_sync_result(calendar_id: str, duration_sec: float, error: Optional[str]) -> None:
+    """
+    Записывает итог синхронизации календаря.
+
+    Аргументы:
+        calendar_id: идентификатор календаря Google.
+        duration_sec: длительность прогона в секундах.
+        error: текст ошибки или None при успехе.
+
+    Примечания:
+        Успешный прогон обнуляет `error_count` и `last_error`; неудачный —
+        увеличивает счётчик ошибок подряд, не трогая `last_sync`.
+    """
+    pool = get_db_pool()
+    await pool.execute(
+        """
+        INSERT INTO calendar_sync_state
+        (calendar_id, last_sync, last_duration_ms, error_count, last_error, last_error_at, updated_at)
+        VALUES (
+            $1,
+            CASE WHEN $3::text IS NULL THEN NOW() END,
+            $2,
+            CASE WHEN $3::text IS NULL THEN 0 ELSE 1 END,
+            $3,
+            CASE WHEN $3::text IS NULL THEN NULL ELSE NOW() END,
+            NOW()
+        )
+        ON CONFLICT (calendar_id) DO UPDATE SET
+            last_sync = COALESCE(EXCLUDED.last_sync, calendar_sync_state.last_sync),
+            last_duration_ms = EXCLUDED.last_duration_ms,
+            error_count = CASE
+                WHEN EXCLUDED.last_error IS NULL THEN 0
+                ELSE calendar_sync_state.error_count + 1
+            END,
+            last_error = EXCLUDED.last_error,
+            last_error_at = COALESCE(EXCLUDED.last_error_at, calendar_sync_state.last_error_at),
+            updated_at = NOW()
+        """,
+        calendar_id,
+        int(duration_sec * 1000),
+        error,
+    )
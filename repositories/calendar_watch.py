@@ -0,0 +1,120 @@
+"""Репозиторий для работы с таблицей calendar_watch_channels.
+
+Задачи модуля:
+- хранить каналы push‑уведомлений Google Calendar и их срок жизни;
+- находить канал по заголовкам входящего уведомления;
+- выбирать каналы, которые пора продлить или остановить;
+- передавать принятые уведомления ведущему экземпляру (`pg_notify`).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from database import get_db_pool
+
+
+async def save_channel(
+    channel_id: str,
+    calendar_id: str,
+    resource_id: str,
+    token: str,
+    expiration: datetime,
+) -> None:
+    """
+    Сохраняет только что созданный канал.
+
+    Аргументы:
+        channel_id: идентификатор канала (генерируется ботом).
+        calendar_id: календарь, на изменения которого подписан канал.
+        resource_id: `resourceId` из ответа `events.watch`.
+        token: секрет канала для проверки входящих уведомлений.
+        expiration: момент, после которого Google перестанет слать уведомления.
+    """
+    pool = get_db_pool()
+    await pool.execute(
+        """
+        INSERT INTO calendar_watch_channels
+        (channel_id, calendar_id, resource_id, token, expiration)
+        VALUES ($1, $2, $3, $4, $5)
+        """,
+        channel_id,
+        calendar_id,
+        resource_id,
+        token,
+        expiration,
+    )
+
+
+async def get_channel(channel_id: str) -> Optional[Dict]:
+    """
+    Возвращает активный канал по его ID или None.
+
+    Аргументы:
+        channel_id: значение заголовка `X-Goog-Channel-ID`.
+    """
+    pool = get_db_pool()
+    row = await pool.fetchrow(
+        """
+        SELECT channel_id, calendar_id, resource_id, token, expiration
+        FROM calendar_watch_channels
+        WHERE channel_id = $1 AND stopped_at IS NULL
+        """,
+        channel_id,
+    )
+    return dict(row) if row else None
+
+
+async def get_active_channels(calendar_id: str) -> List[Dict]:
+    """
+    Возвращает активные (не остановленные) каналы календаря, новые первыми.
+
+    Аргументы:
+        calendar_id: идентификатор календаря Google.
+    """
+    pool = get_db_pool()
+    rows = await pool.fetch(
+        """
+        SELECT channel_id, calendar_id, resource_id, token, expiration
+        FROM calendar_watch_channels
+        WHERE calendar_id = $1 AND stopped_at IS NULL
+        ORDER BY expiration DESC
+        """,
+        calendar_id,
+    )
+    return [dict(row) for row in rows]
+
+
+async def mark_channel_stopped(channel_id: str) -> None:
+    """Помечает канал остановленным."""
+    pool = get_db_pool()
+    await pool.execute(
+        "UPDATE calendar_watch_channels SET stopped_at = NOW() WHERE channel_id = $1",
+        channel_id,
+    )
+
+
+async def touch_channel(channel_id: str) -> None:
+    """Отмечает время последнего уведомления по каналу (для диагностики)."""
+    pool = get_db_pool()
+    await pool.execute(
+        "UPDATE calendar_watch_channels SET last_notification_at = NOW() WHERE channel_id = $1",
+        channel_id,
+    )
+
+
+async def notify_calendar_push(channel: str, calendar_id: str) -> None:
+    """
+    Передаёт уведомление о push‑уведомлении календаря ведущему экземпляру.
+
+    Аргументы:
+        channel: канал LISTEN/NOTIFY ведущего.
+        calendar_id: календарь, по которому пришло уведомление.
+
+    Примечания:
+        NOTIFY вне явной транзакции доставляется сразу; если ведущего нет,
+        уведомление теряется, и изменения подхватит очередной цикл `sync_loop`.
+    """
+    pool = get_db_pool()
+    await pool.execute("SELECT pg_notify($1, $2)", channel, calendar_id)
@@ -0,0 +1,471 @@
+"""Репозиторий мероприятий календаря и назначений инженеров.
+
+Задачи модуля:
+- отдавать мероприятия за произвольный полуинтервал [start, end) одним
+  запросом по индексу `calendar_events(start_time, status)`;
+- раскладывать мероприятия по дням в Python, чтобы расписание на неделю
+  строилось одним запросом, а не семью;
+- давать выборку мероприятий с назначенными инженерами для сводок;
+- держать в одном месте запросы к `event_assignments`, которые раньше
+  копировались между `handlers/assign.py`, `handlers/callback.py`,
+  `handlers/engineer_tasks.py` и `services/reminder.py`.
+
+Подготовленные запросы:
+    🔥 ВАЖНО: каждый SQL‑текст — константа модуля (`_*_SQL`). asyncpg
+    подготавливает запрос на соединении один раз и хранит его в кэше
+    соединения (`statement_cache_size`, по умолчанию 100) по тексту запроса,
+    поэтому повторные вызовы с любого обработчика не разбираются и не
+    планируются заново. Тексты не собираются «на лету» под конкретный
+    вызов — иначе кэш промахивается.
+
+Строки результата:
+    Функции возвращают `asyncpg.Record` без копирования в `dict`; типы из
+    `core.types` описывают набор полей. Record поддерживает `row["field"]`,
+    `row.get("field")`, `keys()` и `items()`, но неизменяем — если строку
+    нужно дополнить, сделайте `dict(row)` на месте.
+
+Примечания:
+    🔥 ВАЖНО: фильтр по времени — только полуинтервал, который строит
+    `time_range_sql` (`start_time >= $1 AND start_time < $2`). Выражения
+    вида `DATE(start_time) = ...` индекс не используют и приводят к полному
+    просмотру таблицы. Новые запросы по периоду добавляйте сюда же.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, cast
+
+import asyncpg
+
+from core.types import (
+    EngineerAssignmentRow,
+    EventAssignmentRow,
+    EventEngineerRow,
+    ScheduleEventRow,
+)
+from database import get_db_pool
+
+
+def time_range_sql(column: str, first_param: int) -> str:
+    """
+    Возвращает SQL‑условие полуинтервала для колонки времени.
+
+    Аргументы:
+        column: колонка, например `ce.start_time`.
+        first_param: номер плейсхолдера начала периода; конец — следующий.
+
+    Пример:
+        time_range_sql("ce.start_time", 2)  # 'ce.start_time >= $2 AND ce.start_time < $3'
+    """
+    return f"{column} >= ${first_param} AND {column} < ${first_param + 1}"
+
+
+def day_range(first_day: date, days: int = 1) -> Tuple[datetime, datetime]:
+    """
+    Возвращает полуинтервал [начало first_day; начало first_day + days).
+
+    Аргументы:
+        first_day: первый день периода.
+        days: число дней в периоде.
+    """
+    start = datetime.combine(first_day, time.min)
+    return start, start + timedelta(days=days)
+
+
+# --- Мероприятия ----------------------------------------------------------
+
+_EVENT_COLUMNS = """
+            ce.id,
+            ce.google_event_id,
+            ce.auditory_id,
+            ce.title,
+            ce.description,
+            ce.start_time,
+            ce.end_time,
+            ce.organizer,
+            ce.status,
+            a.name AS auditory_name,
+            a.building"""
+
+_EVENT_SQL = f"""
+        SELECT{_EVENT_COLUMNS}
+        FROM calendar_events ce
+        LEFT JOIN auditories a ON ce.auditory_id = a.id
+        WHERE ce.id = $1
+"""
+
+_EVENTS_BETWEEN_SQL = f"""
+        SELECT{_EVENT_COLUMNS}
+        FROM calendar_events ce
+        LEFT JOIN auditories a ON ce.auditory_id = a.id
+        WHERE {time_range_sql("ce.start_time", 1)}
+          AND ce.status = 'confirmed'
+        ORDER BY ce.start_time
+"""
+
+_EVENTS_WITH_ASSIGNMENTS_BETWEEN_SQL = f"""
+        SELECT
+            ce.id,
+            ce.title,
+            ce.start_time,
+            ce.end_time,
+            a.name AS auditory_name,
+            a.building,
+            u.full_name AS engineer_name,
+            u.telegram_id,
+            ea.status AS assignment_status,
+            ea.confirmed_at,
+            EXISTS (
+                SELECT 1
+                FROM event_assignments ea2
+                WHERE ea2.event_id = ce.id
+                  AND ea2.status = 'done'
+            ) AS is_completed
+        FROM calendar_events ce
+        LEFT JOIN auditories a ON ce.auditory_id = a.id
+        LEFT JOIN event_assignments ea ON ce.id = ea.event_id
+            AND ea.status IN ('accepted', 'assigned', 'replacing', 'done')
+        LEFT JOIN users u ON ea.assigned_to = u.telegram_id
+        WHERE {time_range_sql("ce.start_time", 1)}
+          AND ce.status = 'confirmed'
+        ORDER BY ce.start_time
+"""
+
+# 🔥 ВАЖНО (SQL): агрегирующие SUM(CASE WHEN ...) дают сводку по всем
+# статусам одним запросом; COALESCE — чтобы пустой период давал нули.
+_ASSIGNMENT_STATS_BETWEEN_SQL = f"""
+        SELECT
+            COUNT(*) AS total,
+            COALESCE(SUM(CASE WHEN ea.status = 'done' THEN 1 ELSE 0 END), 0) AS completed,
+            COALESCE(SUM(CASE WHEN ea.status = 'accepted' THEN 1 ELSE 0 END), 0) AS confirmed,
+            COALESCE(SUM(CASE WHEN ea.status = 'assigned' THEN 1 ELSE 0 END), 0) AS pending,
+            COALESCE(SUM(CASE WHEN ea.status = 'replacing' THEN 1 ELSE 0 END), 0) AS replacing,
+            COALESCE(SUM(CASE WHEN ea.status IS NULL THEN 1 ELSE 0 END), 0) AS no_assign
+        FROM calendar_events ce
+        LEFT JOIN event_assignments ea ON ce.id = ea.event_id
+            AND ea.status IN ('accepted', 'assigned', 'replacing', 'done')
+        WHERE {time_range_sql("ce.start_time", 1)}
+          AND ce.status = 'confirmed'
+"""
+
+_UNASSIGNED_EVENTS_BETWEEN_SQL = f"""
+        SELECT
+            ce.id,
+            ce.title,
+            ce.start_time,
+            ce.end_time,
+            a.name AS auditory_name,
+            a.building,
+            'без назначений' AS assignment_status
+        FROM calendar_events ce
+        LEFT JOIN auditories a ON ce.auditory_id = a.id
+        WHERE {time_range_sql("ce.start_time", 1)}
+          AND ce.status = 'confirmed'
+          AND NOT EXISTS (
+                SELECT 1
+                FROM event_assignments ea
+                WHERE ea.event_id = ce.id
+                  AND ea.status IN ('assigned', 'accepted')
+            )
+        ORDER BY ce.start_time
+"""
+
+
+async def get_event(event_id: int) -> Optional[ScheduleEventRow]:
+    """
+    Возвращает мероприятие по ID (в любом статусе) вместе с аудиторией.
+
+    Аргументы:
+        event_id: первичный ключ `calendar_events`.
+
+    Возвращает:
+        `ScheduleEventRow` или None, если мероприятие не найдено.
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: статус и время начала не проверяются — проверки
+        «ещё не началось» / «подтверждено» делает вызывающий код.
+    """
+    pool = get_db_pool()
+    return cast(Optional[ScheduleEventRow], await pool.fetchrow(_EVENT_SQL, event_id))
+
+
+async def get_events_between(start: datetime, end: datetime) -> List[ScheduleEventRow]:
+    """
+    Возвращает подтверждённые мероприятия, начинающиеся в [start, end).
+
+    Аргументы:
+        start: начало периода (включительно).
+        end: конец периода (не включительно).
+
+    Возвращает:
+        Список `ScheduleEventRow`, отсортированный по времени начала.
+        `auditory_name` — техническое имя аудитории (или None).
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: LEFT JOIN с `auditories` сохраняет мероприятия без
+        привязанной аудитории.
+    """
+    pool = get_db_pool()
+    return cast(List[ScheduleEventRow], await pool.fetch(_EVENTS_BETWEEN_SQL, start, end))
+
+
+def group_by_day(events: Iterable[Mapping[str, Any]]) -> Dict[date, List[Any]]:
+    """
+    Раскладывает мероприятия по дням начала (порядок внутри дня сохраняется).
+
+    Возвращает:
+        Словарь `date -> список мероприятий`; дни без мероприятий отсутствуют.
+    """
+    by_day: Dict[date, List[Any]] = {}
+    for event in events:
+        by_day.setdefault(event['start_time'].date(), []).append(event)
+    return by_day
+
+
+async def get_events_by_day(first_day: date, days: int) -> Dict[date, List[ScheduleEventRow]]:
+    """Мероприятия за `days` дней начиная с `first_day`, сгруппированные по дням (один запрос)."""
+    return group_by_day(await get_events_between(*day_range(first_day, days)))
+
+
+async def get_events_with_assignments_between(start: datetime, end: datetime) -> List[asyncpg.Record]:
+    """
+    Возвращает подтверждённые мероприятия периода вместе с назначениями.
+
+    Аргументы:
+        start: начало периода (включительно).
+        end: конец периода (не включительно).
+
+    Возвращает:
+        По строке на пару «мероприятие — активное назначение» (мероприятие
+        без назначений — одна строка с `assignment_status IS NULL`). Поля:
+        id, title, start_time, end_time, auditory_name, building,
+        engineer_name, telegram_id, assignment_status, confirmed_at,
+        is_completed (кто‑то из инженеров уже отметил выполнение).
+    """
+    pool = get_db_pool()
+    return await pool.fetch(_EVENTS_WITH_ASSIGNMENTS_BETWEEN_SQL, start, end)
+
+
+async def get_assignment_stats_between(start: datetime, end: datetime) -> Mapping[str, int]:
+    """
+    Считает назначения на подтверждённые мероприятия периода по статусам.
+
+    Возвращает:
+        Строку с полями total, completed, confirmed, pending, replacing,
+        no_assign (мероприятия без активных назначений); значения не None.
+    """
+    pool = get_db_pool()
+    return await pool.fetchrow(_ASSIGNMENT_STATS_BETWEEN_SQL, start, end)
+
+
+async def get_unassigned_events_between(start: datetime, end: datetime) -> List[asyncpg.Record]:
+    """
+    Возвращает подтверждённые мероприятия периода без активных назначений.
+
+    Возвращает:
+        Мероприятия с полями id, title, start_time, end_time, auditory_name,
+        building и assignment_status = 'без назначений'.
+    """
+    pool = get_db_pool()
+    return await pool.fetch(_UNASSIGNED_EVENTS_BETWEEN_SQL, start, end)
+
+
+# --- Назначения -----------------------------------------------------------
+
+_ENGINEER_ASSIGNMENT_COLUMNS = """
+            ce.id,
+            ce.title,
+            ce.description,
+            ce.start_time,
+            ce.end_time,
+            a.name AS auditory_name,
+            a.building,
+            ea.status,
+            ea.confirmed_at,
+            u.full_name AS engineer_name
+        FROM calendar_events ce
+        JOIN event_assignments ea ON ce.id = ea.event_id
+        LEFT JOIN auditories a ON ce.auditory_id = a.id
+        LEFT JOIN users u ON ea.assigned_to = u.telegram_id"""
+
+_ENGINEER_ASSIGNMENT_SQL = f"""
+        SELECT{_ENGINEER_ASSIGNMENT_COLUMNS}
+        WHERE ce.id = $1 AND ea.assigned_to = $2
+"""
+
+_ENGINEER_EVENTS_BETWEEN_SQL = f"""
+        SELECT{_ENGINEER_ASSIGNMENT_COLUMNS}
+        WHERE ea.assigned_to = $1
+          AND {time_range_sql("ce.start_time", 2)}
+          AND ce.status = 'confirmed'
+          AND ea.status IN ('accepted', 'assigned')
+        ORDER BY ce.start_time
+"""
+
+_EVENT_WITH_ENGINEER_SQL = """
+        SELECT
+            ce.title,
+            ce.start_time,
+            ce.end_time,
+            u.full_name AS engineer_name
+        FROM calendar_events ce
+        LEFT JOIN users u ON u.telegram_id = $2
+        WHERE ce.id = $1
+"""
+
+_EVENT_ENGINEERS_SQL = """
+        SELECT
+            u.telegram_id,
+            u.full_name,
+            u.role,
+            ea.id AS assignment_id,
+            ea.status AS assignment_status,
+            ea.role AS assigned_role
+        FROM users u
+        LEFT JOIN event_assignments ea ON u.telegram_id = ea.assigned_to AND ea.event_id = $1
+        WHERE u.role IN ('superadmin', 'engineer', 'manager')
+        ORDER BY
+            CASE WHEN ea.id IS NOT NULL THEN 0 ELSE 1 END,
+            u.full_name
+"""
+
+_ASSIGNMENT_SQL = """
+        SELECT id, event_id, assigned_to, assigned_by, assigned_at, role,
+               status, confirmed_at, completed_at
+        FROM event_assignments
+        WHERE event_id = $1 AND assigned_to = $2
+"""
+
+_CREATE_ASSIGNMENT_SQL = """
+        INSERT INTO event_assignments
+        (event_id, assigned_to, assigned_by, role, status, assigned_at)
+        VALUES ($1, $2, $3, 'primary', 'assigned', NOW())
+"""
+
+# Один текст на все переходы статуса: время подтверждения и выполнения
+# проставляется только при переходе в соответствующий статус.
+_SET_ASSIGNMENT_STATUS_SQL = """
+        UPDATE event_assignments
+        SET status = $3::text,
+            confirmed_at = CASE WHEN $3::text = 'accepted' THEN NOW() ELSE confirmed_at END,
+            completed_at = CASE WHEN $3::text = 'done' THEN NOW() ELSE completed_at END
+        WHERE event_id = $1 AND assigned_to = $2
+"""
+
+
+async def get_engineer_assignment(event_id: int, telegram_id: int) -> Optional[EngineerAssignmentRow]:
+    """
+    Возвращает мероприятие вместе с назначением конкретного инженера.
+
+    Аргументы:
+        event_id: ID мероприятия.
+        telegram_id: ID инженера.
+
+    Возвращает:
+        `EngineerAssignmentRow` или None, если инженер не назначен на мероприятие
+        (в любом статусе).
+
+    Примечания:
+        🔥 ВАЖНО: инженер указан в WHERE, поэтому по чужому `event_id`
+        карточку назначения получить нельзя.
+    """
+    pool = get_db_pool()
+    row = await pool.fetchrow(_ENGINEER_ASSIGNMENT_SQL, event_id, telegram_id)
+    return cast(Optional[EngineerAssignmentRow], row)
+
+
+async def get_engineer_events_between(
+    telegram_id: int,
+    start: datetime,
+    end: datetime,
+) -> List[EngineerAssignmentRow]:
+    """
+    Возвращает активные назначения инженера на подтверждённые мероприятия периода.
+
+    Аргументы:
+        telegram_id: ID инженера.
+        start: начало периода (включительно).
+        end: конец периода (не включительно).
+
+    Возвращает:
+        Список `EngineerAssignmentRow`. Учитываются только назначения
+        в статусах `accepted` и `assigned`.
+    """
+    pool = get_db_pool()
+    rows = await pool.fetch(_ENGINEER_EVENTS_BETWEEN_SQL, telegram_id, start, end)
+    return cast(List[EngineerAssignmentRow], rows)
+
+
+async def get_event_with_engineer(event_id: int, telegram_id: int) -> Optional[asyncpg.Record]:
+    """
+    Возвращает данные мероприятия и имя инженера для уведомлений менеджеру.
+
+    Возвращает:
+        Строку с полями title, start_time, end_time, engineer_name или None,
+        если мероприятие не найдено. Назначение инженера не проверяется —
+        `engineer_name` может быть None, если пользователя нет в `users`.
+    """
+    pool = get_db_pool()
+    return await pool.fetchrow(_EVENT_WITH_ENGINEER_SQL, event_id, telegram_id)
+
+
+async def get_event_engineers(event_id: int) -> List[EventEngineerRow]:
+    """
+    Возвращает сотрудников, которых можно назначить на мероприятие.
+
+    Возвращает:
+        Список `EventEngineerRow`: сначала уже назначенные (в любом статусе),
+        затем остальные — по имени.
+    """
+    pool = get_db_pool()
+    return cast(List[EventEngineerRow], await pool.fetch(_EVENT_ENGINEERS_SQL, event_id))
+
+
+async def get_assignment(event_id: int, telegram_id: int) -> Optional[EventAssignmentRow]:
+    """
+    Возвращает назначение инженера на мероприятие.
+
+    Возвращает:
+        `EventAssignmentRow` в любом статусе или None, если назначения нет.
+    """
+    pool = get_db_pool()
+    return cast(Optional[EventAssignmentRow], await pool.fetchrow(_ASSIGNMENT_SQL, event_id, telegram_id))
+
+
+async def create_assignment(event_id: int, telegram_id: int, assigned_by: int) -> None:
+    """
+    Создаёт назначение инженера (роль `primary`, статус `assigned`).
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: наличие назначения проверяет вызывающий код
+        (`get_assignment`). Таймер напоминания ставится по уведомлению
+        `reminder_invalidate` (см. `services.reminder_scheduler`).
+    """
+    pool = get_db_pool()
+    await pool.execute(_CREATE_ASSIGNMENT_SQL, event_id, telegram_id, assigned_by)
+
+
+async def set_assignment_status(
+    event_id: int,
+    telegram_id: int,
+    status: str,
+    conn: Optional[asyncpg.Connection] = None,
+) -> bool:
+    """
+    Меняет статус назначения инженера на мероприятие.
+
+    Аргументы:
+        event_id: ID мероприятия.
+        telegram_id: ID инженера.
+        status: новый статус; для `accepted` проставляется `confirmed_at`,
+            для `done` — `completed_at`.
+        conn: соединение с открытой транзакцией, если смена статуса должна
+            попасть в неё (по умолчанию — отдельный запрос через пул).
+
+    Возвращает:
+        True, если назначение найдено и обновлено.
+    """
+    executor = conn if conn is not None else get_db_pool()
+    result = await executor.execute(_SET_ASSIGNMENT_STATUS_SQL, event_id, telegram_id, status)
+    return result != "UPDATE 0"
@@ -0,0 +1,105 @@
+"""Репозиторий для работы с таблицей scheduled_job_runs.
+
+Задачи модуля:
+- атомарно «занимать» слот расписания задачи, чтобы один слот выполнял
+  только один экземпляр бота;
+- записывать результат выполнения слота.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from database import get_db_pool
+
+# Слот занимается, только если он новее последнего занятого: при
+# конфликте строка блокируется, и условие WHERE второго экземпляра
+# проверяется уже по обновлённому last_slot.
+_CLAIM_SLOT_SQL = """
+    INSERT INTO scheduled_job_runs
+    (job_name, last_slot, last_started_at, last_finished_at, last_duration_ms, last_error, updated_at)
+    VALUES ($1, $2, $3, NULL, NULL, NULL, NOW())
+    ON CONFLICT (job_name) DO UPDATE SET
+        last_slot = EXCLUDED.last_slot,
+        last_started_at = EXCLUDED.last_started_at,
+        last_finished_at = NULL,
+        last_duration_ms = NULL,
+        last_error = NULL,
+        updated_at = NOW()
+    WHERE scheduled_job_runs.last_slot < EXCLUDED.last_slot
+    RETURNING job_name
+"""
+
+# Догоняющий запуск: только для задачи, которая уже запускалась раньше.
+_CLAIM_MISSED_SLOT_SQL = """
+    UPDATE scheduled_job_runs SET
+        last_slot = $2,
+        last_started_at = $3,
+        last_finished_at = NULL,
+        last_duration_ms = NULL,
+        last_error = NULL,
+        updated_at = NOW()
+    WHERE job_name = $1 AND last_slot < $2
+    RETURNING job_name
+"""
+
+_RECORD_RUN_SQL = """
+    UPDATE scheduled_job_runs SET
+        last_finished_at = NOW(),
+        last_duration_ms = $3,
+        last_error = $4,
+        run_count = run_count + 1,
+        updated_at = NOW()
+    WHERE job_name = $1 AND last_slot = $2
+"""
+
+
+async def claim_job_slot(job_name: str, slot: datetime, started_at: datetime, catch_up: bool = False) -> bool:
+    """
+    Занимает слот расписания задачи, если его ещё никто не занял.
+
+    Аргументы:
+        job_name: имя задачи.
+        slot: плановое время запуска (с часовым поясом).
+        started_at: фактическое время начала.
+        catch_up: True — догоняющий запуск: слот занимается, только если
+            у задачи уже есть отметка (при первом развёртывании старые
+            слоты не догоняются).
+
+    Возвращает:
+        True, если слот занят этим вызовом и задачу нужно выполнить.
+
+    Примечания:
+        🔥 ВАЖНО: один короткий запрос вне транзакции задачи — второй
+        экземпляр бота увидит занятый слот и не выполнит его повторно.
+        ⚠️ ВНИМАНИЕ: слот занимается до выполнения — если процесс упадёт
+        посреди задачи, слот не повторится (`last_finished_at` останется NULL).
+        Повторная рассылка сводки хуже, чем пропущенная.
+    """
+    pool = get_db_pool()
+    sql = _CLAIM_MISSED_SLOT_SQL if catch_up else _CLAIM_SLOT_SQL
+    return await pool.fetchval(sql, job_name, slot, started_at) is not None
+
+
+async def record_job_run(
+    job_name: str,
+    slot: datetime,
+    duration_sec: float,
+    error: Optional[str],
+) -> None:
+    """
+    Записывает результат выполнения занятого слота.
+
+    Аргументы:
+        job_name: имя задачи.
+        slot: плановое время запуска (тот же, что в `claim_job_slot`).
+        duration_sec: длительность в секундах.
+        error: текст ошибки или None.
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: слот отмечается выполненным и при ошибке — ошибка
+        видна в `last_error`.
+    """
+    pool = get_db_pool()
+    await pool.execute(_RECORD_RUN_SQL, job_name, slot, int(duration_sec * 1000), error)
@@ -0,0 +1,335 @@
+"""Репозиторий для работы с таблицей notification_outbox.
+
+Задачи модуля:
+- ставить уведомления в очередь внутри транзакции, меняющей состояние;
+- ставить напоминания с проверкой актуальности в том же запросе;
+- захватывать пачку готовых к отправке строк без конфликтов между
+  несколькими экземплярами бота (`FOR UPDATE SKIP LOCKED`);
+- одним запросом записывать итоги доставки пачки.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import asyncpg
+
+from core.constants import ASSIGNMENT_STATUS_DONE, OUTBOX_STATUS_PENDING, OUTBOX_STATUS_SENT
+from database import get_db_pool
+
+
+def _dump_markup(reply_markup) -> Optional[str]:
+    """Сериализует `InlineKeyboardMarkup` для колонки JSONB."""
+    return json.dumps(reply_markup.to_dict(), ensure_ascii=False) if reply_markup else None
+
+
+async def enqueue_notification(
+    conn: asyncpg.Connection,
+    chat_id: int,
+    text: str,
+    parse_mode: Optional[str] = None,
+    reply_markup=None,
+    event_id: Optional[int] = None,
+    notification_type: Optional[str] = None,
+) -> int:
+    """
+    Ставит одно уведомление в очередь.
+
+    Аргументы:
+        conn: соединение с открытой транзакцией, в которой меняется состояние.
+        chat_id: получатель (telegram_id пользователя или ID чата).
+        text: текст сообщения.
+        parse_mode: режим разметки Telegram.
+        reply_markup: `InlineKeyboardMarkup` или None.
+        event_id, notification_type: если заданы, в `notifications` сразу
+            пишется запись — по ней работает защита от повторных напоминаний.
+
+    Возвращает:
+        ID строки в `notification_outbox`.
+
+    Примечания:
+        🔥 ВАЖНО: вызывать внутри `conn.transaction()` вместе с изменением
+        состояния — тогда уведомление появится в очереди тогда и только
+        тогда, когда изменение зафиксировано.
+    """
+    notification_id = None
+    if event_id is not None and notification_type is not None:
+        notification_id = await conn.fetchval(
+            """
+            INSERT INTO notifications (user_id, event_id, type, sent_at)
+            VALUES ($1, $2, $3, NOW())
+            RETURNING id
+            """,
+            chat_id,
+            event_id,
+            notification_type,
+        )
+    return await conn.fetchval(
+        """
+        INSERT INTO notification_outbox (chat_id, text, parse_mode, reply_markup, notification_id)
+        VALUES ($1, $2, $3, $4::jsonb, $5)
+        RETURNING id
+        """,
+        chat_id,
+        text,
+        parse_mode,
+        _dump_markup(reply_markup),
+        notification_id,
+    )
+
+
+# Те же условия, что в services.reminder.find_scheduled_reminders, но
+# проверяются в момент постановки: назначение в нужном статусе, мероприятие
+# подтверждено, не перенесено и никем не завершено, напоминание этого типа
+# не ставилось за последние 2 часа.
+_ENQUEUE_REMINDER_SQL = """
+    WITH due AS (
+        SELECT ea.event_id, ea.assigned_to
+        FROM event_assignments ea
+        JOIN calendar_events ce ON ce.id = ea.event_id
+        WHERE ea.event_id = $1
+          AND ea.assigned_to = $2
+          AND ea.status = $4
+          AND ce.status = 'confirmed'
+          AND ce.start_time = $5
+          AND ce.end_time = $6
+          AND NOT EXISTS (
+                SELECT 1
+                FROM event_assignments done
+                WHERE done.event_id = ea.event_id
+                  AND done.status = $7
+            )
+          AND NOT EXISTS (
+                SELECT 1
+                FROM notifications n
+                WHERE n.event_id = ea.event_id
+                  AND n.user_id = ea.assigned_to
+                  AND n.type = $3
+                  AND n.sent_at > NOW() - INTERVAL '2 hours'
+            )
+    ),
+    logged AS (
+        INSERT INTO notifications (user_id, event_id, type, sent_at)
+        SELECT assigned_to, event_id, $3, NOW()
+        FROM due
+        RETURNING id, user_id
+    )
+    INSERT INTO notification_outbox (chat_id, text, parse_mode, reply_markup, notification_id)
+    SELECT user_id, $8, $9, $10::jsonb, id
+    FROM logged
+    RETURNING id
+"""
+
+_LOCK_ASSIGNMENT_SQL = """
+    SELECT 1
+    FROM event_assignments
+    WHERE event_id = $1 AND assigned_to = $2
+    FOR UPDATE
+"""
+
+
+async def enqueue_reminder(
+    conn: asyncpg.Connection,
+    event_id: int,
+    chat_id: int,
+    notification_type: str,
+    assignment_status: str,
+    start_time: datetime,
+    end_time: datetime,
+    text: str,
+    parse_mode: Optional[str] = None,
+    reply_markup=None,
+) -> Optional[int]:
+    """
+    Ставит напоминание в очередь, только если оно всё ещё актуально.
+
+    Аргументы:
+        conn: соединение с открытой транзакцией.
+        event_id: ID мероприятия.
+        chat_id: telegram_id инженера.
+        notification_type: тип напоминания (`NOTIFICATION_*`).
+        assignment_status: статус назначения, при котором напоминание нужно.
+        start_time, end_time: время мероприятия на момент планирования —
+            если мероприятие перенесли, напоминание не ставится.
+        text, parse_mode, reply_markup: параметры сообщения.
+
+    Возвращает:
+        ID строки в `notification_outbox` или None, если напоминание
+        уже неактуально.
+
+    Примечания:
+        🔥 ВАЖНО: строка назначения блокируется до конца транзакции, а
+        проверки и запись в `notifications` / `notification_outbox` идут
+        одним запросом после блокировки. Второй вызов для той же пары
+        (например, таймер, заново загруженный до фиксации первого) дождётся
+        фиксации и увидит запись в `notifications` — дубля не будет.
+    """
+    await conn.execute(_LOCK_ASSIGNMENT_SQL, event_id, chat_id)
+    return await conn.fetchval(
+        _ENQUEUE_REMINDER_SQL,
+        event_id,
+        chat_id,
+        notification_type,
+        assignment_status,
+        start_time,
+        end_time,
+        ASSIGNMENT_STATUS_DONE,
+        text,
+        parse_mode,
+        _dump_markup(reply_markup),
+    )
+
+
+async def enqueue_broadcast(
+    conn: asyncpg.Connection,
+    chat_ids: Sequence[int],
+    text: str,
+    parse_mode: Optional[str] = None,
+    reply_markup=None,
+) -> int:
+    """
+    Ставит в очередь одинаковое уведомление для нескольких получателей.
+
+    Аргументы:
+        conn: соединение с открытой транзакцией.
+        chat_ids: получатели.
+        text, parse_mode, reply_markup: параметры сообщения.
+
+    Возвращает:
+        Количество поставленных в очередь уведомлений.
+    """
+    if not chat_ids:
+        return 0
+    await conn.execute(
+        """
+        INSERT INTO notification_outbox (chat_id, text, parse_mode, reply_markup)
+        SELECT chat_id, $2, $3, $4::jsonb
+        FROM unnest($1::bigint[]) AS chat_id
+        """,
+        list(chat_ids),
+        text,
+        parse_mode,
+        _dump_markup(reply_markup),
+    )
+    return len(chat_ids)
+
+
+async def claim_batch(limit: int, lease_seconds: int) -> List[Dict]:
+    """
+    Захватывает пачку уведомлений, готовых к отправке.
+
+    Аргументы:
+        limit: максимальный размер пачки.
+        lease_seconds: срок аренды — столько строка не будет выдана другим
+            обработчикам, даже если этот экземпляр бота упадёт.
+
+    Возвращает:
+        Строки очереди (счётчик `attempts` уже увеличен).
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: доставка «как минимум один раз». Если процесс упадёт
+        между отправкой и `complete_batch`, после окончания аренды
+        сообщение будет отправлено повторно.
+    """
+    pool = get_db_pool()
+    rows = await pool.fetch(
+        """
+        WITH due AS (
+            SELECT id
+            FROM notification_outbox
+            WHERE status = $3 AND next_attempt_at <= NOW()
+            ORDER BY next_attempt_at, id
+            LIMIT $1
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE notification_outbox o
+        SET attempts = o.attempts + 1,
+            next_attempt_at = NOW() + make_interval(secs => $2)
+        FROM due
+        WHERE o.id = due.id
+        RETURNING o.id, o.chat_id, o.text, o.parse_mode, o.reply_markup::text AS reply_markup, o.attempts
+        """,
+        limit,
+        lease_seconds,
+        OUTBOX_STATUS_PENDING,
+    )
+    return [dict(row) for row in rows]
+
+
+async def complete_batch(
+    ids: Sequence[int],
+    statuses: Sequence[str],
+    errors: Sequence[Optional[str]],
+    message_ids: Sequence[Optional[int]],
+    retry_delays: Sequence[float],
+) -> None:
+    """
+    Записывает итоги доставки пачки одним запросом.
+
+    Аргументы:
+        ids: ID строк очереди.
+        statuses: новый статус каждой строки (`OUTBOX_STATUS_*`).
+        errors: текст ошибки или None.
+        message_ids: `message_id` доставленного сообщения или None.
+        retry_delays: пауза до следующей попытки в секундах (для `pending`).
+
+    Примечания:
+        Для доставленных уведомлений в `notifications` проставляются
+        фактическое время отправки и `telegram_message_id`.
+    """
+    pool = get_db_pool()
+    await pool.execute(
+        """
+        WITH result AS (
+            SELECT *
+            FROM unnest($1::bigint[], $2::text[], $3::text[], $4::bigint[], $5::float8[])
+                AS r(id, status, error, message_id, retry_delay)
+        ),
+        updated AS (
+            UPDATE notification_outbox o
+            SET status = result.status,
+                last_error = result.error,
+                telegram_message_id = result.message_id,
+                sent_at = CASE WHEN result.status = $6 THEN NOW() END,
+                next_attempt_at = CASE
+                    WHEN result.status = $7 THEN NOW() + make_interval(secs => result.retry_delay)
+                    ELSE o.next_attempt_at
+                END
+            FROM result
+            WHERE o.id = result.id
+            RETURNING o.notification_id, o.telegram_message_id, o.status
+        )
+        UPDATE notifications n
+        SET sent_at = NOW(), telegram_message_id = updated.telegram_message_id
+        FROM updated
+        WHERE n.id = updated.notification_id AND updated.status = $6
+        """,
+        list(ids),
+        list(statuses),
+        list(errors),
+        list(message_ids),
+        list(retry_delays),
+        OUTBOX_STATUS_SENT,
+        OUTBOX_STATUS_PENDING,
+    )
+
+
+async def purge_sent(older_than_days: int) -> int:
+    """
+    Удаляет доставленные уведомления старше указанного срока.
+
+    Возвращает:
+        Количество удалённых строк.
+    """
+    pool = get_db_pool()
+    result = await pool.execute(
+        """
+        DELETE FROM notification_outbox
+        WHERE status = $1 AND sent_at < NOW() - make_interval(days => $2)
+        """,
+        OUTBOX_STATUS_SENT,
+        older_than_days,
+    )
+    return int(result.split()[-1])
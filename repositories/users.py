@@ -0,0 +1,292 @@
+"""Репозиторий пользователей с кэшем в памяти процесса.
+
+Задачи модуля:
+- отдавать пользователя по `telegram_id` без запроса к БД на каждое
+  нажатие кнопки (проверка роли, построение меню);
+- обновлять кэш при изменениях, сделанных этим процессом (write‑through);
+- сбрасывать записи кэша при изменениях с других экземпляров бота,
+  из дашборда или ручным SQL — по `LISTEN users_changed`;
+- накапливать отметки `last_active` в памяти и записывать их одним
+  запросом раз в несколько секунд (`LastActiveBuffer`).
+
+Кэширование:
+    🔥 ВАЖНО: LRU‑кэш на `USER_CACHE_MAX_SIZE` записей с TTL
+    `USER_CACHE_TTL_SECONDS`. Триггер `trg_users_changed` (миграция
+    v0.15.0) шлёт `pg_notify('users_changed', telegram_id)` при любом
+    изменении строки, кроме обновления одного `last_active`, — поэтому
+    TTL лишь страхует от потерянных уведомлений.
+
+    ⚠️ ВНИМАНИЕ: поле `last_active` в закэшированной записи может отставать;
+    для отчётов по активности читайте таблицу напрямую.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import asyncpg
+
+from config import config
+from database import get_db_pool
+from utils.metrics import TimingStats
+
+logger = logging.getLogger(__name__)
+
+USERS_CHANNEL = "users_changed"
+
+# Период проверки соединения слушателя уведомлений, сек.
+_LISTENER_CHECK_SECONDS = 30
+
+# telegram_id -> (момент истечения по time.monotonic(), строка users)
+_cache: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+# Поколения записей: `invalidate_user` увеличивает счётчик пользователя,
+# `clear_user_cache` — общую эпоху (и забывает счётчики). `get_user` не
+# кладёт строку в кэш, если поколение сменилось, пока шёл запрос к БД.
+_generations: Dict[int, int] = {}
+_epoch = 0
+
+
+def _store(user: Dict[str, Any]) -> None:
+    telegram_id = user['telegram_id']
+    _cache[telegram_id] = (time.monotonic() + config.USER_CACHE_TTL_SECONDS, user)
+    _cache.move_to_end(telegram_id)
+    while len(_cache) > config.USER_CACHE_MAX_SIZE:
+        _cache.popitem(last=False)
+
+
+def _generation(telegram_id: int) -> Tuple[int, int]:
+    return _epoch, _generations.get(telegram_id, 0)
+
+
+def invalidate_user(telegram_id: int) -> None:
+    """Удаляет пользователя из кэша (следующее чтение пойдёт в БД)."""
+    _generations[telegram_id] = _generations.get(telegram_id, 0) + 1
+    _cache.pop(telegram_id, None)
+
+
+def clear_user_cache() -> None:
+    """Полностью очищает кэш пользователей."""
+    global _epoch
+    _epoch += 1
+    _generations.clear()
+    _cache.clear()
+
+
+async def get_user(telegram_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Возвращает пользователя по telegram_id, используя кэш.
+
+    Аргументы:
+        telegram_id: ID пользователя в Telegram.
+
+    Возвращает:
+        Копию строки `users` или None, если пользователь не найден.
+        Отсутствие пользователя не кэшируется — после /start он появится сразу.
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: если во время запроса к БД пришло уведомление об
+        изменении пользователя, прочитанная строка могла устареть — она
+        возвращается вызывающему коду, но в кэш не попадает.
+    """
+    entry = _cache.get(telegram_id)
+    if entry is not None:
+        expires_at, user = entry
+        if expires_at > time.monotonic():
+            _cache.move_to_end(telegram_id)
+            return dict(user)
+        del _cache[telegram_id]
+
+    generation = _generation(telegram_id)
+    pool = get_db_pool()
+    try:
+        row = await pool.fetchrow("SELECT * FROM users WHERE telegram_id = $1", telegram_id)
+    except Exception as e:
+        logger.error("Ошибка при получении пользователя %s: %s", telegram_id, e, exc_info=True)
+        return None
+    if row is None:
+        return None
+    user = dict(row)
+    if _generation(telegram_id) == generation:
+        _store(user)
+    return dict(user)
+
+
+async def update_user_role(telegram_id: int, role: str) -> Optional[Dict[str, Any]]:
+    """
+    Меняет роль пользователя и сразу обновляет кэш.
+
+    Аргументы:
+        telegram_id: ID пользователя в Telegram.
+        role: новая роль.
+
+    Возвращает:
+        Обновлённую строку `users` или None, если пользователь не найден.
+    """
+    pool = get_db_pool()
+    row = await pool.fetchrow(
+        "UPDATE users SET role = $1 WHERE telegram_id = $2 RETURNING *",
+        role,
+        telegram_id,
+    )
+    # Новое поколение: чтение, начатое до UPDATE, не перезапишет кэш.
+    invalidate_user(telegram_id)
+    if row is None:
+        return None
+    user = dict(row)
+    _store(user)
+    return dict(user)
+
+
+def _on_users_changed(connection, pid, channel, payload) -> None:
+    try:
+        invalidate_user(int(payload))
+    except ValueError:
+        logger.warning(f"Некорректное уведомление {channel}: {payload!r}, кэш пользователей сброшен")
+        clear_user_cache()
+
+
+async def user_cache_listener_loop() -> None:
+    """
+    Слушает канал `users_changed` и сбрасывает изменённых пользователей.
+
+    Примечания:
+        🔥 ВАЖНО: работает на каждом экземпляре бота, на отдельном
+        соединении вне пула. После переподключения кэш очищается целиком —
+        уведомления, пришедшие во время разрыва, потеряны.
+    """
+    while True:
+        conn: Optional[asyncpg.Connection] = None
+        try:
+            conn = await asyncpg.connect(dsn=config.DATABASE_URL)
+            await conn.add_listener(USERS_CHANNEL, _on_users_changed)
+            clear_user_cache()
+            logger.info("Подписка на изменения пользователей (LISTEN users_changed) активна")
+            while True:
+                await asyncio.sleep(_LISTENER_CHECK_SECONDS)
+                await conn.fetchval("SELECT 1", timeout=_LISTENER_CHECK_SECONDS)
+        except Exception as e:
+            logger.error(f"Ошибка подписки на изменения пользователей: {e}", exc_info=True)
+        finally:
+            if conn is not None:
+                conn.terminate()
+        await asyncio.sleep(_LISTENER_CHECK_SECONDS)
+
+
+class LastActiveBuffer:
+    """
+    Отложенная запись `users.last_active` (write‑behind).
+
+    Каждое действие пользователя только обновляет время в словаре; повторные
+    действия одного пользователя до записи схлопываются. `flush` пишет всё
+    накопленное одним `UPDATE ... FROM unnest(...)`.
+
+    Атрибуты:
+        touches: сколько отметок активности получено.
+        coalesced: сколько отметок схлопнуто (не породили отдельной записи).
+        written: сколько строк `users` обновлено.
+        flush_stats: длительность записей в БД.
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: при аварийном завершении процесса теряются отметки
+        за последние `LAST_ACTIVE_FLUSH_SECONDS` — для поля «последняя
+        активность» это допустимо.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Dict[int, datetime] = {}
+        self.touches = 0
+        self.coalesced = 0
+        self.written = 0
+        self.flush_stats = TimingStats()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, telegram_id: int, at: Optional[datetime] = None) -> None:
+        """Отмечает активность пользователя (без обращения к БД)."""
+        self.touches += 1
+        if telegram_id in self._pending:
+            self.coalesced += 1
+        self._pending[telegram_id] = at or datetime.now()
+
+    async def flush(self) -> int:
+        """
+        Записывает накопленные отметки в БД.
+
+        Возвращает:
+            Количество обновлённых строк.
+
+        Примечания:
+            🔥 ВАЖНО: при ошибке или отмене задачи отметки возвращаются в
+            буфер (более свежие, пришедшие за время записи, не
+            перезаписываются) и будут записаны при следующем вызове.
+        """
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        # Сортировка по ключу — одинаковый порядок блокировок строк при
+        # одновременной записи с нескольких экземпляров бота.
+        telegram_ids = sorted(batch)
+        started = time.monotonic()
+        try:
+            pool = get_db_pool()
+            result = await pool.execute(
+                """
+                UPDATE users AS u
+                SET last_active = v.last_active
+                FROM unnest($1::bigint[], $2::timestamp[]) AS v(telegram_id, last_active)
+                WHERE u.telegram_id = v.telegram_id
+                  AND (u.last_active IS NULL OR u.last_active < v.last_active)
+                """,
+                telegram_ids,
+                [batch[telegram_id] for telegram_id in telegram_ids],
+            )
+        except asyncio.CancelledError:
+            # Остановка бота посреди записи: финальный flush() допишет отметки.
+            self._restore(batch)
+            raise
+        except Exception as e:
+            self.flush_stats.add(time.monotonic() - started, error=True)
+            self._restore(batch)
+            logger.error(f"Ошибка записи last_active ({len(batch)} пользователей): {e}", exc_info=True)
+            return 0
+        self.flush_stats.add(time.monotonic() - started)
+        updated = int(result.split()[-1])
+        self.written += updated
+        logger.debug(f"Записано last_active: {updated} из {len(batch)}")
+        return updated
+
+    def _restore(self, batch: Dict[int, datetime]) -> None:
+        for telegram_id, at in batch.items():
+            self._pending.setdefault(telegram_id, at)
+
+    def summary(self) -> str:
+        """Краткая строка для логов и админ‑панели."""
+        return (
+            f"отметок {self.touches}, схлопнуто {self.coalesced}, "
+            f"записано строк {self.written}, в буфере {len(self)}; "
+            f"запись: {self.flush_stats.summary()}"
+        )
+
+
+last_active_buffer = LastActiveBuffer()
+
+
+async def last_active_flush_loop() -> None:
+    """
+    Периодически записывает буфер `last_active` в БД.
+
+    Примечания:
+        🔥 ВАЖНО: работает на каждом экземпляре бота. При остановке бота
+        буфер дописывается явным вызовом `last_active_buffer.flush()`
+        (см. `main.py`).
+    """
+    while True:
+        await asyncio.sleep(config.LAST_ACTIVE_FLUSH_SECONDS)
+        await last_active_buffer.flush()
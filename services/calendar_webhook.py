@@ -0,0 +1,286 @@
+"""Приём push‑уведомлений Google Calendar и продление каналов подписки.
+
+Задачи модуля:
+- поднять встроенный HTTP‑приёмник для уведомлений каналов `events.watch`;
+- по уведомлению запускать инкрементальную синхронизацию затронутого
+  календаря (без ожидания очередного цикла `sync_loop`);
+- выполнять эту синхронизацию только на ведущем экземпляре: уведомление
+  принимает любой экземпляр и передаёт его ведущему через
+  `pg_notify('calendar_push', calendar_id)`;
+- заранее продлевать каналы, срок жизни которых подходит к концу, и
+  хранить их в таблице `calendar_watch_channels`.
+
+Включение:
+    Вебхук работает только если задан `GOOGLE_WEBHOOK_URL` — публичный
+    HTTPS‑адрес, проксируемый на `GOOGLE_WEBHOOK_HOST:GOOGLE_WEBHOOK_PORT`.
+    Без него бот по‑прежнему синхронизируется только по расписанию.
+
+Почему синхронизирует ведущий:
+    Инкрементальная синхронизация продвигает `syncToken` календаря. Если бы
+    её запускал экземпляр, принявший уведомление, он гонялся бы за токен
+    с `sync_loop` ведущего. `calendar_push_listener_loop` слушает канал
+    только на ведущем, поэтому все синхронизации одного календаря идут в
+    одном процессе под его блокировкой.
+
+Проверка локально:
+    Уведомление Google — это POST без тела с заголовками `X-Goog-*`, поэтому
+    его легко сымитировать, например:
+    curl -X POST http://127.0.0.1:8080/<путь> -H "X-Goog-Channel-ID: <id>" \
+         -H "X-Goog-Channel-Token: <token>" -H "X-Goog-Resource-State: exists"
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set
+from urllib.parse import urlparse
+
+import asyncpg
+from googleapiclient.errors import HttpError
+
+from config import config
+from repositories.calendar_watch import (
+    get_active_channels,
+    get_channel,
+    mark_channel_stopped,
+    notify_calendar_push,
+    save_channel,
+    touch_channel,
+)
+from services.google_calendar import get_calendar_client, get_calendar_ids, sync_calendar_incremental
+from utils.http_server import HttpRequest, HttpResponse, SimpleHttpServer
+
+logger = logging.getLogger(__name__)
+
+PUSH_CHANNEL = "calendar_push"
+
+# Период проверки соединения слушателя уведомлений, сек.
+_LISTENER_CHECK_SECONDS = 30
+
+# За сколько до истечения создавать новый канал и как часто это проверять.
+_RENEW_BEFORE = timedelta(hours=12)
+_RENEW_CHECK_INTERVAL = 60 * 60
+
+# Пауза перед синхронизацией: Google часто присылает несколько уведомлений
+# подряд на одно изменение, их достаточно обработать одной синхронизацией.
+_DEBOUNCE_SECONDS = 2
+
+_sync_tasks: Dict[str, asyncio.Task] = {}
+_resync_requested: Set[str] = set()
+
+
+def is_enabled() -> bool:
+    """Возвращает True, если вебхук настроен (`GOOGLE_WEBHOOK_URL` не пуст)."""
+    return bool(config.GOOGLE_WEBHOOK_URL)
+
+
+def _webhook_path() -> str:
+    """Путь HTTP‑маршрута приёмника, взятый из `GOOGLE_WEBHOOK_URL`."""
+    return urlparse(config.GOOGLE_WEBHOOK_URL).path or "/"
+
+
+async def handle_push(request: HttpRequest) -> HttpResponse:
+    """
+    Обрабатывает уведомление канала Google Calendar.
+
+    Аргументы:
+        request: HTTP‑запрос с заголовками `X-Goog-Channel-ID`,
+            `X-Goog-Channel-Token` и `X-Goog-Resource-State`.
+
+    Возвращает:
+        200 — уведомление принято (в том числе служебное `sync`);
+        403 — неизвестный канал или неверный токен.
+
+    Примечания:
+        🔥 ВАЖНО: ответ отдаётся сразу — уведомление только передаётся
+        ведущему экземпляру, синхронизацию он запускает в фоне. Google
+        повторяет доставку при долгом ответе или коде 5xx.
+    """
+    channel_id = request.headers.get("x-goog-channel-id", "")
+    state = request.headers.get("x-goog-resource-state", "")
+
+    channel = await get_channel(channel_id) if channel_id else None
+    if channel is None or not secrets.compare_digest(
+        channel["token"], request.headers.get("x-goog-channel-token", "")
+    ):
+        logger.warning(f"Отклонено уведомление неизвестного канала '{channel_id}'")
+        return HttpResponse(status=403)
+
+    # Первое уведомление после создания канала подтверждает подписку.
+    if state == "sync":
+        logger.info(f"Канал {channel_id} календаря {channel['calendar_id']} подтверждён Google")
+        return HttpResponse(status=200)
+
+    logger.info(f"Push‑уведомление ({state}) по календарю {channel['calendar_id']}")
+    await touch_channel(channel_id)
+    await notify_calendar_push(PUSH_CHANNEL, channel["calendar_id"])
+    return HttpResponse(status=200)
+
+
+def schedule_sync(calendar_id: str) -> None:
+    """
+    Планирует инкрементальную синхронизацию календаря после уведомления.
+
+    Примечания:
+        🔥 ВАЖНО: вызывается только на ведущем экземпляре
+        (`calendar_push_listener_loop`).
+        ⚠️ ВНИМАНИЕ: если синхронизация уже идёт, запрос не теряется —
+        после её окончания будет выполнен ещё один проход.
+    """
+    task = _sync_tasks.get(calendar_id)
+    if task is not None and not task.done():
+        _resync_requested.add(calendar_id)
+        return
+    _sync_tasks[calendar_id] = asyncio.create_task(_run_sync(calendar_id))
+
+
+async def _run_sync(calendar_id: str) -> None:
+    """Выполняет синхронизацию, пока поступают новые уведомления."""
+    while True:
+        _resync_requested.discard(calendar_id)
+        await asyncio.sleep(_DEBOUNCE_SECONDS)
+        if calendar_id not in get_calendar_ids():
+            logger.warning(
+                f"Уведомление по календарю {calendar_id}, который больше не синхронизируется"
+            )
+            return
+        try:
+            await sync_calendar_incremental(calendar_id)
+        except Exception as e:
+            logger.error(f"Ошибка синхронизации по push‑уведомлению: {e}", exc_info=True)
+        if calendar_id not in _resync_requested:
+            return
+
+
+def _on_calendar_push(connection, pid, channel, payload) -> None:
+    schedule_sync(payload)
+
+
+async def calendar_push_listener_loop() -> None:
+    """
+    Слушает канал `calendar_push` и синхронизирует календари по уведомлениям.
+
+    Примечания:
+        🔥 ВАЖНО: запускается только на ведущем экземпляре
+        (services/leader.py). Соединение отдельное, вне пула; уведомления,
+        пришедшие во время разрыва, теряются — изменения подхватит
+        очередной цикл `sync_loop`.
+    """
+    try:
+        while True:
+            conn: Optional[asyncpg.Connection] = None
+            try:
+                conn = await asyncpg.connect(dsn=config.DATABASE_URL)
+                await conn.add_listener(PUSH_CHANNEL, _on_calendar_push)
+                logger.info("Подписка на push‑уведомления календаря (LISTEN calendar_push) активна")
+                while True:
+                    await asyncio.sleep(_LISTENER_CHECK_SECONDS)
+                    await conn.fetchval("SELECT 1", timeout=_LISTENER_CHECK_SECONDS)
+            except Exception as e:
+                logger.error(f"Ошибка подписки на push‑уведомления календаря: {e}", exc_info=True)
+            finally:
+                if conn is not None:
+                    conn.terminate()
+            await asyncio.sleep(_LISTENER_CHECK_SECONDS)
+    finally:
+        # Роль ведущего потеряна: начатые синхронизации останавливаются,
+        # их продолжит новый ведущий.
+        tasks = list(_sync_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        _sync_tasks.clear()
+        _resync_requested.clear()
+
+
+async def ensure_watch_channels() -> None:
+    """
+    Гарантирует наличие действующих каналов для всех синхронизируемых календарей.
+
+    Примечания:
+        Ошибка одного календаря логируется и не мешает продлению остальных.
+    """
+    for calendar_id in get_calendar_ids():
+        try:
+            await ensure_watch_channel(calendar_id)
+        except Exception as e:
+            logger.error(f"Ошибка продления канала календаря {calendar_id}: {e}", exc_info=True)
+
+
+async def ensure_watch_channel(calendar_id: str) -> None:
+    """
+    Гарантирует наличие действующего канала для календаря.
+
+    Сценарий:
+        1. Если есть канал, который проживёт дольше `_RENEW_BEFORE`, — ничего не делаем.
+        2. Иначе создаём новый канал через `events.watch` и сохраняем его в БД.
+        3. Остальные активные каналы календаря останавливаем (`channels.stop`).
+    """
+    client = await get_calendar_client()
+    channels = await get_active_channels(calendar_id)
+    renew_deadline = datetime.now() + _RENEW_BEFORE
+
+    current = next((c for c in channels if c["expiration"] > renew_deadline), None)
+    if current is None:
+        channel_id = str(uuid.uuid4())
+        token = secrets.token_urlsafe(24)
+        response = await client.watch_events(
+            channel_id,
+            config.GOOGLE_WEBHOOK_URL,
+            token,
+            ttl_seconds=config.GOOGLE_WEBHOOK_CHANNEL_TTL_HOURS * 3600,
+            calendar_id=calendar_id,
+        )
+        expiration = datetime.fromtimestamp(int(response["expiration"]) / 1000)
+        await save_channel(channel_id, calendar_id, response["resourceId"], token, expiration)
+        logger.info(f"Создан канал {channel_id} для календаря {calendar_id} до {expiration:%d.%m.%Y %H:%M}")
+        current_id = channel_id
+    else:
+        current_id = current["channel_id"]
+
+    for channel in channels:
+        if channel["channel_id"] == current_id:
+            continue
+        try:
+            await client.stop_channel(channel["channel_id"], channel["resource_id"])
+        except HttpError as error:
+            # 404 — канал уже истёк на стороне Google
+            if error.resp.status != 404:
+                logger.warning(f"Не удалось остановить канал {channel['channel_id']}: {error}")
+        await mark_channel_stopped(channel["channel_id"])
+        logger.info(f"Канал {channel['channel_id']} остановлен")
+
+
+async def watch_renewal_loop() -> None:
+    """
+    Бесконечный цикл продления каналов push‑уведомлений (раз в час).
+
+    Примечания:
+        🔥 ВАЖНО: ошибки только логируются — при недоступности вебхука бот
+        продолжает синхронизироваться по расписанию `sync_loop`.
+    """
+    while True:
+        try:
+            await ensure_watch_channels()
+        except Exception as e:
+            logger.error(f"Ошибка продления канала push‑уведомлений: {e}", exc_info=True)
+        await asyncio.sleep(_RENEW_CHECK_INTERVAL)
+
+
+async def start_webhook_server() -> Optional[SimpleHttpServer]:
+    """
+    Запускает HTTP‑приёмник уведомлений, если вебхук включён.
+
+    Возвращает:
+        Запущенный сервер (для остановки при завершении бота) или None.
+    """
+    if not is_enabled():
+        return None
+    server = SimpleHttpServer(config.GOOGLE_WEBHOOK_HOST, config.GOOGLE_WEBHOOK_PORT)
+    server.add_route("POST", _webhook_path(), handle_push)
+    await server.start()
+    return server
@@ -0,0 +1,221 @@
+"""Диспетчер исходящих уведомлений Telegram с ограничением скорости.
+
+Задачи модуля:
+- отправлять сообщения параллельно, но в пределах лимитов Telegram
+  (около 30 сообщений в секунду на бота, 1 сообщение в секунду в личный
+  чат и 20 сообщений в минуту в группу);
+- ограничивать число одновременных запросов к Bot API;
+- повторять отправку при `RetryAfter` (flood control) и сетевых сбоях.
+
+Использование:
+    dispatcher = get_dispatcher(bot)
+    await dispatcher.send_message(chat_id=..., text=..., parse_mode="Markdown")
+    results = await dispatcher.send_many([{"chat_id": ..., "text": ...}, ...])
+
+Примечания:
+    🔥 ВАЖНО: все массовые рассылки (напоминания, уведомления менеджерам)
+    должны идти через диспетчер, а не через `bot.send_message` с `sleep` —
+    иначе общий лимит бота не соблюдается между параллельными рассылками.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from telegram import Message
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Лимит Telegram для групповых чатов: 20 сообщений в минуту.
+GROUP_CHAT_RATE = 20 / 60
+# Бакеты чатов, не использовавшиеся дольше этого времени, удаляются.
+_IDLE_BUCKET_TTL = 300
+# Погрешность накопления токенов: без неё из‑за округления float бакет мог
+# «не добрать» долю токена и уходить в серию пауз короче шага часов.
+_TOKEN_EPSILON = 1e-9
+
+
+class TokenBucket:
+    """
+    Классический token bucket: `rate` токенов в секунду, не больше `capacity`.
+
+    Аргументы:
+        rate: скорость пополнения (токенов в секунду).
+        capacity: максимальный «запас» токенов (размер всплеска).
+        clock: источник монотонного времени (подменяется в тестах).
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self.last_used = self._updated
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Ждёт, пока не освободится токен, и забирает его."""
+        while True:
+            self._refill()
+            if self._tokens >= 1 - _TOKEN_EPSILON:
+                self._tokens -= 1
+                self.last_used = self._updated
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def is_idle(self, ttl: float) -> bool:
+        """True, если бакетом не пользовались дольше `ttl` секунд."""
+        return self._clock() - self.last_used >= ttl
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    """Возвращает паузу из `RetryAfter` (int или timedelta в зависимости от версии PTB)."""
+    value = error.retry_after
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
+
+
+class NotificationDispatcher:
+    """
+    Отправляет сообщения Telegram с учётом лимитов и повторов.
+
+    Аргументы:
+        bot: экземпляр `telegram.Bot`.
+        global_rate: общий лимит сообщений в секунду.
+        chat_rate: лимит сообщений в секунду для личного чата.
+        concurrency: максимум одновременных запросов к Bot API.
+        max_retries: сколько раз повторять отправку при временных ошибках.
+        clock: источник монотонного времени для лимитов (подменяется в тестах).
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: ошибки, не связанные с перегрузкой или сетью
+        (`Forbidden` — бот заблокирован, `BadRequest` — неверный chat_id),
+        не повторяются и пробрасываются вызывающему коду.
+    """
+
+    def __init__(
+        self,
+        bot,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        concurrency: int = 8,
+        max_retries: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.max_retries = max_retries
+        self._clock = clock
+        self._global_bucket = TokenBucket(global_rate, capacity=global_rate, clock=clock)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) > 1000:
+                self._prune_buckets()
+            # Отрицательные chat_id — группы и каналы, у них свой лимит.
+            rate = GROUP_CHAT_RATE if chat_id < 0 else self.chat_rate
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate, clock=self._clock)
+        return bucket
+
+    def _prune_buckets(self) -> None:
+        """Удаляет бакеты чатов, в которые давно ничего не отправлялось."""
+        idle = [cid for cid, bucket in self._chat_buckets.items() if bucket.is_idle(_IDLE_BUCKET_TTL)]
+        for chat_id in idle:
+            del self._chat_buckets[chat_id]
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any) -> Message:
+        """
+        Отправляет одно сообщение с соблюдением лимитов.
+
+        Аргументы:
+            chat_id: получатель.
+            text: текст сообщения.
+            **kwargs: остальные параметры `bot.send_message`
+                (`parse_mode`, `reply_markup`, `message_thread_id`, ...).
+
+        Возвращает:
+            Отправленное сообщение.
+
+        Возможные ошибки:
+            TelegramError: если отправка не удалась после всех повторов
+            или ошибка не подлежит повтору.
+        """
+        attempt = 0
+        while True:
+            await self._chat_bucket(chat_id).acquire()
+            await self._global_bucket.acquire()
+            try:
+                async with self._semaphore:
+                    return await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+            except RetryAfter as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = _retry_after_seconds(e)
+                logger.warning(f"Flood control Telegram для чата {chat_id}, пауза {delay:.0f} сек.")
+            except BadRequest:
+                # BadRequest наследуется от NetworkError, но повтор не поможет.
+                raise
+            except (TimedOut, NetworkError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = 2 ** attempt
+                logger.warning(f"Сетевая ошибка при отправке в чат {chat_id}: {e}, повтор через {delay} сек.")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def send_many(
+        self,
+        messages: Iterable[Dict[str, Any]],
+    ) -> List[Union[Message, Exception]]:
+        """
+        Отправляет несколько сообщений параллельно.
+
+        Аргументы:
+            messages: словари с параметрами `send_message` (`chat_id`, `text`, ...).
+
+        Возвращает:
+            Список результатов в том же порядке: отправленное сообщение
+            или исключение, если отправка не удалась.
+        """
+        return await asyncio.gather(
+            *(self.send_message(**message) for message in messages),
+            return_exceptions=True,
+        )
+
+
+_dispatcher: Optional[NotificationDispatcher] = None
+
+
+def get_dispatcher(bot) -> NotificationDispatcher:
+    """
+    Возвращает общий диспетчер уведомлений для бота.
+
+    Примечания:
+        🔥 ВАЖНО: диспетчер один на процесс, чтобы лимиты Telegram
+        соблюдались для всех рассылок вместе.
+    """
+    global _dispatcher
+    if _dispatcher is None or _dispatcher.bot is not bot:
+        _dispatcher = NotificationDispatcher(
+            bot,
+            global_rate=config.TELEGRAM_GLOBAL_RATE,
+            chat_rate=config.TELEGRAM_CHAT_RATE,
+            concurrency=config.TELEGRAM_SEND_CONCURRENCY,
+        )
+    return _dispatcher
@@ -1,33 +1,205 @@
 """Модуль для работы с Google Calendar API."""
 
+import asyncio
 import datetime
+import hashlib
 import logging
 import os
-from typing import List, Dict, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
 
+import httplib2
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
 from config import config
+from core.types import CalendarSyncResult, EventUpsertStats
 from database import get_db_pool
+from repositories.auditories import AuditoryResolver
+from repositories.calendar_sync import (
+    get_sync_token,
+    record_sync_result,
+    reset_sync_token,
+    save_sync_token,
+)
 from utils.translit import to_latin
-from utils.auditory_names import get_english_name
-from utils.auditory_normalizer import AuditoryNormalizer
 
 logger = logging.getLogger(__name__)
 
 SCOPES = ["https://www.googleapis.com/auth/calendar.readonly"]
 
+# Отдельный ограниченный пул потоков для синхронных вызовов googleapiclient.
+# 🔥 ВАЖНО: библиотека работает только в блокирующем режиме, поэтому все
+# обращения к API выполняются здесь, а не в event loop бота.
+# Потоков не меньше, чем одновременно синхронизируемых календарей, чтобы
+# медленный календарь не занимал очередь остальных.
+_google_executor = ThreadPoolExecutor(
+    max_workers=max(config.GOOGLE_API_MAX_WORKERS, config.CALENDAR_SYNC_CONCURRENCY),
+    thread_name_prefix="google-api",
+)
+
+
+# Колонки временной таблицы для пакетного сохранения событий (порядок важен
+# для `copy_records_to_table`).
+_STAGE_COLUMNS = [
+    "google_event_id",
+    "auditory_id",
+    "title",
+    "description",
+    "start_time",
+    "end_time",
+    "organizer",
+    "status",
+    "google_etag",
+    "google_updated",
+    "calendar_id",
+    "content_hash",
+]
+
+# Как часто обновлять `last_seen` у неизменившихся событий. Чем реже, тем
+# меньше записей в `calendar_events` при частой инкрементальной синхронизации.
+_LAST_SEEN_TOUCH_INTERVAL = datetime.timedelta(hours=1)
+
+_CREATE_STAGE_TABLE_SQL = """
+    CREATE TEMP TABLE calendar_events_stage (
+        google_event_id VARCHAR(255) PRIMARY KEY,
+        auditory_id INTEGER,
+        title VARCHAR(255),
+        description TEXT,
+        start_time TIMESTAMP,
+        end_time TIMESTAMP,
+        organizer VARCHAR(255),
+        status VARCHAR(20),
+        google_etag VARCHAR(64),
+        google_updated TIMESTAMP,
+        calendar_id VARCHAR(255),
+        content_hash CHAR(64)
+    ) ON COMMIT DROP
+"""
+
+# 🔥 ВАЖНО (SQL): условие WHERE в ON CONFLICT пропускает строки с тем же
+# отпечатком — такие события не перезаписываются вовсе. RETURNING отдаёт
+# только реально вставленные (xmax = 0) и обновлённые строки.
+# `calendar_id` не перезаписывается: одно событие Google, забронированное
+# в календарях нескольких аудиторий, — одна строка, и иначе каждый
+# календарь переписывал бы её по очереди при каждой синхронизации.
+# Все календари события копятся в `source_calendars` (см. также
+# `_ADD_SOURCE_CALENDAR_SQL` для неизменившихся строк).
+# ORDER BY задаёт одинаковый порядок блокировки строк, чтобы календари,
+# синхронизируемые параллельно, не взаимоблокировались на общих событиях.
+_MERGE_STAGE_SQL = """
+    INSERT INTO calendar_events
+    (google_event_id, auditory_id, title, description,
+     start_time, end_time, organizer, status,
+     google_etag, google_updated, calendar_id, source_calendars, content_hash, last_sync, last_seen)
+    SELECT google_event_id, auditory_id, title, description,
+           start_time, end_time, organizer, status,
+           google_etag, google_updated, calendar_id, ARRAY[calendar_id], content_hash, NOW(), NOW()
+    FROM calendar_events_stage
+    ORDER BY google_event_id
+    ON CONFLICT (google_event_id) DO UPDATE SET
+        auditory_id = EXCLUDED.auditory_id,
+        title = EXCLUDED.title,
+        description = EXCLUDED.description,
+        start_time = EXCLUDED.start_time,
+        end_time = EXCLUDED.end_time,
+        organizer = EXCLUDED.organizer,
+        status = EXCLUDED.status,
+        google_etag = EXCLUDED.google_etag,
+        google_updated = EXCLUDED.google_updated,
+        calendar_id = COALESCE(calendar_events.calendar_id, EXCLUDED.calendar_id),
+        source_calendars = CASE
+            WHEN EXCLUDED.calendar_id = ANY(calendar_events.source_calendars)
+                THEN calendar_events.source_calendars
+            ELSE calendar_events.source_calendars || EXCLUDED.calendar_id
+        END,
+        content_hash = EXCLUDED.content_hash,
+        last_sync = NOW(),
+        last_seen = NOW()
+    WHERE calendar_events.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+    RETURNING (xmax = 0) AS inserted
+"""
+
+# Неизменившиеся события `_MERGE_STAGE_SQL` пропускает, поэтому календарь,
+# впервые вернувший уже известное событие, добавляется отдельно. Запись
+# происходит один раз на пару (событие, календарь).
+_ADD_SOURCE_CALENDAR_SQL = """
+    UPDATE calendar_events ce
+    SET source_calendars = ce.source_calendars || $1::varchar
+    FROM (
+        SELECT ce.id
+        FROM calendar_events ce
+        JOIN calendar_events_stage s ON s.google_event_id = ce.google_event_id
+        WHERE NOT ($1::varchar = ANY(ce.source_calendars))
+        ORDER BY ce.google_event_id
+        FOR UPDATE OF ce
+    ) missing
+    WHERE ce.id = missing.id
+"""
+
+# Удаление события из календаря: календарь убирается из `source_calendars`,
+# а статус меняется на 'cancelled', только если других календарей не
+# осталось. Строки без источников (созданные до миграции v0.17.0 без
+# `calendar_id`) отменяются сразу, как и раньше.
+_REMOVE_SOURCE_CALENDAR_SQL = """
+    UPDATE calendar_events ce
+    SET source_calendars = array_remove(ce.source_calendars, $2::varchar),
+        status = CASE
+            WHEN cardinality(array_remove(ce.source_calendars, $2::varchar)) = 0 THEN 'cancelled'
+            ELSE ce.status
+        END,
+        content_hash = CASE
+            WHEN cardinality(array_remove(ce.source_calendars, $2::varchar)) = 0 THEN NULL
+            ELSE ce.content_hash
+        END,
+        last_sync = NOW()
+    FROM (
+        SELECT id
+        FROM calendar_events
+        WHERE google_event_id = ANY($1::varchar[])
+          AND ($2::varchar = ANY(source_calendars) OR cardinality(source_calendars) = 0)
+          AND status IS DISTINCT FROM 'cancelled'
+        ORDER BY google_event_id
+        FOR UPDATE
+    ) affected
+    WHERE ce.id = affected.id
+    RETURNING ce.status = 'cancelled' AS cancelled
+"""
+
+# Дешёвый путь для неизменившихся событий: только отметка «событие ещё живо»,
+# не чаще `_LAST_SEEN_TOUCH_INTERVAL`. Колонка не индексирована, поэтому
+# PostgreSQL может выполнить HOT‑обновление без изменения индексов.
+# Строки блокируются в том же порядке, что и в `_MERGE_STAGE_SQL`.
+_TOUCH_UNCHANGED_SQL = """
+    UPDATE calendar_events ce
+    SET last_seen = NOW()
+    FROM (
+        SELECT ce.id
+        FROM calendar_events ce
+        JOIN calendar_events_stage s ON s.google_event_id = ce.google_event_id
+        WHERE ce.content_hash = s.content_hash
+          AND (ce.last_seen IS NULL OR ce.last_seen < NOW() - $1::interval)
+        ORDER BY ce.google_event_id
+        FOR UPDATE OF ce
+    ) stale
+    WHERE ce.id = stale.id
+"""
+
 
 class GoogleCalendarClient:
     """
     Клиент для работы с Google Calendar API.
 
     Задачи:
-        - аутентификация через OAuth 2.0 и хранение токена в `token.json`;
+        - аутентификация через OAuth 2.0 и хранение токена в `token.json`
+          (истёкший access‑токен далее обновляется `AuthorizedHttp` прямо
+          в потоке запроса, вне event loop);
         - загрузка событий из указанного календаря на заданный период;
         - сохранение/обновление событий в таблице `calendar_events` с
           транслитерацией названий и попыткой привязать аудитории.
@@ -39,7 +211,15 @@ class GoogleCalendarClient:
     """
     
     def __init__(self):
+        """
+        Создаёт клиент и выполняет аутентификацию.
+
+        ⚠️ ВНИМАНИЕ: конструктор блокирующий (файловый ввод‑вывод, сетевые
+        запросы к Google). Не создавайте клиент напрямую из асинхронного
+        кода — используйте `await get_calendar_client()`.
+        """
         self.service = None
+        self.credentials = None
         self.calendar_id = config.GOOGLE_CALENDAR_ID if hasattr(config, 'GOOGLE_CALENDAR_ID') else "primary"
         self._authenticate()
         logger.info(f"Используется календарь с ID: {self.calendar_id}")
@@ -65,9 +245,211 @@ class GoogleCalendarClient:
             with open("token.json", "w") as token:
                 token.write(creds.to_json())
         
+        self.credentials = creds
         self.service = build("calendar", "v3", credentials=creds)
         logger.info("Google Calendar клиент инициализирован")
+
+    async def _execute(self, request) -> Dict[str, Any]:
+        """
+        Выполняет запрос googleapiclient в пуле потоков с таймаутом.
+
+        Аргументы:
+            request: подготовленный `HttpRequest` (например, `events().list(...)`).
+
+        Возвращает:
+            Распарсенный JSON‑ответ Google API.
+
+        Возможные ошибки:
+            asyncio.TimeoutError: если Google не ответил за `GOOGLE_API_TIMEOUT` секунд.
+            HttpError: ошибки самого API пробрасываются как есть.
+
+        Примечания:
+            ⚠️ ВНИМАНИЕ: `httplib2.Http` не потокобезопасен, поэтому для каждого
+            вызова создаётся собственный транспорт с таймаутом сокета. Тот же
+            таймаут гарантирует, что поток не «зависнет» после отмены ожидания.
+        """
+        timeout = config.GOOGLE_API_TIMEOUT
+        http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=timeout))
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(_google_executor, lambda: request.execute(http=http)),
+            timeout=timeout,
+        )
     
+    async def iter_event_pages(
+        self,
+        days: int = 30,
+        page_size: Optional[int] = None,
+        calendar_id: Optional[str] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Постранично получает события из календаря на указанное количество дней вперёд.
+
+        Аргументы:
+            days: количество дней от сегодня.
+            page_size: размер страницы (`maxResults`), по умолчанию
+                `GOOGLE_CALENDAR_PAGE_SIZE`.
+            calendar_id: календарь; по умолчанию `self.calendar_id`.
+
+        Возвращает:
+            Асинхронный генератор списков событий — по одному списку на страницу.
+
+        Примечания:
+            Страницы загружаются с предзагрузкой следующей (см. `_iter_pages`).
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        time_min = now.isoformat()
+        time_max = (now + datetime.timedelta(days=days)).isoformat()
+        page_size = page_size or config.GOOGLE_CALENDAR_PAGE_SIZE
+        calendar_id = calendar_id or self.calendar_id
+
+        logger.info(f"Запрашиваем события с {time_min} по {time_max} из календаря {calendar_id}")
+
+        async for result in self._iter_pages(
+            calendar_id,
+            timeMin=time_min,
+            timeMax=time_max,
+            orderBy="startTime",
+            maxResults=page_size,
+        ):
+            yield result.get("items", [])
+
+    async def iter_changed_event_pages(
+        self,
+        sync_token: Optional[str],
+        page_size: Optional[int] = None,
+        calendar_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Постранично получает изменения календаря по `syncToken`.
+
+        Аргументы:
+            sync_token: токен из предыдущей синхронизации. Если None —
+                выполняется полная выборка окна `CALENDAR_SYNC_WINDOW_DAYS`
+                от текущего момента, и Google выдаёт первый токен.
+            page_size: размер страницы (`maxResults`).
+            calendar_id: календарь; по умолчанию `self.calendar_id`.
+
+        Возвращает:
+            Асинхронный генератор «сырых» ответов `events().list`. Поле
+            `nextSyncToken` присутствует только в ответе последней страницы.
+
+        Примечания:
+            🔥 ВАЖНО: при запросе по `syncToken` Google возвращает и удалённые
+            события (`status == "cancelled"`), а параметры `timeMin`/`timeMax`/
+            `orderBy` вместе с токеном использовать нельзя. Поэтому окно
+            задаётся только в первой выборке: без `timeMax` запрос с
+            `singleEvents=True` разворачивал бы повторяющиеся события без
+            конца. Ответы по токену окном не ограничены (изменение серии
+            возвращает все её экземпляры) — лишние события отбрасывает
+            `_sync_changes` до записи в БД.
+
+            ⚠️ ВНИМАНИЕ: если токен устарел, Google отвечает HTTP 410 —
+            `HttpError` пробрасывается вызывающему коду.
+        """
+        page_size = page_size or config.GOOGLE_CALENDAR_PAGE_SIZE
+        calendar_id = calendar_id or self.calendar_id
+        if sync_token:
+            list_kwargs: Dict[str, Any] = {"syncToken": sync_token}
+            logger.info(f"Запрашиваем изменения календаря {calendar_id} по syncToken")
+        else:
+            now = datetime.datetime.now(datetime.timezone.utc)
+            time_min = now.isoformat()
+            time_max = (now + datetime.timedelta(days=config.CALENDAR_SYNC_WINDOW_DAYS)).isoformat()
+            list_kwargs = {"timeMin": time_min, "timeMax": time_max}
+            logger.info(f"Полная выборка календаря {calendar_id} с {time_min} по {time_max}")
+
+        async for result in self._iter_pages(calendar_id, maxResults=page_size, **list_kwargs):
+            yield result
+
+    async def watch_events(
+        self,
+        channel_id: str,
+        address: str,
+        token: str,
+        ttl_seconds: int,
+        calendar_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Подписывает вебхук на изменения событий календаря (`events.watch`).
+
+        Аргументы:
+            channel_id: уникальный идентификатор нового канала.
+            address: публичный HTTPS‑адрес приёмника уведомлений.
+            token: секрет, который Google будет присылать в `X-Goog-Channel-Token`.
+            ttl_seconds: желаемый срок жизни канала.
+            calendar_id: календарь; по умолчанию `self.calendar_id`.
+
+        Возвращает:
+            Ответ API с полями `resourceId` и `expiration` (мс с начала эпохи).
+        """
+        return await self._execute(
+            self.service.events().watch(
+                calendarId=calendar_id or self.calendar_id,
+                body={
+                    "id": channel_id,
+                    "type": "web_hook",
+                    "address": address,
+                    "token": token,
+                    "params": {"ttl": str(ttl_seconds)},
+                },
+            )
+        )
+
+    async def stop_channel(self, channel_id: str, resource_id: str) -> None:
+        """
+        Останавливает канал push‑уведомлений (`channels.stop`).
+
+        Аргументы:
+            channel_id: идентификатор канала.
+            resource_id: `resourceId`, полученный при создании канала.
+        """
+        await self._execute(
+            self.service.channels().stop(body={"id": channel_id, "resourceId": resource_id})
+        )
+
+    async def _iter_pages(self, calendar_id: str, **list_kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Обходит все страницы `events().list` с предзагрузкой следующей страницы.
+
+        Аргументы:
+            calendar_id: календарь, из которого читаются события.
+            **list_kwargs: параметры `events().list`, кроме `calendarId`,
+                `singleEvents` и `pageToken`.
+
+        Возвращает:
+            Асинхронный генератор ответов API — по одному на страницу.
+
+        Примечания:
+            🔥 ВАЖНО: следующая страница запрашивается сразу после получения
+            текущей, ещё до того как вызывающий код её обработает. Так запись
+            в БД перекрывается с сетевым запросом, а в памяти одновременно
+            находится не больше двух страниц.
+        """
+        def request_page(page_token: Optional[str]):
+            return self._execute(
+                self.service.events().list(
+                    calendarId=calendar_id,
+                    singleEvents=True,
+                    pageToken=page_token,
+                    **list_kwargs,
+                )
+            )
+
+        next_page = asyncio.ensure_future(request_page(None))
+        pages = 0
+        try:
+            while next_page is not None:
+                result = await next_page
+                page_token = result.get("nextPageToken")
+                next_page = asyncio.ensure_future(request_page(page_token)) if page_token else None
+                pages += 1
+                yield result
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+        logger.info(f"Получено страниц из Google Calendar ({calendar_id}): {pages}")
+
     async def fetch_events(self, days: int = 30) -> List[Dict[str, Any]]:
         """
         Получает события из календаря на указанное количество дней вперёд.
@@ -76,30 +458,28 @@ class GoogleCalendarClient:
             days: количество дней от сегодня
             
         Returns:
-            Список событий
+            Список событий со всех страниц выдачи
+
+        Примечания:
+            ⚠️ ВНИМАНИЕ: держит в памяти всю выдачу целиком. Для синхронизации
+            используйте `iter_event_pages`, который сохраняет события постранично.
         """
+        events: List[Dict[str, Any]] = []
         try:
-            now = datetime.datetime.now(datetime.timezone.utc)
-            time_min = now.isoformat()
-            time_max = (now + datetime.timedelta(days=days)).isoformat()
-            
-            logger.info(f"Запрашиваем события с {time_min} по {time_max} из календаря {self.calendar_id}")
-            
-            events_result = self.service.events().list(
-                calendarId=self.calendar_id,
-                timeMin=time_min,
-                timeMax=time_max,
-                singleEvents=True,
-                orderBy="startTime"
-            ).execute()
-            
-            events = events_result.get("items", [])
+            async for page in self.iter_event_pages(days):
+                events.extend(page)
             logger.info(f"Получено {len(events)} событий из Google Calendar")
             return events
             
         except HttpError as error:
             logger.error(f"Ошибка при получении событий: {error}")
             return []
+        except asyncio.TimeoutError:
+            logger.error(
+                "Google Calendar не ответил за %s сек., синхронизация пропущена",
+                config.GOOGLE_API_TIMEOUT,
+            )
+            return []
     
     def _extract_auditory_from_event(self, event: Dict) -> Optional[str]:
         """
@@ -116,171 +496,571 @@ class GoogleCalendarClient:
         
         return None
 
-    async def _find_auditory_id(
-        self,
-        raw_auditory_name: str,
-        pool,
-    ) -> Optional[int]:
+    def _parse_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Пытается найти ID аудитории по «сырому» названию из Google Calendar.
+        Приводит событие Google Calendar к полям таблицы `calendar_events`.
 
-        Алгоритм:
-        1. Прямая транслитерация и поиск по БД (как было реализовано ранее).
-        2. Если не найдено — нормализация названия и повторный поиск.
-        3. При неудаче — логирование warning для последующего пополнения словаря.
+        Возвращает:
+            Словарь с датами без часового пояса, транслитерированным названием
+            и «сырым» названием аудитории (`auditory_name`) для последующего
+            сопоставления со справочником.
         """
-        name = (raw_auditory_name or "").strip()
-        if not name:
-            return None
-
-        # 1. Прямая транслитерация (как раньше)
-        en_auditory = to_latin(name)
-        row = await pool.fetchrow(
-            "SELECT id FROM auditories WHERE name = $1",
-            en_auditory,
-        )
-        if row:
-            return row["id"]
-
-        # 2. Нормализация и повторный поиск
-        normalized = AuditoryNormalizer.normalize(name)
-        if normalized != name:
-            logger.debug(
-                "Нормализовано название аудитории: '%s' -> '%s'",
-                name,
-                normalized,
-            )
+        # Получаем строки с датами из события
+        start_str = event["start"].get("dateTime", event["start"].get("date"))
+        end_str = event["end"].get("dateTime", event["end"].get("date"))
 
-        # Используем словарь соответствий английских и русских названий
-        # для получения ключа, который хранится в таблице `auditories`.
-        english_name = get_english_name(normalized)
-        row = await pool.fetchrow(
-            "SELECT id FROM auditories WHERE name = $1",
-            english_name,
-        )
-        if row:
-            return row["id"]
+        # Конвертируем строки в datetime объекты и удаляем информацию о часовом поясе
+        if 'T' in start_str:
+            # Это событие с конкретным временем
+            start_str = start_str.replace('Z', '+00:00')
+            end_str = end_str.replace('Z', '+00:00')
+            start = datetime.datetime.fromisoformat(start_str)
+            end = datetime.datetime.fromisoformat(end_str)
+            # Удаляем информацию о часовом поясе (делаем naive)
+            if start.tzinfo is not None:
+                start = start.replace(tzinfo=None)
+            if end.tzinfo is not None:
+                end = end.replace(tzinfo=None)
+        else:
+            # Это событие на целый день
+            start = datetime.datetime.fromisoformat(start_str)
+            end = datetime.datetime.fromisoformat(end_str)
 
-        # 3. Ничего не нашли — логируем предупреждение
-        logger.warning(
-            "Аудитория не найдена по названию '%s' (нормализовано как '%s'). "
-            "Проверь справочник аудиторий и при необходимости добавь вариант в ALIASES.",
-            name,
-            normalized,
-        )
-        return None
-    
-    async def save_events_to_db(self, events: List[Dict[str, Any]]):
+        # Русское название из календаря транслитерируем для хранения в БД
+        ru_title = event.get("summary", "Без названия")
+
+        # ⚠️ ВНИМАНИЕ: строки обрезаются под размер колонок VARCHAR(255) —
+        # одно слишком длинное название не должно ронять сохранение всей пачки.
+        updated_str = event.get("updated")
+        google_updated = None
+        if updated_str:
+            google_updated = datetime.datetime.fromisoformat(
+                updated_str.replace('Z', '+00:00')
+            ).astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+        return {
+            "google_event_id": event["id"],
+            "auditory_name": self._extract_auditory_from_event(event),
+            "title": to_latin(ru_title)[:255],
+            "description": event.get("description", ""),
+            "start_time": start,
+            "end_time": end,
+            "organizer": event.get("organizer", {}).get("email", "")[:255],
+            "status": event.get("status", "confirmed"),
+            "google_etag": (event.get("etag") or "")[:64] or None,
+            "google_updated": google_updated,
+        }
+
+    @staticmethod
+    def _content_hash(record: tuple) -> str:
+        """
+        Вычисляет отпечаток (SHA-256) синхронизируемых полей события.
+
+        Аргументы:
+            record: значения полей в порядке `_STAGE_COLUMNS` без
+                `calendar_id` и `content_hash`.
+
+        Примечания:
+            ⚠️ ВНИМАНИЕ: в отпечаток входит и `auditory_id`, поэтому пополнение
+            справочника аудиторий перезапишет события с новой привязкой.
+            `calendar_id` в отпечаток не входит: одно и то же событие приходит
+            из календарей всех забронированных аудиторий с одинаковыми полями.
+        """
+        payload = "\x1f".join("" if value is None else str(value) for value in record)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def save_events_to_db(
+        self,
+        events: List[Dict[str, Any]],
+        resolver: Optional[AuditoryResolver] = None,
+        calendar_id: Optional[str] = None,
+    ) -> EventUpsertStats:
         """
         Сохраняет полученные из Google Calendar события в базу данных.
 
         Аргументы:
-            events: список событий, полученный из `fetch_events`.
+            events: список событий (страница из `iter_event_pages` или результат `fetch_events`).
+            resolver: индекс аудиторий, общий для всего прогона синхронизации.
+                Если не передан — строится заново и несопоставленные названия
+                логируются сразу после сохранения.
+            calendar_id: календарь, из которого получены события; по умолчанию
+                `self.calendar_id`.
+
+        Возвращает:
+            `EventUpsertStats` — количество вставленных, изменённых, не
+            изменившихся и отменённых событий.
 
         Примечания:
             🔥 ВАЖНО:
             - названия мероприятий и аудиторий транслитерируются в латиницу
               (`to_latin`), чтобы хранить единый формат в БД;
-            - используется `INSERT ... ON CONFLICT (google_event_id) DO UPDATE`,
-              что позволяет повторно синхронизировать уже существующие события
-              без дублирования записей.
+            - вся страница событий загружается во временную таблицу через
+              `COPY` и сливается в `calendar_events` одним
+              `INSERT ... SELECT ... ON CONFLICT (google_event_id) DO UPDATE`
+              в одной транзакции — вместо отдельного запроса на каждое событие;
+            - аудитории сопоставляются через `AuditoryResolver` в памяти,
+              без запросов к БД на каждое событие.
+            - перезаписываются только строки, у которых изменился отпечаток
+              `content_hash`; у остальных раз в час обновляется лишь `last_seen`.
         """
         pool = get_db_pool()
-        saved_count = 0
-        
+        stats: EventUpsertStats = {"inserted": 0, "updated": 0, "unchanged": 0, "cancelled": 0}
+
+        # Удалённые события (приходят при синхронизации по syncToken) содержат
+        # только id и статус, поэтому обрабатываются отдельно.
+        cancelled_ids = [event["id"] for event in events if event.get("status") == "cancelled"]
+        if cancelled_ids:
+            stats["cancelled"] = await self.mark_events_cancelled(cancelled_ids, calendar_id)
+            events = [event for event in events if event.get("status") != "cancelled"]
+
+        # Разбираем события. Повторы одного google_event_id внутри пачки
+        # схлопываются (побеждает последний) — ON CONFLICT не может обновить
+        # одну строку дважды в одном запросе.
+        parsed: Dict[str, Dict[str, Any]] = {}
         for event in events:
             try:
-                # Получаем строки с датами из события
-                start_str = event["start"].get("dateTime", event["start"].get("date"))
-                end_str = event["end"].get("dateTime", event["end"].get("date"))
-                
-                # Конвертируем строки в datetime объекты и удаляем информацию о часовом поясе
-                if 'T' in start_str:
-                    # Это событие с конкретным временем
-                    start_str = start_str.replace('Z', '+00:00')
-                    end_str = end_str.replace('Z', '+00:00')
-                    start = datetime.datetime.fromisoformat(start_str)
-                    end = datetime.datetime.fromisoformat(end_str)
-                    # Удаляем информацию о часовом поясе (делаем naive)
-                    if start.tzinfo is not None:
-                        start = start.replace(tzinfo=None)
-                    if end.tzinfo is not None:
-                        end = end.replace(tzinfo=None)
-                else:
-                    # Это событие на целый день
-                    start = datetime.datetime.fromisoformat(start_str)
-                    end = datetime.datetime.fromisoformat(end_str)
-                
-                # Получаем русское название из календаря
-                ru_title = event.get("summary", "Без названия")
-                
-                # Транслитерируем в английское для хранения в БД
-                en_title = to_latin(ru_title)
-                
-                # Пытаемся определить аудиторию
-                auditory_name = self._extract_auditory_from_event(event)
-                auditory_id: Optional[int] = None
-
-                if auditory_name:
-                    auditory_id = await self._find_auditory_id(auditory_name, pool)
-                    if auditory_id is not None:
-                        logger.debug(
-                            "Найдена аудитория '%s' (ID: %s)",
-                            auditory_name,
-                            auditory_id,
-                        )
-                
-                # Вставляем или обновляем событие в таблицу calendar_events.
+                row = self._parse_event(event)
+            except Exception as e:
+                logger.error(f"Ошибка при разборе события {event.get('id')}: {e}")
+                continue
+            parsed[row["google_event_id"]] = row
+
+        if not parsed:
+            return stats
+
+        own_resolver = resolver is None
+        if own_resolver:
+            resolver = await AuditoryResolver.load()
+
+        calendar_id = calendar_id or self.calendar_id
+        records = []
+        for row in parsed.values():
+            fields = (
+                row["google_event_id"],
+                resolver.resolve(row["auditory_name"]),
+                row["title"],
+                row["description"],
+                row["start_time"],
+                row["end_time"],
+                row["organizer"],
+                row["status"],
+                row["google_etag"],
+                row["google_updated"],
+            )
+            records.append(fields + (calendar_id, self._content_hash(fields)))
+
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(_CREATE_STAGE_TABLE_SQL)
+                await conn.copy_records_to_table(
+                    "calendar_events_stage",
+                    records=records,
+                    columns=_STAGE_COLUMNS,
+                )
                 # 🔥 ВАЖНО (SQL): ключом уникальности является `google_event_id`,
                 # поэтому если событие было изменено в календаре, оно будет
                 # корректно обновлено при следующей синхронизации.
-                await pool.execute(
-                    """
-                    INSERT INTO calendar_events 
-                    (google_event_id, auditory_id, title, description, 
-                     start_time, end_time, organizer, status, last_sync)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW())
-                    ON CONFLICT (google_event_id) DO UPDATE SET
-                        auditory_id = EXCLUDED.auditory_id,
-                        title = EXCLUDED.title,
-                        description = EXCLUDED.description,
-                        start_time = EXCLUDED.start_time,
-                        end_time = EXCLUDED.end_time,
-                        organizer = EXCLUDED.organizer,
-                        status = EXCLUDED.status,
-                        last_sync = NOW()
-                    """,
-                    event["id"],
-                    auditory_id,
-                    en_title,
-                    event.get("description", ""),
-                    start,
-                    end,
-                    event.get("organizer", {}).get("email", ""),
-                    event.get("status", "confirmed")
-                )
-                
-                saved_count += 1
-                logger.debug(f"Событие {event['id']} сохранено (было: '{ru_title}' -> стало: '{en_title}')")
-                
-            except Exception as e:
-                logger.error(f"Ошибка при сохранении события {event.get('id')}: {e}")
-        
-        logger.info(f"Сохранено {saved_count} событий в базу данных")
+                written = await conn.fetch(_MERGE_STAGE_SQL)
+                await conn.execute(_ADD_SOURCE_CALENDAR_SQL, calendar_id)
+                await conn.execute(_TOUCH_UNCHANGED_SQL, _LAST_SEEN_TOUCH_INTERVAL)
+
+        if own_resolver:
+            resolver.report_unresolved()
+
+        stats["inserted"] = sum(1 for row in written if row["inserted"])
+        stats["updated"] = len(written) - stats["inserted"]
+        stats["unchanged"] = len(records) - len(written)
+        logger.info(
+            "Сохранено %s событий: новых %s, изменённых %s, без изменений %s, отменённых %s",
+            len(records),
+            stats["inserted"],
+            stats["updated"],
+            stats["unchanged"],
+            stats["cancelled"],
+        )
+        return stats
+
+    async def known_event_ids(self, google_event_ids: List[str]) -> set[str]:
+        """
+        Возвращает те из переданных идентификаторов, для которых уже есть строка в `calendar_events`.
+
+        Аргументы:
+            google_event_ids: идентификаторы событий Google.
+        """
+        pool = get_db_pool()
+        rows = await pool.fetch(
+            "SELECT google_event_id FROM calendar_events WHERE google_event_id = ANY($1::varchar[])",
+            google_event_ids,
+        )
+        return {row["google_event_id"] for row in rows}
+
+    async def mark_events_cancelled(
+        self,
+        google_event_ids: List[str],
+        calendar_id: Optional[str] = None,
+    ) -> int:
+        """
+        Помечает события, удалённые в Google Calendar, как отменённые.
+
+        Аргументы:
+            google_event_ids: идентификаторы событий Google.
+            calendar_id: календарь, в котором события удалены; по умолчанию
+                `self.calendar_id`.
+
+        Возвращает:
+            Количество отменённых событий.
+
+        Примечания:
+            ⚠️ ВНИМАНИЕ: строки не удаляются — на события могут ссылаться
+            назначения и уведомления. События, которых ещё нет в БД
+            (созданы и удалены между синхронизациями), просто пропускаются.
+
+            🔥 ВАЖНО: у одного события Google может быть копия в календарях
+            нескольких ресурсов с тем же ID. Календарь только убирается из
+            `source_calendars` события; отменяется событие, когда в нём не
+            осталось календарей, — иначе снятие брони одной аудитории
+            отменило бы всё мероприятие.
+        """
+        pool = get_db_pool()
+        rows = await pool.fetch(
+            _REMOVE_SOURCE_CALENDAR_SQL,
+            google_event_ids,
+            calendar_id or self.calendar_id,
+        )
+        cancelled = sum(1 for row in rows if row["cancelled"])
+        logger.info(
+            f"Удалено из календаря {len(rows)} событий из {len(google_event_ids)}, "
+            f"из них отменено {cancelled}"
+        )
+        return cancelled
+
+
+# Клиент создаётся лениво при первом обращении (см. `get_calendar_client`).
+_calendar_client: Optional[GoogleCalendarClient] = None
+_calendar_client_lock = asyncio.Lock()
+
+# Ограничение на число одновременно синхронизируемых календарей и
+# блокировки синхронизации — по одной на календарь (общие для полной
+# и инкрементальной синхронизации).
+_sync_semaphore = asyncio.Semaphore(config.CALENDAR_SYNC_CONCURRENCY)
+_calendar_sync_locks: Dict[str, asyncio.Lock] = {}
+
+__all__ = [
+    'GoogleCalendarClient',
+    'get_calendar_client',
+    'get_calendar_ids',
+    'sync_calendar',
+    'sync_calendars',
+    'sync_calendar_incremental',
+    'sync_calendars_incremental',
+]
+
+
+async def get_calendar_client() -> GoogleCalendarClient:
+    """
+    Возвращает общий экземпляр `GoogleCalendarClient`, создавая его при первом вызове.
+
+    Возвращает:
+        Готовый к работе клиент Google Calendar.
+
+    Возможные ошибки:
+        Исключения аутентификации (нет `credentials.json`, отозван токен и т.п.)
+        пробрасываются вызывающему коду; следующий вызов повторит попытку.
+
+    Примечания:
+        🔥 ВАЖНО: чтение `token.json`, обновление токена, интерактивная
+        авторизация и `googleapiclient.discovery.build` выполняются в пуле
+        потоков Google API, а не при импорте модуля и не в event loop. Поэтому
+        время старта бота не зависит от доступности Google.
+
+        ⚠️ ВНИМАНИЕ: блокировка гарантирует, что при одновременных вызовах
+        клиент будет создан ровно один раз.
+    """
+    global _calendar_client
+
+    if _calendar_client is not None:
+        return _calendar_client
+
+    async with _calendar_client_lock:
+        if _calendar_client is None:
+            loop = asyncio.get_running_loop()
+            _calendar_client = await loop.run_in_executor(_google_executor, GoogleCalendarClient)
+    return _calendar_client
+
+
+def get_calendar_ids() -> List[str]:
+    """Возвращает список синхронизируемых календарей (`GOOGLE_CALENDAR_IDS`)."""
+    return list(config.GOOGLE_CALENDAR_IDS)
+
+
+def _calendar_sync_lock(calendar_id: str) -> asyncio.Lock:
+    """Блокировка, под которой выполняется любая синхронизация календаря."""
+    return _calendar_sync_locks.setdefault(calendar_id, asyncio.Lock())
+
+
+async def _run_calendar_sync(
+    calendar_id: str,
+    sync: Callable[[], Awaitable[int]],
+) -> CalendarSyncResult:
+    """
+    Выполняет синхронизацию одного календаря под общим семафором.
+
+    Аргументы:
+        calendar_id: идентификатор календаря.
+        sync: корутина‑функция, выполняющая синхронизацию и возвращающая
+            количество обработанных событий.
+
+    Возвращает:
+        `CalendarSyncResult` с длительностью и текстом ошибки (если была).
+
+    Примечания:
+        🔥 ВАЖНО: ошибка одного календаря не прерывает остальные — она
+        записывается в `calendar_sync_state.error_count`/`last_error`.
+    """
+    async with _sync_semaphore:
+        started = time.perf_counter()
+        processed = 0
+        error: Optional[str] = None
+        try:
+            processed = await sync()
+        except asyncio.TimeoutError:
+            error = f"Google Calendar не ответил за {config.GOOGLE_API_TIMEOUT} сек."
+            logger.error(f"Синхронизация календаря {calendar_id}: {error}")
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            logger.error(f"Ошибка синхронизации календаря {calendar_id}: {e}", exc_info=True)
+        duration = time.perf_counter() - started
+
+    try:
+        await record_sync_result(calendar_id, duration, error)
+    except Exception as e:
+        logger.error(f"Не удалось сохранить состояние синхронизации {calendar_id}: {e}")
 
+    return {
+        "calendar_id": calendar_id,
+        "processed": processed,
+        "duration_sec": duration,
+        "error": error,
+    }
 
-# Создаём глобальный экземпляр клиента
-calendar_client = GoogleCalendarClient()
 
-__all__ = ['GoogleCalendarClient', 'calendar_client', 'sync_calendar']
+async def sync_calendars(
+    days: int = 30,
+    calendar_ids: Optional[List[str]] = None,
+) -> Dict[str, CalendarSyncResult]:
+    """
+    Синхронизирует окно в `days` дней по всем календарям параллельно.
+
+    Аргументы:
+        days: количество дней от сегодня.
+        calendar_ids: календари для синхронизации; по умолчанию все из конфига.
+
+    Возвращает:
+        Словарь `calendar_id -> CalendarSyncResult`.
+
+    Примечания:
+        Одновременно синхронизируется не больше `CALENDAR_SYNC_CONCURRENCY`
+        календарей. Индекс аудиторий строится один раз на весь прогон.
+
+        ⚠️ ВНИМАНИЕ: календарь синхронизируется под той же блокировкой, что
+        и в `sync_calendars_incremental`, — полная и инкрементальная
+        синхронизация одного календаря не перекрываются.
+    """
+    calendar_ids = calendar_ids or get_calendar_ids()
+    calendar_client = await get_calendar_client()
+    resolver = await AuditoryResolver.load()
 
+    async def sync_window(calendar_id: str) -> int:
+        processed = 0
+        async for page in calendar_client.iter_event_pages(days, calendar_id=calendar_id):
+            await calendar_client.save_events_to_db(page, resolver, calendar_id)
+            processed += len(page)
+        return processed
 
-async def sync_calendar(days: int = 30):
-    """Синхронизирует календарь с базой данных."""
+    async def sync_one(calendar_id: str) -> CalendarSyncResult:
+        async with _calendar_sync_lock(calendar_id):
+            return await _run_calendar_sync(calendar_id, partial(sync_window, calendar_id))
+
+    results = await asyncio.gather(*(sync_one(calendar_id) for calendar_id in calendar_ids))
+    resolver.report_unresolved()
+    return {result["calendar_id"]: result for result in results}
+
+
+async def sync_calendar(days: int = 30) -> int:
+    """
+    Синхронизирует все календари с базой данных.
+
+    События сохраняются постранично по мере загрузки, поэтому потребление
+    памяти ограничено размером страницы, а не всем окном синхронизации.
+
+    Возвращает:
+        Количество обработанных событий (суммарно по календарям).
+    """
     logger.info("Начинаем синхронизацию календаря")
+    processed = 0
+    try:
+        results = await sync_calendars(days)
+        processed = sum(result["processed"] for result in results.values())
+        logger.info(f"Синхронизация завершена. Обработано {processed} событий")
+    except Exception as e:
+        logger.error(f"Ошибка при синхронизации календаря: {e}")
+    return processed
+
+
+async def sync_calendars_incremental(
+    calendar_ids: Optional[List[str]] = None,
+) -> Dict[str, CalendarSyncResult]:
+    """
+    Инкрементальная синхронизация по `syncToken` для нескольких календарей.
+
+    Аргументы:
+        calendar_ids: календари для синхронизации; по умолчанию все из конфига.
+
+    Возвращает:
+        Словарь `calendar_id -> CalendarSyncResult`.
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: запуски по одному календарю (из `sync_loop`, из
+        вебхука и полная синхронизация `sync_calendars`) выполняются строго
+        по очереди, чтобы не запрашивать изменения по одному и тому же
+        токену дважды. Разные календари не ждут друг друга.
+    """
+    calendar_ids = calendar_ids or get_calendar_ids()
+    calendar_client = await get_calendar_client()
+
+    async def sync_one(calendar_id: str) -> CalendarSyncResult:
+        async with _calendar_sync_lock(calendar_id):
+            return await _run_calendar_sync(
+                calendar_id,
+                partial(_sync_calendar_incremental, calendar_client, calendar_id),
+            )
+
+    results = await asyncio.gather(*(sync_one(calendar_id) for calendar_id in calendar_ids))
+    return {result["calendar_id"]: result for result in results}
+
+
+async def sync_calendar_incremental(calendar_id: Optional[str] = None) -> int:
+    """
+    Инкрементальная синхронизация календаря по `syncToken`.
+
+    Сценарий:
+        1. Берёт сохранённый токен из `calendar_sync_state`.
+        2. Если токена нет — выполняет полную выборку и получает первый токен.
+        3. Иначе запрашивает только изменения, включая отменённые события.
+        4. После сохранения всех страниц записывает новый `nextSyncToken`.
+
+    Аргументы:
+        calendar_id: календарь; если не указан — синхронизируются все.
+
+    Возвращает:
+        Количество обработанных событий (изменений).
+
+    Примечания:
+        🔥 ВАЖНО: стоимость запуска пропорциональна числу изменений, а не
+        размеру окна, поэтому функцию можно вызывать раз в несколько минут.
+
+        ⚠️ ВНИМАНИЕ: если Google отвечает HTTP 410 (токен устарел), токен
+        сбрасывается и сразу выполняется полная ресинхронизация.
+    """
     try:
-        events = await calendar_client.fetch_events(days)
-        await calendar_client.save_events_to_db(events)
-        logger.info(f"Синхронизация завершена. Обработано {len(events)} событий")
+        results = await sync_calendars_incremental([calendar_id] if calendar_id else None)
     except Exception as e:
-        logger.error(f"Ошибка при синхронизации календаря: {e}")
\ No newline at end of file
+        logger.error(f"Ошибка при инкрементальной синхронизации календаря: {e}")
+        return 0
+    return sum(result["processed"] for result in results.values())
+
+
+async def _sync_calendar_incremental(
+    calendar_client: GoogleCalendarClient,
+    calendar_id: str,
+) -> int:
+    """Инкрементальная синхронизация одного календаря (с откатом на полную при 410)."""
+    sync_token = await get_sync_token(calendar_id)
+    try:
+        processed, next_sync_token = await _sync_changes(calendar_client, calendar_id, sync_token)
+    except HttpError as error:
+        if error.resp.status != 410 or sync_token is None:
+            raise
+        logger.warning(
+            f"syncToken календаря {calendar_id} устарел (410), выполняем полную ресинхронизацию"
+        )
+        await reset_sync_token(calendar_id)
+        sync_token = None
+        processed, next_sync_token = await _sync_changes(calendar_client, calendar_id, None)
+
+    if next_sync_token:
+        await save_sync_token(calendar_id, next_sync_token, full_sync=sync_token is None)
+    else:
+        logger.warning(f"Google не вернул nextSyncToken для календаря {calendar_id}")
+
+    mode = "инкрементальная" if sync_token else "полная"
+    logger.info(f"Синхронизация {calendar_id} ({mode}) завершена. Обработано {processed} изменений")
+    return processed
+
+
+def _starts_before(event: Dict[str, Any], horizon: datetime.datetime) -> bool:
+    """True, если событие начинается раньше `horizon` или его начало неизвестно (удалённое событие)."""
+    start = event.get("start") or {}
+    if start.get("dateTime"):
+        return datetime.datetime.fromisoformat(start["dateTime"]) < horizon
+    if start.get("date"):
+        return datetime.date.fromisoformat(start["date"]) < horizon.date()
+    return True
+
+
+async def _drop_new_beyond_window(
+    calendar_client: GoogleCalendarClient,
+    items: List[Dict[str, Any]],
+    horizon: datetime.datetime,
+) -> List[Dict[str, Any]]:
+    """Отбрасывает события, начинающиеся после `horizon`, которых ещё нет в БД."""
+    beyond = {item["id"] for item in items if not _starts_before(item, horizon)}
+    if not beyond:
+        return items
+    keep = await calendar_client.known_event_ids(sorted(beyond))
+    return [item for item in items if item["id"] not in beyond or item["id"] in keep]
+
+
+async def _sync_changes(
+    calendar_client: GoogleCalendarClient,
+    calendar_id: str,
+    sync_token: Optional[str],
+) -> tuple[int, Optional[str]]:
+    """
+    Загружает и сохраняет изменения по `syncToken` (или полную выборку).
+
+    Возвращает:
+        Кортеж (количество обработанных событий, новый `nextSyncToken`).
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: новые события, начинающиеся позже окна
+        `CALENDAR_SYNC_WINDOW_DAYS`, не сохраняются — ответ по `syncToken`
+        не ограничить `timeMax`, и изменение повторяющейся серии приносит
+        все её экземпляры. Такие события попадут в БД полной синхронизацией,
+        когда окажутся в окне.
+
+        🔥 ВАЖНО: события за окном, которые уже есть в БД, сохраняются —
+        это мероприятие, перенесённое из окна дальше. Иначе его строка
+        осталась бы со старым временем, и по ней сработали бы напоминания и
+        авто‑завершение; полная синхронизация (`timeMin` = сейчас) его уже
+        не вернула бы.
+    """
+    processed = 0
+    next_sync_token: Optional[str] = None
+    resolver: Optional[AuditoryResolver] = None
+    horizon = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
+        days=config.CALENDAR_SYNC_WINDOW_DAYS
+    )
+    async for result in calendar_client.iter_changed_event_pages(sync_token, calendar_id=calendar_id):
+        items = await _drop_new_beyond_window(calendar_client, result.get("items", []), horizon)
+        if items:
+            # Индекс аудиторий строим лениво: в большинстве инкрементальных
+            # прогонов изменений нет вовсе.
+            if resolver is None:
+                resolver = await AuditoryResolver.load()
+            await calendar_client.save_events_to_db(items, resolver, calendar_id)
+        processed += len(items)
+        next_sync_token = result.get("nextSyncToken", next_sync_token)
+    if resolver is not None:
+        resolver.report_unresolved()
+    return processed, next_sync_token
@@ -0,0 +1,204 @@
+"""Единый планировщик ежедневных задач бота (сводки, отчёты, напоминания).
+
+Задачи модуля:
+- описывать задачи декларативно (`JobSpec`: имя, время запуска, функция);
+- считать время запуска в часовом поясе `config.TIMEZONE` (или системном
+  с правилами перехода на летнее время), а не по наивному `datetime.now()`;
+- после простоя догонять пропущенный запуск, если он опоздал не больше
+  чем на `catch_up` (по отметке в таблице `scheduled_job_runs`);
+- гарантировать не более одного выполнения слота при нескольких
+  экземплярах бота (слот атомарно занимается в `scheduled_job_runs`);
+- вести статистику длительности выполнения каждой задачи.
+
+Использование:
+    runner = JobRunner(bot, [
+        JobSpec("morning_summary", time(9, 0), send_morning_summary),
+    ])
+    runner.start()
+    ...
+    await runner.stop()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from time import monotonic
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from config import config
+from repositories.job_runs import claim_job_slot, record_job_run
+from utils.metrics import TimingStats
+
+logger = logging.getLogger(__name__)
+
+# Сон до слота дробится на отрезки не длиннее этого значения, чтобы
+# переход системных часов или сон хоста не сдвигали запуск надолго.
+_MAX_SLEEP_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    """
+    Описание ежедневной задачи.
+
+    Аргументы:
+        name: уникальное имя (ключ в `scheduled_job_runs` и в логах).
+        at: локальное время запуска в часовом поясе `config.TIMEZONE`.
+        func: корутина, принимающая экземпляр бота.
+        catch_up: насколько поздно ещё имеет смысл выполнить пропущенный
+            запуск (например, утренняя сводка в 15:00 уже не нужна).
+    """
+
+    name: str
+    at: time
+    func: Callable[[Any], Awaitable[Any]]
+    catch_up: timedelta = timedelta(hours=3)
+
+
+def get_timezone() -> tzinfo:
+    """
+    Часовой пояс расписания: `config.TIMEZONE` или системный, если не задан.
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: системный пояс берётся как `ZoneInfo("localtime")` —
+        с правилами перехода на летнее время, а не фиксированным смещением
+        на момент запуска. Если в системе нет /etc/localtime, используется UTC.
+    """
+    if config.TIMEZONE:
+        return ZoneInfo(config.TIMEZONE)
+    try:
+        return ZoneInfo("localtime")
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning("Системный часовой пояс не найден, расписание считается в UTC; задайте TIMEZONE")
+        return timezone.utc
+
+
+def _slot_on(day: date, spec: JobSpec, tz: tzinfo) -> datetime:
+    return datetime.combine(day, spec.at, tzinfo=tz)
+
+
+def latest_slot(spec: JobSpec, now: datetime) -> datetime:
+    """Последний слот задачи, наступивший не позже `now` (aware datetime)."""
+    slot = _slot_on(now.date(), spec, now.tzinfo)
+    if slot > now:
+        slot = _slot_on(now.date() - timedelta(days=1), spec, now.tzinfo)
+    return slot
+
+
+def next_slot(spec: JobSpec, now: datetime) -> datetime:
+    """Ближайший слот задачи строго после `now` (aware datetime)."""
+    slot = _slot_on(now.date(), spec, now.tzinfo)
+    if slot <= now:
+        slot = _slot_on(now.date() + timedelta(days=1), spec, now.tzinfo)
+    return slot
+
+
+class JobRunner:
+    """
+    Запускает набор `JobSpec` по расписанию.
+
+    Аргументы:
+        bot: экземпляр Telegram‑бота, передаётся в функции задач.
+        jobs: список задач.
+
+    Примечания:
+        🔥 ВАЖНО: каждая задача работает в своей `asyncio`‑задаче; ошибка
+        одной задачи логируется, записывается в `scheduled_job_runs` и не
+        мешает остальным.
+    """
+
+    def __init__(self, bot, jobs: Sequence[JobSpec]):
+        self.bot = bot
+        self.jobs: List[JobSpec] = list(jobs)
+        self.stats: Dict[str, TimingStats] = {spec.name: TimingStats() for spec in self.jobs}
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Запускает циклы всех задач."""
+        for spec in self.jobs:
+            self._tasks.append(asyncio.create_task(self._job_loop(spec), name=f"job:{spec.name}"))
+        logger.info(f"Планировщик задач запущен: {', '.join(spec.name for spec in self.jobs)}")
+
+    async def stop(self) -> None:
+        """Останавливает циклы задач и дожидается их завершения."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def run(self) -> None:
+        """Запускает циклы задач и ждёт до отмены (для `services.leader.LeaderElector`)."""
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    async def _job_loop(self, spec: JobSpec) -> None:
+        tz = get_timezone()
+
+        # Догоняем слот, пропущенный во время простоя.
+        try:
+            now = datetime.now(tz)
+            slot = latest_slot(spec, now)
+            if now - slot <= spec.catch_up:
+                await self.run_slot(spec, slot, catch_up=True)
+        except Exception as e:
+            logger.error(f"Ошибка догоняющего запуска задачи {spec.name}: {e}", exc_info=True)
+
+        while True:
+            slot = next_slot(spec, datetime.now(tz))
+            logger.info(f"Задача {spec.name} запланирована на {slot:%d.%m.%Y %H:%M %Z}")
+            while (remaining := (slot - datetime.now(tz)).total_seconds()) > 0:
+                await asyncio.sleep(min(remaining, _MAX_SLEEP_SECONDS))
+            try:
+                await self.run_slot(spec, slot)
+            except Exception as e:
+                logger.error(f"Ошибка запуска задачи {spec.name}: {e}", exc_info=True)
+
+    async def run_slot(self, spec: JobSpec, slot: datetime, catch_up: bool = False) -> bool:
+        """
+        Выполняет слот задачи, если его ещё никто не выполнил.
+
+        Аргументы:
+            spec: задача.
+            slot: плановое время запуска.
+            catch_up: True для догоняющего запуска после простоя — тогда
+                слот выполняется, только если задача уже запускалась раньше
+                (при первом развёртывании старые слоты не догоняются).
+
+        Возвращает:
+            True, если задача выполнялась в этом вызове.
+
+        Примечания:
+            🔥 ВАЖНО: слот занимается одним коротким запросом
+            (`claim_job_slot`), задача выполняется без соединения из пула и
+            без открытой транзакции, результат записывается отдельным
+            запросом. Второй экземпляр бота увидит, что слот уже занят.
+        """
+        started_at = datetime.now(slot.tzinfo)
+        if not await claim_job_slot(spec.name, slot, started_at, catch_up=catch_up):
+            return False
+
+        if catch_up:
+            logger.info(f"Догоняем пропущенный запуск {spec.name} за {slot:%d.%m %H:%M}")
+
+        started = monotonic()
+        error: Optional[str] = None
+        try:
+            await spec.func(self.bot)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:500]
+            logger.error(f"Задача {spec.name} завершилась ошибкой: {e}", exc_info=True)
+        duration = monotonic() - started
+
+        await record_job_run(spec.name, slot, duration, error)
+
+        stats = self.stats[spec.name]
+        stats.add(duration, error=error is not None)
+        logger.info(f"Задача {spec.name} выполнена за {duration:.2f} сек. ({stats.summary()})")
+        return True
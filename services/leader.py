@@ -0,0 +1,191 @@
+"""Выбор ведущего экземпляра бота для фоновых задач.
+
+Задачи модуля:
+- при запуске нескольких экземпляров `main.py` выбирать один ведущий
+  (leader), который выполняет фоновые задачи: синхронизацию календаря,
+  таймеры напоминаний, ежедневные сводки, продление push‑каналов;
+- при падении ведущего за несколько секунд передавать роль другому
+  экземпляру;
+- при потере связи с БД останавливать фоновые задачи на этом экземпляре,
+  чтобы два экземпляра не работали ведущими одновременно.
+
+Схема работы:
+    1. Экземпляр открывает отдельное соединение (вне пула) и пытается
+       взять сессионную advisory‑блокировку `pg_try_advisory_lock`.
+    2. Получил — запускает фоновые задачи и раз в
+       `LEADER_HEARTBEAT_SECONDS` проверяет соединение (`SELECT 1`).
+       Проверка не прошла — задачи отменяются, соединение закрывается.
+       Задача, завершившаяся сама (ошибка или выход из цикла), там же
+       перезапускается.
+    3. Не получил — повторяет попытку с тем же периодом.
+    4. Блокировка освобождается вместе с соединением: при остановке или
+       падении процесса сразу, при обрыве сети — по TCP keepalive сервера
+       (несколько периодов heartbeat).
+
+Примечания:
+    ⚠️ ВНИМАНИЕ: обработка апдейтов Telegram и доставка уведомлений из
+    очереди (`services.outbox`, `FOR UPDATE SKIP LOCKED`) работают на всех
+    экземплярах — через выбор ведущего проходят только фоновые циклы.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+import asyncpg
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory‑блокировки ведущего: пара int4 из hashtext(имя бота, роль).
+_LOCK_SQL = "SELECT pg_try_advisory_lock(hashtext('otskvm_bot'), hashtext('leader'))"
+
+
+class LeaderElector:
+    """
+    Выбор ведущего экземпляра на основе advisory‑блокировки PostgreSQL.
+
+    Аргументы:
+        jobs: фоновые задачи ведущего — имя и функция, создающая корутину.
+            Корутины запускаются при получении роли и отменяются при её
+            потере; при повторном получении роли создаются заново.
+            Завершившаяся сама задача перезапускается на ближайшей проверке
+            соединения — не чаще раза в `heartbeat` секунд.
+        heartbeat: период проверки соединения и повторных попыток, сек.
+
+    Использование:
+        elector = LeaderElector({"sync": sync_loop, "reminders": reminder_scheduler_loop})
+        elector.start()
+        ...
+        await elector.stop()
+    """
+
+    def __init__(
+        self,
+        jobs: Dict[str, Callable[[], Awaitable[None]]],
+        heartbeat: Optional[float] = None,
+    ):
+        self.jobs = dict(jobs)
+        self.heartbeat = heartbeat or config.LEADER_HEARTBEAT_SECONDS
+        self._conn: Optional[asyncpg.Connection] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._runner: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        """True, пока этот экземпляр удерживает роль ведущего."""
+        return bool(self._tasks)
+
+    async def _connect(self) -> asyncpg.Connection:
+        # Keepalive на стороне сервера: если процесс ведущего пропал без
+        # закрытия соединения, PostgreSQL разорвёт его (и снимет блокировку)
+        # примерно через heartbeat * 4 секунд.
+        interval = str(max(1, int(self.heartbeat)))
+        return await asyncpg.connect(
+            dsn=config.DATABASE_URL,
+            timeout=self.heartbeat * 2,
+            server_settings={
+                "application_name": "otskvm_bot_leader",
+                "tcp_keepalives_idle": interval,
+                "tcp_keepalives_interval": interval,
+                "tcp_keepalives_count": "3",
+            },
+        )
+
+    async def _try_acquire(self) -> bool:
+        if self._conn is None or self._conn.is_closed():
+            self._conn = await self._connect()
+        return await self._conn.fetchval(_LOCK_SQL, timeout=self.heartbeat)
+
+    async def _is_alive(self) -> bool:
+        try:
+            await self._conn.fetchval("SELECT 1", timeout=self.heartbeat)
+            return True
+        except (asyncio.TimeoutError, OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            logger.warning(f"Потеряно соединение ведущего экземпляра: {e}")
+            return False
+
+    def _start_job(self, name: str) -> None:
+        self._tasks[name] = asyncio.create_task(self.jobs[name](), name=f"leader:{name}")
+
+    def _start_jobs(self) -> None:
+        for name in self.jobs:
+            self._start_job(name)
+        logger.info(f"Экземпляр стал ведущим, запущены фоновые задачи: {', '.join(self.jobs)}")
+
+    def _restart_finished_jobs(self) -> None:
+        """
+        Перезапускает фоновые задачи, завершившиеся без отмены ведущим.
+
+        Примечания:
+            ⚠️ ВНИМАНИЕ: все задачи ведущего — бесконечные циклы. Выход из
+            цикла означает необработанную ошибку, и без перезапуска
+            синхронизация или напоминания молча остановились бы до смены
+            ведущего.
+        """
+        for name, task in list(self._tasks.items()):
+            if not task.done():
+                continue
+            if task.cancelled():
+                logger.warning(f"Фоновая задача {name} отменена, перезапуск")
+            elif task.exception() is not None:
+                logger.error(f"Фоновая задача {name} упала, перезапуск", exc_info=task.exception())
+            else:
+                logger.warning(f"Фоновая задача {name} завершилась, перезапуск")
+            self._start_job(name)
+
+    async def _stop_jobs(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _release(self) -> None:
+        await self._stop_jobs()
+        if self._conn is not None:
+            # terminate, а не close: соединение могло зависнуть, а
+            # блокировка снимается сервером при разрыве сессии.
+            self._conn.terminate()
+            self._conn = None
+
+    def start(self) -> None:
+        """Запускает цикл выбора ведущего в фоне."""
+        self._runner = asyncio.create_task(self.run(), name="leader_election")
+
+    async def run(self) -> None:
+        """
+        Бесконечный цикл выбора ведущего.
+
+        Примечания:
+            🔥 ВАЖНО: ошибки подключения только логируются — экземпляр
+            остаётся ведомым и повторяет попытку через `heartbeat` секунд.
+        """
+        try:
+            while True:
+                try:
+                    if not self.is_leader:
+                        if await self._try_acquire():
+                            self._start_jobs()
+                    elif not await self._is_alive():
+                        logger.warning("Экземпляр перестал быть ведущим, фоновые задачи остановлены")
+                        await self._release()
+                    else:
+                        self._restart_finished_jobs()
+                except Exception as e:
+                    logger.error(f"Ошибка выбора ведущего экземпляра: {e}", exc_info=True)
+                    await self._release()
+                await asyncio.sleep(self.heartbeat)
+        finally:
+            await self._release()
+
+    async def stop(self) -> None:
+        """Останавливает фоновые задачи и отдаёт роль ведущего другому экземпляру."""
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+        await self._release()
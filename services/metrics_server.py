@@ -0,0 +1,100 @@
+"""Вывод метрик бота: периодический лог и эндпоинт Prometheus.
+
+Задачи модуля:
+- раз в `METRICS_LOG_MINUTES` писать в лог одну строку JSON со
+  статистикой обработчиков Telegram (`handlers.instrumentation`);
+- по желанию отдавать метрики обработчиков и пула БД в текстовом формате
+  Prometheus на `http://METRICS_HOST:METRICS_PORT/metrics`.
+
+Включение:
+    Эндпоинт работает только если задан `METRICS_PORT` (0 — выключен).
+    По умолчанию сервер слушает 127.0.0.1 — метрики не предназначены для
+    публикации наружу.
+
+Проверка локально:
+    curl http://127.0.0.1:<METRICS_PORT>/metrics
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from config import config
+from database import get_db_pool
+from handlers.instrumentation import HandlerMetrics, handler_metrics
+from utils.http_server import HttpRequest, HttpResponse, SimpleHttpServer
+from utils.metrics import PrometheusText
+
+logger = logging.getLogger(__name__)
+
+METRICS_PATH = "/metrics"
+
+
+def render_prometheus(metrics: HandlerMetrics = handler_metrics) -> bytes:
+    """Собирает метрики обработчиков и пула БД в текстовом формате Prometheus."""
+    text = PrometheusText()
+    handlers = sorted(metrics.handlers.items())
+    text.histogram(
+        "otskvm_handler_duration_seconds",
+        "Duration of Telegram update handlers",
+        [({"handler": name}, stats.latency) for name, stats in handlers],
+    )
+    text.counter(
+        "otskvm_handler_errors_total",
+        "Telegram update handlers that raised an exception",
+        [({"handler": name}, stats.latency.errors) for name, stats in handlers],
+    )
+    text.gauge(
+        "otskvm_handler_in_flight",
+        "Telegram update handlers currently running",
+        [({"handler": name}, stats.in_flight) for name, stats in handlers] + [({}, metrics.in_flight)],
+    )
+    text.gauge("otskvm_handler_in_flight_max", "Peak concurrently running handlers", [({}, metrics.max_in_flight)])
+
+    pool = get_db_pool()
+    text.gauge("otskvm_db_pool_size", "Open connections in the DB pool", [({}, pool.get_size())])
+    text.gauge("otskvm_db_connections_in_use", "DB connections currently acquired", [({}, pool.in_use)])
+    text.histogram("otskvm_db_acquire_wait_seconds", "Time waiting for a free DB connection", [({}, pool.acquire_wait)])
+    text.counter("otskvm_db_slow_queries_total", "Queries slower than DB_SLOW_QUERY_MS", [({}, pool.slow_queries)])
+    return text.render()
+
+
+async def handle_metrics(request: HttpRequest) -> HttpResponse:
+    """GET /metrics."""
+    return HttpResponse(body=render_prometheus(), content_type=PrometheusText.CONTENT_TYPE)
+
+
+async def start_metrics_server() -> Optional[SimpleHttpServer]:
+    """
+    Запускает HTTP‑эндпоинт метрик, если задан `METRICS_PORT`.
+
+    Возвращает:
+        Запущенный сервер (для остановки при завершении бота) или None.
+    """
+    if not config.METRICS_PORT:
+        return None
+    server = SimpleHttpServer(config.METRICS_HOST, config.METRICS_PORT)
+    server.add_route("GET", METRICS_PATH, handle_metrics)
+    await server.start()
+    return server
+
+
+async def handler_metrics_log_loop(metrics: HandlerMetrics = handler_metrics) -> None:
+    """
+    Периодически пишет статистику обработчиков в лог одной строкой JSON.
+
+    Примечания:
+        Значения накопительные с момента запуска бота. Если обработчики не
+        вызывались с прошлой записи, строка не пишется.
+    """
+    last_total = 0
+    while True:
+        await asyncio.sleep(config.METRICS_LOG_MINUTES * 60)
+        total = sum(stats.latency.count for stats in metrics.handlers.values())
+        if total == last_total:
+            continue
+        last_total = total
+        logger.info("handler_metrics %s", json.dumps(metrics.summary(), ensure_ascii=False))
@@ -0,0 +1,179 @@
+"""Доставка уведомлений из очереди notification_outbox.
+
+Задачи модуля:
+- периодически забирать из очереди пачку готовых уведомлений;
+- отправлять их параллельно через `services.dispatcher` (с лимитами Telegram);
+- записывать итог: доставлено, повторить позже или окончательная ошибка.
+
+Схема работы:
+    1. Обработчик меняет состояние и в той же транзакции вызывает
+       `repositories.outbox.enqueue_notification` / `enqueue_broadcast`.
+    2. `outbox_loop` раз в `OUTBOX_POLL_SECONDS` вызывает `deliver_pending`.
+    3. Строки захватываются через `FOR UPDATE SKIP LOCKED` с арендой,
+       поэтому очередь могут разбирать несколько экземпляров бота.
+
+Примечания:
+    ⚠️ ВНИМАНИЕ: гарантия — «как минимум один раз». Повтор возможен только
+    при падении процесса между отправкой сообщения и записью его итога:
+    итог каждой строки записывается сразу после её отправки, а аренда
+    рассчитана на отправку всей пачки в самый медленный чат.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Tuple
+
+from telegram import InlineKeyboardMarkup
+from telegram.error import BadRequest, ChatMigrated, Forbidden
+
+from config import config
+from core.constants import OUTBOX_STATUS_FAILED, OUTBOX_STATUS_PENDING, OUTBOX_STATUS_SENT
+from repositories.outbox import claim_batch, complete_batch, purge_sent
+from services.dispatcher import GROUP_CHAT_RATE, get_dispatcher
+
+logger = logging.getLogger(__name__)
+
+# Запас аренды сверх времени отправки пачки: паузы RetryAfter и сетевые
+# повторы внутри диспетчера, очередь других рассылок к тем же лимитам.
+_LEASE_MARGIN_SECONDS = 120
+# Пауза перед повтором: 30 с, 1 мин, 2 мин ... не более 30 мин.
+_RETRY_BASE_SECONDS = 30
+_RETRY_MAX_SECONDS = 30 * 60
+# Ошибки, при которых повтор бессмысленен (бот заблокирован, чат не существует).
+_PERMANENT_ERRORS = (Forbidden, BadRequest, ChatMigrated)
+# Доставленные строки хранятся неделю, очистка — раз в час.
+_KEEP_SENT_DAYS = 7
+_PURGE_INTERVAL = 60 * 60
+
+
+def _message_kwargs(row: Dict[str, Any], bot) -> Dict[str, Any]:
+    """Восстанавливает параметры `send_message` из строки очереди."""
+    kwargs: Dict[str, Any] = {"chat_id": row["chat_id"], "text": row["text"]}
+    if row["parse_mode"]:
+        kwargs["parse_mode"] = row["parse_mode"]
+    if row["reply_markup"]:
+        kwargs["reply_markup"] = InlineKeyboardMarkup.de_json(json.loads(row["reply_markup"]), bot)
+    return kwargs
+
+
+def _lease_seconds(batch_size: int) -> int:
+    """
+    Срок аренды пачки: отправка всех строк в один чат с самым низким лимитом плюс запас.
+
+    Примечания:
+        🔥 ВАЖНО: пачка из 50 сообщений в одну группу (20 сообщений в
+        минуту) отправляется около 150 секунд. Если аренда кончится раньше,
+        другой экземпляр бота захватит ещё не отправленные строки, и
+        сообщения уйдут дважды.
+    """
+    slowest_rate = min(GROUP_CHAT_RATE, config.TELEGRAM_CHAT_RATE, config.TELEGRAM_GLOBAL_RATE)
+    return int(_LEASE_MARGIN_SECONDS + batch_size / slowest_rate)
+
+
+def _outcome(row: Dict[str, Any], result: Any) -> Tuple[str, Any, Any, float]:
+    """
+    Определяет итог доставки строки.
+
+    Возвращает:
+        Кортеж (статус, текст ошибки, message_id, пауза до повтора).
+    """
+    if not isinstance(result, Exception):
+        return OUTBOX_STATUS_SENT, None, result.message_id, 0.0
+
+    error = f"{type(result).__name__}: {result}"[:500]
+    if isinstance(result, _PERMANENT_ERRORS) or row["attempts"] >= config.OUTBOX_MAX_ATTEMPTS:
+        logger.error(f"Уведомление {row['id']} для {row['chat_id']} не доставлено: {error}")
+        return OUTBOX_STATUS_FAILED, error, None, 0.0
+
+    delay = min(_RETRY_BASE_SECONDS * 2 ** (row["attempts"] - 1), _RETRY_MAX_SECONDS)
+    logger.warning(
+        f"Уведомление {row['id']} для {row['chat_id']} не доставлено ({error}), "
+        f"повтор через {delay} сек."
+    )
+    return OUTBOX_STATUS_PENDING, error, None, float(delay)
+
+
+async def _deliver_row(dispatcher, row: Dict[str, Any], bot) -> str:
+    """Отправляет одну строку очереди и сразу записывает её итог; возвращает новый статус."""
+    try:
+        kwargs = _message_kwargs(row, bot)
+    except Exception as e:
+        # Повреждённая строка (например, неразборчивый reply_markup):
+        # повтор ничего не изменит.
+        error = f"{type(e).__name__}: {e}"[:500]
+        logger.error(f"Уведомление {row['id']} не может быть отправлено: {error}")
+        status, message_id, delay = OUTBOX_STATUS_FAILED, None, 0.0
+    else:
+        try:
+            result: Any = await dispatcher.send_message(**kwargs)
+        except Exception as e:
+            result = e
+        status, error, message_id, delay = _outcome(row, result)
+    await complete_batch([row["id"]], [status], [error], [message_id], [delay])
+    return status
+
+
+async def deliver_pending(bot, batch_size: int) -> int:
+    """
+    Отправляет одну пачку уведомлений из очереди.
+
+    Аргументы:
+        bot: экземпляр Telegram‑бота.
+        batch_size: максимальный размер пачки.
+
+    Возвращает:
+        Количество обработанных строк (доставленных и нет).
+
+    Примечания:
+        Строки отправляются параллельно (лимиты соблюдает диспетчер), итог
+        каждой записывается сразу после её отправки — строка не ждёт
+        остальную пачку и не остаётся в аренде дольше нужного. Ошибка
+        записи итога одной строки не мешает остальным: такая строка будет
+        повторена после окончания аренды.
+    """
+    rows = await claim_batch(batch_size, _lease_seconds(batch_size))
+    if not rows:
+        return 0
+
+    dispatcher = get_dispatcher(bot)
+    results = await asyncio.gather(
+        *(_deliver_row(dispatcher, row, bot) for row in rows),
+        return_exceptions=True,
+    )
+    for row, result in zip(rows, results):
+        if isinstance(result, Exception):
+            logger.error(f"Не удалось записать итог уведомления {row['id']}: {result}", exc_info=result)
+
+    sent = sum(1 for result in results if result == OUTBOX_STATUS_SENT)
+    logger.debug(f"Outbox: доставлено {sent} из {len(rows)}")
+    return len(rows)
+
+
+async def outbox_loop(bot) -> None:
+    """
+    Бесконечный цикл разбора очереди уведомлений.
+
+    Примечания:
+        🔥 ВАЖНО: если пачка заполнена целиком, следующая забирается сразу,
+        без паузы — так очередь быстро разгружается после всплеска.
+    """
+    batch_size = config.OUTBOX_BATCH_SIZE
+    last_purge = time.monotonic()
+    while True:
+        processed = 0
+        try:
+            processed = await deliver_pending(bot, batch_size)
+            if time.monotonic() - last_purge >= _PURGE_INTERVAL:
+                last_purge = time.monotonic()
+                purged = await purge_sent(_KEEP_SENT_DAYS)
+                if purged:
+                    logger.info(f"Outbox: удалено {purged} доставленных уведомлений")
+        except Exception as e:
+            logger.error(f"Ошибка в цикле доставки уведомлений: {e}", exc_info=True)
+
+        if processed < batch_size:
+            await asyncio.sleep(config.OUTBOX_POLL_SECONDS)
@@ -1,22 +1,24 @@
 """Модуль напоминаний и отчётов по мероприятиям.
 
 Задачи модуля:
-- находить предстоящие и недавно завершившиеся мероприятия для точечных напоминаний инженерам;
-- контролировать, что напоминания не дублируются и не отправляются по уже завершённым событиям;
+- находить пары (мероприятие, инженер), которым пора отправить напоминание;
+- ставить напоминания в очередь без дублей и без отправки по уже завершённым событиям;
 - автоматически завершать «забытые» мероприятия по истечении времени;
 - формировать утренние сводки и дневные отчёты для руководителей.
 
 Используемые компоненты:
 - `database.get_db_pool` — доступ к PostgreSQL;
 - `core.constants` — единые статусы назначений и типы уведомлений;
+- `repositories.outbox` — очередь уведомлений, доставляемых `services.outbox`;
+- `services.dispatcher` — отправка рассылок с учётом лимитов Telegram;
 - утилиты `utils.auditory_names` и `utils.translit` для человекочитаемых названий.
 """
 
 import logging
-import re
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
+from config import config
 from core.constants import (
     ASSIGNMENT_STATUS_ACCEPTED,
     ASSIGNMENT_STATUS_ASSIGNED,
@@ -26,403 +28,305 @@ from core.constants import (
     NOTIFICATION_REMINDER,
 )
 from database import get_db_pool
+from repositories.events import (
+    day_range,
+    get_assignment_stats_between,
+    get_events_with_assignments_between,
+    get_unassigned_events_between,
+)
+from repositories.outbox import enqueue_broadcast, enqueue_reminder
+from services.dispatcher import get_dispatcher
+from services.job_runner import get_timezone
 from utils.auditory_names import get_russian_name
 from utils.translit import to_cyrillic
 
 logger = logging.getLogger(__name__)
 
+# Когда отправлять напоминания и авто‑завершать мероприятия
+# (см. services/reminder_scheduler.py).
+REMINDER_LEAD = timedelta(minutes=30)
+COMPLETION_REMINDER_DELAY = timedelta(minutes=15)
+AUTO_COMPLETE_DELAY = timedelta(hours=1)
+# Сколько назначений перечислять в сводке об авто‑завершении.
+_DIGEST_MAX_ITEMS = 30
+
 
-async def find_upcoming_events(minutes_before: int = 35) -> List[Dict[str, Any]]:
+async def find_scheduled_reminders(
+    until: datetime,
+    event_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
     """
-    Находит события, которые начнутся через указанное количество минут.
-    Отправляем напоминания только тем, у кого статус 'assigned' (ещё не подтвердили)
-    И только если мероприятие ещё не завершено никем из инженеров.
-    
-    Args:
-        minutes_before: за сколько минут до начала ищем события (по умолчанию 35)
-        
+    Находит напоминания, срок которых наступает не позже `until`.
+
+    Для каждой пары (мероприятие, инженер) вычисляется точный момент
+    отправки `due_at`:
+    - `reminder` — за `REMINDER_LEAD` до начала, если назначение `assigned`
+      и мероприятие ещё не началось;
+    - `completion_reminder` — через `COMPLETION_REMINDER_DELAY` после
+      окончания, если назначение `accepted` и авто‑завершение ещё не прошло.
+
     Аргументы:
-        minutes_before: за сколько минут до начала искать события
-            (по умолчанию 35 минут; фактическое окно — от `minutes_before-10`
-            до `minutes_before`, чтобы покрыть погрешности в запуске cron‑задач).
+        until: граница горизонта планирования.
+        event_id: если задан — только по этому мероприятию (точечная
+            перезагрузка таймеров после изменения назначений).
 
     Возвращает:
-        Список словарей с данными событий, для которых нужно отправить напоминания.
+        Список словарей с полями события и инженера, `notification_type`
+        и `due_at`. Просроченные `due_at` (например, после перезапуска бота)
+        не отбрасываются — такие напоминания отправляются сразу.
 
     Примечания:
-        🔥 ВАЖНО: напоминания отправляются только:
-        - по подтверждённым мероприятиям (`calendar_events.status = 'confirmed'`);
-        - по назначениям со статусом `assigned` (инженер ещё не подтвердил);
-        - если ни один инженер ещё не завершил мероприятие (`NOT EXISTS ... status = 'done'`).
+        🔥 ВАЖНО: в SQL сразу отсекаются мероприятия, завершённые кем‑то из
+        инженеров, и напоминания, уже отправленные за последние 2 часа.
+        При срабатывании таймера `enqueue_due_reminder` повторяет эти
+        проверки в том же запросе, который ставит напоминание в очередь.
     """
     pool = get_db_pool()
-    
-    # 🔥 ВАЖНО: используем «скользящее» окно (now + [minutes_before‑10; minutes_before]),
-    # чтобы учесть сдвиги расписания запуска фоновой задачи и не пропустить события.
+
     now = datetime.now()
-    time_from = now + timedelta(minutes=minutes_before - 10)
-    time_to = now + timedelta(minutes=minutes_before)
-    
-    logger.info(f"Ищем события для напоминаний с {time_from} по {time_to}")
-    
-    # 🔥 ВАЖНО (SQL): основной запрос использует:
-    # - LEFT JOIN с `event_assignments`, чтобы видеть только ещё не подтвердивших инженеров;
-    # - двойную проверку на отсутствие статуса `done` (поле is_completed_by_anyone и NOT EXISTS),
-    #   что защищает от гонок при одновременном завершении и рассылке напоминаний.
+    # Напоминание имеет смысл только до начала мероприятия.
+    reminder_from = now
+    reminder_to = until + REMINDER_LEAD
+    # Напоминание о завершении — пока мероприятие не завершено автоматически.
+    completion_from = now - AUTO_COMPLETE_DELAY
+    completion_to = until - COMPLETION_REMINDER_DELAY
+
     rows = await pool.fetch(
         """
-        SELECT 
-            ce.id as event_id,
+        WITH due AS (
+            SELECT $5::varchar AS notification_type, ce.id AS event_id, ea.assigned_to
+            FROM calendar_events ce
+            JOIN event_assignments ea ON ea.event_id = ce.id AND ea.status = $7
+            WHERE ce.start_time > $1 AND ce.start_time <= $2
+              AND ce.status = 'confirmed'
+              AND ($10::int IS NULL OR ce.id = $10)
+            UNION ALL
+            SELECT $6::varchar, ce.id, ea.assigned_to
+            FROM calendar_events ce
+            JOIN event_assignments ea ON ea.event_id = ce.id AND ea.status = $8
+            WHERE ce.end_time > $3 AND ce.end_time <= $4
+              AND ce.status = 'confirmed'
+              AND ($10::int IS NULL OR ce.id = $10)
+        )
+        SELECT
+            d.notification_type,
+            ce.id AS event_id,
             ce.title,
             ce.start_time,
             ce.end_time,
-            a.name as auditory_name,
+            a.name AS auditory_name,
             a.building,
-            ea.assigned_to,
-            u.full_name as engineer_name,
-            u.telegram_id,
-            ea.status as current_status,
-            -- Проверяем, завершено ли мероприятие кем-то из инженеров
-            EXISTS (
-                SELECT 1 
-                FROM event_assignments ea2 
-                WHERE ea2.event_id = ce.id 
-                  AND ea2.status = 'done'
-            ) as is_completed_by_anyone
-        FROM calendar_events ce
-        LEFT JOIN auditories a ON ce.auditory_id = a.id
-        LEFT JOIN event_assignments ea ON ce.id = ea.event_id 
-            AND ea.status = 'assigned'  -- Только те, кто ещё не подтвердил
-        LEFT JOIN users u ON ea.assigned_to = u.telegram_id
-        WHERE ce.start_time BETWEEN $1 AND $2
-          AND ce.status = 'confirmed'
-          -- Исключаем мероприятия, которые уже кто-то завершил
+            d.assigned_to,
+            u.full_name AS engineer_name,
+            u.telegram_id
+        FROM due d
+        JOIN calendar_events ce ON ce.id = d.event_id
+        JOIN users u ON u.telegram_id = d.assigned_to
+        LEFT JOIN auditories a ON a.id = ce.auditory_id
+        WHERE NOT EXISTS (
+                SELECT 1
+                FROM event_assignments done
+                WHERE done.event_id = d.event_id
+                  AND done.status = $9
+            )
           AND NOT EXISTS (
-              SELECT 1 
-              FROM event_assignments ea2 
-              WHERE ea2.event_id = ce.id 
-                AND ea2.status = 'done'
-          )
+                SELECT 1
+                FROM notifications n
+                WHERE n.event_id = d.event_id
+                  AND n.user_id = d.assigned_to
+                  AND n.type = d.notification_type
+                  AND n.sent_at > NOW() - INTERVAL '2 hours'
+            )
         ORDER BY ce.start_time
         """,
-        time_from,
-        time_to
+        reminder_from,
+        reminder_to,
+        completion_from,
+        completion_to,
+        NOTIFICATION_REMINDER,
+        NOTIFICATION_COMPLETION_REMINDER,
+        ASSIGNMENT_STATUS_ASSIGNED,
+        ASSIGNMENT_STATUS_ACCEPTED,
+        ASSIGNMENT_STATUS_DONE,
+        event_id,
     )
-    
-    # Фильтруем результаты, оставляя только те, где есть назначенный инженер
-    valid_rows = [row for row in rows if row['assigned_to'] is not None]
-    
-    logger.info(f"Найдено событий для напоминаний: {len(valid_rows)} из {len(rows)}")
-    return [dict(row) for row in valid_rows]
 
+    reminders = []
+    for row in rows:
+        reminder = dict(row)
+        if reminder['notification_type'] == NOTIFICATION_REMINDER:
+            reminder['due_at'] = reminder['start_time'] - REMINDER_LEAD
+        else:
+            reminder['due_at'] = reminder['end_time'] + COMPLETION_REMINDER_DELAY
+        reminders.append(reminder)
+    return reminders
 
-async def find_completed_events() -> List[Dict[str, Any]]:
-    """
-    Находит мероприятия, которые закончились 15-30 минут назад,
-    ещё не отмечены как выполненные, и не завершены никем из инженеров.
-    Отправляем напоминания только тем, у кого статус 'accepted' (подтвердили, но не завершили).
-    
-    Возвращает:
-        Список словарей с мероприятиями, по которым нужно напомнить отметить выполнение.
 
-    Примечания:
-        🔥 ВАЖНО: выбирается окно в 15–30 минут после окончания мероприятия —
-        так инженеру даётся «подышать» после события, но напоминание всё ещё
-        приходит достаточно оперативно.
+async def find_auto_complete_times(until: datetime, event_id: Optional[int] = None) -> List[datetime]:
     """
-    pool = get_db_pool()
-    
-    now = datetime.now()
-    time_from = now - timedelta(minutes=30)
-    time_to = now - timedelta(minutes=15)
-    
-    logger.info(f"Ищем завершённые мероприятия для напоминаний с {time_from} по {time_to}")
-    
-    # 🔥 ВАЖНО (SQL): в выборку попадают только:
-    # - мероприятия со статусом `confirmed`;
-    # - назначения со статусом `accepted` (инженер подтвердил, но ещё не завершил);
-    # - случаи, когда никто из инженеров не отметил выполнение (NOT EXISTS ... status = 'done').
-    rows = await pool.fetch(
-        """
-        SELECT 
-            ce.id as event_id,
-            ce.title,
-            ce.start_time,
-            ce.end_time,
-            a.name as auditory_name,
-            a.building,
-            ea.assigned_to,
-            u.full_name as engineer_name,
-            u.telegram_id,
-            ea.status as current_status
-        FROM calendar_events ce
-        LEFT JOIN auditories a ON ce.auditory_id = a.id
-        JOIN event_assignments ea ON ce.id = ea.event_id 
-            AND ea.status = 'accepted'  -- Только те, кто подтвердил
-        JOIN users u ON ea.assigned_to = u.telegram_id
-        WHERE ce.end_time BETWEEN $1 AND $2
-          AND ce.status = 'confirmed'
-          -- Исключаем мероприятия, которые уже кто-то завершил
-          AND NOT EXISTS (
-              SELECT 1 
-              FROM event_assignments ea2 
-              WHERE ea2.event_id = ce.id 
-                AND ea2.status = 'done'
-          )
-        ORDER BY ce.end_time
-        """,
-        time_from,
-        time_to
-    )
-    
-    logger.info(f"Найдено завершённых мероприятий для напоминаний: {len(rows)}")
-    return [dict(row) for row in rows]
-
+    Возвращает моменты, когда пора автоматически завершать мероприятия.
 
-async def is_event_completed(event_id: int) -> bool:
-    """
-    Проверяет, завершено ли мероприятие кем-либо из инженеров.
-    
     Аргументы:
-        event_id: ID мероприятия.
+        until: граница горизонта планирования.
+        event_id: если задан — только по этому мероприятию.
 
     Возвращает:
-        True, если хотя бы одно назначение по этому мероприятию имеет статус `done`.
+        Отсортированные моменты `end_time + AUTO_COMPLETE_DELAY` мероприятий
+        с активными назначениями. Прошедшие моменты (в пределах
+        `AUTO_COMPLETE_LOOKBACK_DAYS`) тоже возвращаются —
+        `auto_complete_events` для них выполняется сразу.
     """
     pool = get_db_pool()
-    # 🔥 ВАЖНО (SQL): используем EXISTS, чтобы не загружать лишние строки —
-    # база останавливается на первом найденном завершённом назначении.
-    result = await pool.fetchval(
+    rows = await pool.fetch(
         """
-        SELECT EXISTS (
-            SELECT 1 FROM event_assignments 
-            WHERE event_id = $1 AND status = $2
-        )
+        SELECT DISTINCT ce.end_time
+        FROM calendar_events ce
+        WHERE ce.end_time <= $1
+          AND ce.end_time > NOW() - $4::interval
+          AND ($5::int IS NULL OR ce.id = $5)
+          AND EXISTS (
+                SELECT 1
+                FROM event_assignments ea
+                WHERE ea.event_id = ce.id
+                  AND ea.status IN ($2, $3)
+            )
+        ORDER BY ce.end_time
         """,
+        until - AUTO_COMPLETE_DELAY,
+        ASSIGNMENT_STATUS_ACCEPTED,
+        ASSIGNMENT_STATUS_ASSIGNED,
+        timedelta(days=config.AUTO_COMPLETE_LOOKBACK_DAYS),
         event_id,
-        ASSIGNMENT_STATUS_DONE,
     )
-    return result
+    return [row['end_time'] + AUTO_COMPLETE_DELAY for row in rows]
 
 
-async def can_send_notification(event_id: int, user_id: int, notification_type: str) -> bool:
-    """
-    Проверяет, можно ли отправить уведомление пользователю по данному событию.
-    
-    Аргументы:
-        event_id: ID мероприятия.
-        user_id: ID пользователя (инженера).
-        notification_type: тип уведомления (см. `core.constants.NOTIFICATION_*`).
+def _format_auditory(event: Dict[str, Any]) -> str:
+    """Возвращает русское название аудитории с корпусом для текста уведомления."""
+    auditory = get_russian_name(event['auditory_name']) if event['auditory_name'] else "не указана"
+    if event.get('building'):
+        building = get_russian_name(event['building'])
+        auditory += f" ({building})"
+    return auditory
 
-    Возвращает:
-        True, если уведомление этого типа можно отправить сейчас.
 
-    Примечания:
-        🔥 ВАЖНО: функция защищает от:
-        - отправки уведомлений по уже завершённым мероприятиям;
-        - «спама» одинаковыми уведомлениями чаще одного раза в 2 часа.
+def _build_reminder_message(event: Dict[str, Any]):
     """
-    pool = get_db_pool()
-    
-    # 🔍 ПРОВЕРКА 1: мероприятие уже завершено?
-    if await is_event_completed(event_id):
-        logger.info(f"Мероприятие {event_id} уже завершено, уведомление не требуется")
-        return False
-    
-    # 🔍 ПРОВЕРКА 2: не было ли уже уведомления такого типа за последние 2 часа.
-    recent = await pool.fetchval(
-        """
-        SELECT COUNT(*) FROM notifications 
-        WHERE event_id = $1 AND user_id = $2 
-          AND type = $3 
-          AND sent_at > NOW() - INTERVAL '2 hours'
-        """,
-        event_id,
-        user_id,
-        notification_type
-    )
-    
-    if recent > 0:
-        logger.info(f"Уведомление типа {notification_type} для мероприятия {event_id} уже отправлялось менее 2 часов назад")
-        return False
-    
-    return True
+    Формирует текст и клавиатуру напоминания о предстоящем мероприятии.
 
-
-async def send_reminder(event: Dict[str, Any], bot):
-    """
-    Отправляет напоминание ответственному инженеру.
-    Отправляет только если статус назначения 'assigned' (не подтверждён)
-    и мероприятие ещё не завершено.
-    
-    Аргументы:
-        event: словарь с данными о событии (результат `find_upcoming_events`).
-        bot: экземпляр Telegram‑бота для отправки сообщений.
+    Возвращает:
+        Кортеж (текст в Markdown, `InlineKeyboardMarkup`).
     """
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-    
+
     event_id = event['event_id']
-    title = event['title']
     start_time = event['start_time']
-    engineer_id = event['telegram_id']
-    engineer_name = event['engineer_name'] or 'Инженер'
-    
-    # 🔍 ПРОВЕРКА 1: мероприятие ещё не завершено?
-    if await is_event_completed(event_id):
-        logger.info(f"Мероприятие {event_id} уже завершено, напоминание не отправлено")
-        return
-    
-    # 🔍 ПРОВЕРКА 2: получаем актуальный статус из БД, не доверяя кэшу из планировщика.
-    pool = get_db_pool()
-    current_status = await pool.fetchval(
-        """
-        SELECT status FROM event_assignments 
-        WHERE event_id = $1 AND assigned_to = $2
-        """,
-        event_id,
-        engineer_id
-    )
-    
-    # Если статус уже не 'assigned' — значит инженер либо подтвердил,
-    # либо запросил замену, либо завершил мероприятие — напоминание не нужно.
-    if current_status != ASSIGNMENT_STATUS_ASSIGNED:
-        status_messages = {
-            ASSIGNMENT_STATUS_ACCEPTED: f"Инженер {engineer_name} уже подтвердил участие",
-            ASSIGNMENT_STATUS_REPLACING: f"Инженер {engineer_name} запросил замену",
-            ASSIGNMENT_STATUS_DONE: f"Мероприятие {event_id} уже завершено",
-        }
-        message = status_messages.get(current_status, f"Мероприятие {event_id} имеет статус {current_status}")
-        logger.info(f"{message}, напоминание пропущено")
-        return
-    
-    # 🔍 ПРОВЕРКА 3: проверяем таблицу notifications, чтобы не отправить
-    # одно и то же напоминание слишком часто.
-    if not await can_send_notification(event_id, engineer_id, NOTIFICATION_REMINDER):
-        return
-    
-    # Форматируем время
-    time_str = start_time.strftime("%H:%M")
-    date_str = start_time.strftime("%d.%m")
-    
-    # Получаем название аудитории
-    auditory = get_russian_name(event['auditory_name']) if event['auditory_name'] else "не указана"
-    if event.get('building'):
-        building = get_russian_name(event['building'])
-        auditory += f" ({building})"
-    
-    # Обратная транслитерация названия
-    russian_title = to_cyrillic(title)
-    
-    # Создаём клавиатуру
+    russian_title = to_cyrillic(event['title'])
+
     keyboard = [
         [
             InlineKeyboardButton("✅ Подтверждаю", callback_data=f"confirm_{event_id}"),
             InlineKeyboardButton("🔄 Ищу замену", callback_data=f"replace_{event_id}")
         ]
     ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    # Отправляем сообщение
-    await bot.send_message(
-        chat_id=engineer_id,
-        text=(
-            f"🔔 **Напоминание о мероприятии!**\n\n"
-            f"📅 **Когда:** {date_str} в {time_str}\n"
-            f"📌 **Мероприятие:** {russian_title}\n"
-            f"🏢 **Аудитория:** {auditory}\n\n"
-            f"Пожалуйста, подтвердите своё участие:"
-        ),
-        reply_markup=reply_markup,
-        parse_mode="Markdown"
+    text = (
+        f"🔔 **Напоминание о мероприятии!**\n\n"
+        f"📅 **Когда:** {start_time.strftime('%d.%m')} в {start_time.strftime('%H:%M')}\n"
+        f"📌 **Мероприятие:** {russian_title}\n"
+        f"🏢 **Аудитория:** {_format_auditory(event)}\n\n"
+        f"Пожалуйста, подтвердите своё участие:"
     )
-    
-    # Логируем в таблицу notifications
-    await log_notification(event_id, engineer_id, NOTIFICATION_REMINDER)
-    
-    logger.info(f"Напоминание отправлено {engineer_name} (ID: {engineer_id}) для мероприятия {event_id}")
+    return text, InlineKeyboardMarkup(keyboard)
 
 
-async def send_completion_reminder(event: Dict[str, Any], bot):
+def _build_completion_reminder_message(event: Dict[str, Any]):
     """
-    Отправляет напоминание о необходимости отметить выполнение мероприятия.
-    Отправляет только если статус 'accepted' и мероприятие ещё не завершено.
-    
-    Аргументы:
-        event: словарь с данными о событии (результат `find_completed_events`).
-        bot: экземпляр Telegram‑бота.
+    Формирует текст и клавиатуру напоминания отметить выполнение мероприятия.
+
+    Возвращает:
+        Кортеж (текст в Markdown, `InlineKeyboardMarkup`).
     """
     from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-    
+
     event_id = event['event_id']
-    title = event['title']
     end_time = event['end_time']
-    engineer_id = event['telegram_id']
-    engineer_name = event['engineer_name'] or 'Инженер'
-    
-    # 🔍 ПРОВЕРКА 1: мероприятие ещё не завершено?
-    if await is_event_completed(event_id):
-        logger.info(f"Мероприятие {event_id} уже завершено, напоминание о завершении не требуется")
-        return
-    
-    # 🔍 ПРОВЕРКА 2: актуальный статус назначения должен быть `accepted`,
-    # иначе либо замена/отмена, либо уже выполнено.
-    pool = get_db_pool()
-    current_status = await pool.fetchval(
-        """
-        SELECT status FROM event_assignments 
-        WHERE event_id = $1 AND assigned_to = $2
-        """,
-        event_id,
-        engineer_id
-    )
-    
-    # Если статус не 'accepted' — не отправляем
-    if current_status != ASSIGNMENT_STATUS_ACCEPTED:
-        logger.info(f"Мероприятие {event_id} имеет статус {current_status}, напоминание о завершении пропущено")
-        return
-    
-    # 🔍 ПРОВЕРКА 3: доп‑проверка на частоту отправки через таблицу notifications.
-    if not await can_send_notification(
-        event_id,
-        engineer_id,
-        NOTIFICATION_COMPLETION_REMINDER,
-    ):
-        return
-    
-    # Обратная транслитерация
-    russian_title = to_cyrillic(title)
-    time_str = end_time.strftime("%H:%M")
-    date_str = end_time.strftime("%d.%m")
-    
-    # Получаем аудиторию
-    auditory = get_russian_name(event['auditory_name']) if event['auditory_name'] else "не указана"
-    if event.get('building'):
-        building = get_russian_name(event['building'])
-        auditory += f" ({building})"
-    
-    # Создаём клавиатуру
+    russian_title = to_cyrillic(event['title'])
+
     keyboard = [
         [InlineKeyboardButton("✅ Отметить выполнение", callback_data=f"complete_{event_id}")]
     ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    await bot.send_message(
-        chat_id=engineer_id,
-        text=(
-            f"❓ **Мероприятие завершено?**\n\n"
-            f"📌 **Мероприятие:** {russian_title}\n"
-            f"🕐 **Окончание:** {date_str} в {time_str}\n"
-            f"🏢 **Аудитория:** {auditory}\n\n"
-            f"Если мероприятие уже проведено, отметьте его как выполненное:"
-        ),
-        reply_markup=reply_markup,
-        parse_mode="Markdown"
+    text = (
+        f"❓ **Мероприятие завершено?**\n\n"
+        f"📌 **Мероприятие:** {russian_title}\n"
+        f"🕐 **Окончание:** {end_time.strftime('%d.%m')} в {end_time.strftime('%H:%M')}\n"
+        f"🏢 **Аудитория:** {_format_auditory(event)}\n\n"
+        f"Если мероприятие уже проведено, отметьте его как выполненное:"
     )
-    
-    # Логируем
-    await log_notification(event_id, engineer_id, NOTIFICATION_COMPLETION_REMINDER)
-    
-    logger.info(f"Напоминание о завершении отправлено {engineer_name} для мероприятия {event_id}")
+    return text, InlineKeyboardMarkup(keyboard)
+
+
+_MESSAGE_BUILDERS = {
+    NOTIFICATION_REMINDER: _build_reminder_message,
+    NOTIFICATION_COMPLETION_REMINDER: _build_completion_reminder_message,
+}
+
+
+_REQUIRED_STATUS = {
+    NOTIFICATION_REMINDER: ASSIGNMENT_STATUS_ASSIGNED,
+    NOTIFICATION_COMPLETION_REMINDER: ASSIGNMENT_STATUS_ACCEPTED,
+}
+
+
+async def enqueue_due_reminder(reminder: Dict[str, Any]) -> bool:
+    """
+    Ставит в очередь напоминание из выборки `find_scheduled_reminders`.
+
+    Аргументы:
+        reminder: строка результата `find_scheduled_reminders`.
+
+    Возвращает:
+        True, если напоминание поставлено в очередь; False, если оно уже
+        неактуально (инженер подтвердил или запросил замену, мероприятие
+        завершено или перенесено, напоминание уже ставилось за последние
+        2 часа).
+
+    Примечания:
+        🔥 ВАЖНО: проверки повторяют условия выборки и выполняются одним
+        запросом в транзакции постановки (`repositories.outbox.enqueue_reminder`),
+        поэтому отправка не требует отдельных чтений из БД, а повторно
+        загруженный таймер не продублирует уже поставленное напоминание.
+    """
+    notification_type = reminder['notification_type']
+    text, reply_markup = _MESSAGE_BUILDERS[notification_type](reminder)
+
+    pool = get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            outbox_id = await enqueue_reminder(
+                conn,
+                event_id=reminder['event_id'],
+                chat_id=reminder['telegram_id'],
+                notification_type=notification_type,
+                assignment_status=_REQUIRED_STATUS[notification_type],
+                start_time=reminder['start_time'],
+                end_time=reminder['end_time'],
+                text=text,
+                parse_mode="Markdown",
+                reply_markup=reply_markup,
+            )
+
+    engineer = reminder['engineer_name'] or 'инженеру'
+    if outbox_id is None:
+        logger.info(
+            f"Напоминание ({notification_type}) {engineer} (ID: {reminder['telegram_id']}) "
+            f"по мероприятию {reminder['event_id']} уже неактуально, пропущено"
+        )
+        return False
+    logger.info(
+        f"Напоминание ({notification_type}) поставлено в очередь для {engineer} "
+        f"(ID: {reminder['telegram_id']}) по мероприятию {reminder['event_id']}"
+    )
+    return True
 
 
 async def log_notification(event_id: int, user_id: int, notification_type: str):
@@ -446,47 +350,94 @@ async def log_notification(event_id: int, user_id: int, notification_type: str):
     )
 
 
-async def auto_complete_events() -> int:
+async def auto_complete_events() -> List[Dict[str, Any]]:
     """
     Автоматически отмечает как выполненные мероприятия,
-    которые закончились более часа назад и не были отмечены вручную.
-    
+    которые закончились `AUTO_COMPLETE_DELAY` (1 час) назад или раньше
+    и не были отмечены вручную, и отправляет менеджерам одну сводку о них.
+
     Возвращает:
-        Целое число — количество обновлённых записей в `event_assignments`.
+        Список завершённых назначений (event_id, assigned_to,
+        previous_status, title, start_time, engineer_name).
 
     Примечания:
         🔥 ВАЖНО: авто‑завершение распространяется на все статусы `accepted`
         и `assigned`, чтобы «подвисшие» задачи не искажали статистику.
+        ⚠️ ВНИМАНИЕ: просматриваются только мероприятия, закончившиеся не
+        раньше `AUTO_COMPLETE_LOOKBACK_DAYS` назад, — запрос не сканирует
+        всю историю. Обновление и постановка сводки в очередь выполняются
+        в одной транзакции.
     """
     pool = get_db_pool()
-    
-    # 🔥 ВАЖНО (SQL): внутренняя подзапрос‑фильтр выбирает события,
-    # у которых `end_time` был более часа назад; при этом не проверяется статус
-    # самих мероприятий — предполагается, что в календарь попадают только
-    # актуальные подтверждённые записи.
-    result = await pool.execute(
-        """
-        UPDATE event_assignments 
-        SET status = $1, completed_at = NOW()
-        WHERE event_id IN (
-            SELECT id FROM calendar_events 
-            WHERE end_time < NOW() - INTERVAL '1 hour'
-        )
-        AND status IN ($2, $3)
-        """,
-        ASSIGNMENT_STATUS_DONE,
-        ASSIGNMENT_STATUS_ACCEPTED,
-        ASSIGNMENT_STATUS_ASSIGNED
-    )
-    
-    # Парсим результат, чтобы получить количество обновлённых строк
-    match = re.search(r'UPDATE (\d+)', result)
-    count = int(match.group(1)) if match else 0
-    
-    if count > 0:
-        logger.info(f"Автоматически завершено {count} мероприятий")
-    
-    return count
+
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            # 🔥 ВАЖНО (SQL): CTE блокирует подходящие назначения и запоминает
+            # их прежний статус — RETURNING видит уже новые значения.
+            rows = await conn.fetch(
+                """
+                WITH due AS (
+                    SELECT ea.id, ea.status AS previous_status,
+                           ce.title, ce.start_time, u.full_name AS engineer_name
+                    FROM calendar_events ce
+                    JOIN event_assignments ea ON ea.event_id = ce.id
+                    LEFT JOIN users u ON u.telegram_id = ea.assigned_to
+                    WHERE ce.end_time > NOW() - $5::interval
+                      AND ce.end_time <= NOW() - $4::interval
+                      AND ea.status IN ($2, $3)
+                    FOR UPDATE OF ea
+                )
+                UPDATE event_assignments ea
+                SET status = $1, completed_at = NOW()
+                FROM due
+                WHERE ea.id = due.id
+                RETURNING ea.event_id, ea.assigned_to, due.previous_status,
+                          due.title, due.start_time, due.engineer_name
+                """,
+                ASSIGNMENT_STATUS_DONE,
+                ASSIGNMENT_STATUS_ACCEPTED,
+                ASSIGNMENT_STATUS_ASSIGNED,
+                AUTO_COMPLETE_DELAY,
+                timedelta(days=config.AUTO_COMPLETE_LOOKBACK_DAYS),
+            )
+            completed = [dict(row) for row in rows]
+
+            if completed:
+                managers = await conn.fetch(
+                    "SELECT telegram_id FROM users WHERE role IN ('manager', 'superadmin') AND is_active = true"
+                )
+                await enqueue_broadcast(
+                    conn,
+                    [manager['telegram_id'] for manager in managers],
+                    _format_auto_complete_digest(completed),
+                )
+
+    if completed:
+        logger.info(f"Автоматически завершено {len(completed)} назначений")
+
+    return completed
+
+
+def _format_auto_complete_digest(completed: List[Dict[str, Any]]) -> str:
+    """
+    Формирует сводку для менеджеров об автоматически завершённых назначениях.
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: текст без разметки — названия мероприятий приходят из
+        календаря и могут содержать символы Markdown. Список ограничен
+        `_DIGEST_MAX_ITEMS` строками, чтобы не превысить лимит длины сообщения.
+    """
+    lines = [f"🤖 Автоматически завершено назначений: {len(completed)}", ""]
+    ordered = sorted(completed, key=lambda item: item['start_time'])
+    for item in ordered[:_DIGEST_MAX_ITEMS]:
+        engineer = item['engineer_name'] or str(item['assigned_to'])
+        line = f"• {item['start_time']:%d.%m %H:%M} — {to_cyrillic(item['title'])} — {engineer}"
+        if item['previous_status'] == ASSIGNMENT_STATUS_ASSIGNED:
+            line += " (не было подтверждено)"
+        lines.append(line)
+    if len(ordered) > _DIGEST_MAX_ITEMS:
+        lines.append(f"…и ещё {len(ordered) - _DIGEST_MAX_ITEMS}")
+    return "\n".join(lines)
 
 
 async def send_morning_summary(bot):
@@ -501,51 +452,17 @@ async def send_morning_summary(bot):
     Аргументы:
         bot: экземпляр Telegram‑бота.
     """
-    from config import config
-    
     if not config.GROUP_CHAT_ID:
         logger.warning("GROUP_CHAT_ID не настроен, сводка не будет отправлена")
         return
     
-    pool = get_db_pool()
-    today = datetime.now().date()
+    today = datetime.now(get_timezone()).date()
     
     logger.info(f"Формируем утреннюю сводку на {today}")
     
-    # 🔥 ВАЖНО (SQL): LEFT JOIN с `event_assignments` позволяет учесть:
-    # - назначенных инженеров с различными статусами;
-    # - мероприятия без назначений (для них будет `assignment_status IS NULL`).
-    rows = await pool.fetch(
-        """
-        SELECT 
-            ce.id,
-            ce.title,
-            ce.start_time,
-            ce.end_time,
-            a.name as auditory_name,
-            a.building,
-            u.full_name as engineer_name,
-            u.telegram_id,
-            ea.status as assignment_status,
-            ea.confirmed_at,
-            -- Проверяем, завершено ли мероприятие
-            EXISTS (
-                SELECT 1 
-                FROM event_assignments ea2 
-                WHERE ea2.event_id = ce.id 
-                  AND ea2.status = 'done'
-            ) as is_completed
-        FROM calendar_events ce
-        LEFT JOIN auditories a ON ce.auditory_id = a.id
-        LEFT JOIN event_assignments ea ON ce.id = ea.event_id 
-            AND ea.status IN ('accepted', 'assigned', 'replacing', 'done')
-        LEFT JOIN users u ON ea.assigned_to = u.telegram_id
-        WHERE DATE(ce.start_time) = $1
-          AND ce.status = 'confirmed'
-        ORDER BY ce.start_time
-        """,
-        today
-    )
+    # 🔥 ВАЖНО: в выборке учтены назначенные инженеры с различными статусами
+    # и мероприятия без назначений (для них `assignment_status IS NULL`).
+    rows = await get_events_with_assignments_between(*day_range(today))
     
     if not rows:
         await bot.send_message(
@@ -653,63 +570,38 @@ async def send_afternoon_report(bot):
     Аргументы:
         bot: экземпляр Telegram‑бота.
     """
-    from config import config
-    
     if not config.GROUP_CHAT_ID:
         logger.warning("GROUP_CHAT_ID не настроен, отчёт не будет отправлен")
         return
     
-    pool = get_db_pool()
-    today = datetime.now().date()
-    
     # Получаем статистику за сегодня
-    # 🔥 ВАЖНО (SQL): используем агрегирующие SUM(CASE WHEN ...), чтобы
-    # одним запросом получить сводку по всем статусам за день.
-    rows = await pool.fetch(
-        """
-        SELECT 
-            COUNT(*) as total,
-            SUM(CASE WHEN ea.status = 'done' THEN 1 ELSE 0 END) as completed,
-            SUM(CASE WHEN ea.status = 'accepted' THEN 1 ELSE 0 END) as confirmed,
-            SUM(CASE WHEN ea.status = 'assigned' THEN 1 ELSE 0 END) as pending,
-            SUM(CASE WHEN ea.status = 'replacing' THEN 1 ELSE 0 END) as replacing,
-            SUM(CASE WHEN ea.status IS NULL THEN 1 ELSE 0 END) as no_assign
-        FROM calendar_events ce
-        LEFT JOIN event_assignments ea ON ce.id = ea.event_id
-            AND ea.status IN ('accepted', 'assigned', 'replacing', 'done')
-        WHERE DATE(ce.start_time) = $1
-          AND ce.status = 'confirmed'
-        """,
-        today
+    start, end = day_range(datetime.now(get_timezone()).date())
+    data = await get_assignment_stats_between(start, end)
+    total = data['total']
+    completed = data['completed']
+    confirmed = data['confirmed']
+    pending = data['pending']
+    replacing = data['replacing']
+    no_assign = data['no_assign']
+
+    report = (
+        f"📊 **Дневной отчёт**\n\n"
+        f"📅 **Мероприятий сегодня:** {total}\n"
+        f"✅ **Завершено:** {completed}\n"
+        f"👍 **Подтверждено:** {confirmed}\n"
+        f"⏳ **Ожидают:** {pending}\n"
+        f"🔄 **Ищут замену:** {replacing}\n"
+        f"❌ **Не назначены:** {no_assign}\n"
     )
     
-    if rows:
-        data = rows[0]
-        total = data['total'] or 0
-        completed = data['completed'] or 0
-        confirmed = data['confirmed'] or 0
-        pending = data['pending'] or 0
-        replacing = data['replacing'] or 0
-        no_assign = data['no_assign'] or 0
-        
-        report = (
-            f"📊 **Дневной отчёт**\n\n"
-            f"📅 **Мероприятий сегодня:** {total}\n"
-            f"✅ **Завершено:** {completed}\n"
-            f"👍 **Подтверждено:** {confirmed}\n"
-            f"⏳ **Ожидают:** {pending}\n"
-            f"🔄 **Ищут замену:** {replacing}\n"
-            f"❌ **Не назначены:** {no_assign}\n"
-        )
-        
-        await bot.send_message(
-            chat_id=config.GROUP_CHAT_ID,
-            message_thread_id=config.TOPIC_ID,
-            text=report,
-            parse_mode="Markdown"
-        )
-        
-        logger.info(f"Дневной отчёт отправлен. Мероприятий: {total}")
+    await bot.send_message(
+        chat_id=config.GROUP_CHAT_ID,
+        message_thread_id=config.TOPIC_ID,
+        text=report,
+        parse_mode="Markdown"
+    )
+    
+    logger.info(f"Дневной отчёт отправлен. Мероприятий: {total}")
 
 
 async def send_unconfirmed_report(bot):
@@ -729,38 +621,11 @@ async def find_events_without_assignments() -> List[Dict[str, Any]]:
     Returns:
         List[Dict]: список мероприятий без назначений
     """
-    pool = get_db_pool()
-    tomorrow = datetime.now().date() + timedelta(days=1)
-    
-    rows = await pool.fetch(
-        """
-        SELECT 
-            ce.id,
-            ce.title,
-            ce.start_time,
-            ce.end_time,
-            a.name as auditory_name,
-            a.building,
-            -- Проверяем, есть ли назначения
-            CASE 
-                WHEN COUNT(ea.id) = 0 THEN 'без назначений'
-                ELSE 'есть назначения'
-            END as assignment_status
-        FROM calendar_events ce
-        LEFT JOIN auditories a ON ce.auditory_id = a.id
-        LEFT JOIN event_assignments ea ON ce.id = ea.event_id 
-            AND ea.status IN ('assigned', 'accepted')
-        WHERE DATE(ce.start_time) = $1
-          AND ce.status = 'confirmed'
-        GROUP BY ce.id, ce.title, ce.start_time, ce.end_time, a.name, a.building
-        HAVING COUNT(ea.id) = 0  -- Только те, у кого нет назначений
-        ORDER BY ce.start_time
-        """,
-        tomorrow
-    )
-    
+    tomorrow = datetime.now(get_timezone()).date() + timedelta(days=1)
+    rows = await get_unassigned_events_between(*day_range(tomorrow))
+
     logger.info(f"Найдено мероприятий без назначений на завтра: {len(rows)}")
-    return [dict(row) for row in rows]
+    return rows
 
 
 async def send_manager_evening_reminder(bot):
@@ -794,7 +659,7 @@ async def send_manager_evening_reminder(bot):
         return
     
     # Формируем сообщение
-    tomorrow_str = (datetime.now().date() + timedelta(days=1)).strftime("%d.%m.%Y")
+    tomorrow_str = (datetime.now(get_timezone()).date() + timedelta(days=1)).strftime("%d.%m.%Y")
     
     # Список мероприятий
     events_list = ""
@@ -828,17 +693,20 @@ async def send_manager_evening_reminder(bot):
         f"Пожалуйста, назначьте ответственных до завтрашнего утра."
     )
     
-    # Отправляем всем менеджерам
-    for manager in managers:
-        try:
-            await bot.send_message(
-                chat_id=manager['telegram_id'],
-                text=text,
-                reply_markup=reply_markup,
-                parse_mode="Markdown"
-            )
+    # Отправляем всем менеджерам параллельно (в пределах лимитов Telegram)
+    results = await get_dispatcher(bot).send_many(
+        {
+            "chat_id": manager['telegram_id'],
+            "text": text,
+            "reply_markup": reply_markup,
+            "parse_mode": "Markdown",
+        }
+        for manager in managers
+    )
+    for manager, result in zip(managers, results):
+        if isinstance(result, Exception):
+            logger.error(f"Не удалось отправить напоминание менеджеру {manager['telegram_id']}: {result}")
+        else:
             logger.info(f"Вечернее напоминание отправлено менеджеру {manager['telegram_id']}")
-        except Exception as e:
-            logger.error(f"Не удалось отправить напоминание менеджеру {manager['telegram_id']}: {e}")
     
     
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""Точное расписание напоминаний и авто‑завершения мероприятий.
+
+Задачи модуля:
+- загружать из БД моменты отправки напоминаний инженерам, напоминаний
+  об отметке выполнения и авто‑завершения на ближайший горизонт;
+- ставить их в `TimerScheduler`, чтобы каждое действие выполнялось
+  ровно в свой момент, а не с точностью до периода опроса;
+- перезагружать таймеры мероприятия сразу после изменения его назначений
+  или времени — по `LISTEN reminder_invalidate`, с какого бы экземпляра
+  бота, из дашборда или SQL ни пришло изменение.
+
+Схема работы:
+    1. `reminder_scheduler_loop` раз в `REMINDER_RELOAD_MINUTES` загружает
+       таймеры на горизонт в два периода перезагрузки вперёд.
+    2. Таймеры с прошедшим сроком (например, после перезапуска бота)
+       срабатывают сразу — напоминания не теряются.
+    3. Триггеры таблиц `event_assignments` и `calendar_events` (миграция
+       v0.16.0) шлют `pg_notify('reminder_invalidate', event_id)`;
+       ведущий экземпляр слушает канал и перезагружает таймеры этого
+       мероприятия. Если изменилось сразу много мероприятий (например,
+       после синхронизации календаря) — перезагружает все таймеры.
+    4. При срабатывании `enqueue_due_reminder` одним запросом проверяет,
+       что напоминание ещё актуально, и ставит его в outbox.
+
+Примечания:
+    ⚠️ ВНИМАНИЕ: уведомления, пришедшие во время разрыва соединения
+    слушателя, теряются — после переподключения таймеры перезагружаются
+    целиком, а периодическая перезагрузка раз в `REMINDER_RELOAD_MINUTES`
+    страхует от остального. Лишние и повторно загруженные таймеры
+    безопасны: проверка и постановка в очередь выполняются в одной
+    транзакции, поэтому одно напоминание не уйдёт дважды.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set, Tuple
+
+import asyncpg
+
+from config import config
+from core.constants import NOTIFICATION_COMPLETION_REMINDER, NOTIFICATION_REMINDER
+from services.reminder import (
+    auto_complete_events,
+    enqueue_due_reminder,
+    find_auto_complete_times,
+    find_scheduled_reminders,
+)
+from services.timer_scheduler import TimerScheduler
+
+logger = logging.getLogger(__name__)
+
+REMINDER_CHANNEL = "reminder_invalidate"
+
+# Период проверки соединения слушателя уведомлений, сек.
+_LISTENER_CHECK_SECONDS = 30
+# Сколько мероприятий перезагружать по одному; при большем числе
+# изменений дешевле перезагрузить все таймеры одним запросом.
+_MAX_EVENT_RELOADS = 20
+
+_REMINDER_TYPES = (NOTIFICATION_REMINDER, NOTIFICATION_COMPLETION_REMINDER)
+
+_scheduler = TimerScheduler()
+_reload_requested = asyncio.Event()
+_full_reload_requested = False
+_pending_invalidations: Set[int] = set()
+
+
+def _horizon() -> datetime:
+    """Граница загрузки таймеров: два периода перезагрузки вперёд."""
+    return datetime.now() + timedelta(minutes=2 * config.REMINDER_RELOAD_MINUTES)
+
+
+def _reminder_key(reminder: Dict[str, Any]) -> Tuple[str, int, int]:
+    return reminder['notification_type'], reminder['event_id'], reminder['telegram_id']
+
+
+def _schedule_reminder(reminder: Dict[str, Any]) -> None:
+    _scheduler.schedule(
+        _reminder_key(reminder),
+        reminder['due_at'],
+        functools.partial(enqueue_due_reminder, reminder),
+        group=reminder['event_id'],
+    )
+
+
+async def _fire_auto_complete() -> None:
+    await auto_complete_events()
+
+
+async def reload_timers() -> None:
+    """
+    Перезагружает все таймеры на горизонт планирования.
+
+    Примечания:
+        Таймеры с теми же ключами переставляются (время могло измениться),
+        новые — добавляются, пропавшие из выборки (мероприятие перенесено
+        или отменено) — снимаются.
+    """
+    until = _horizon()
+    reminders = await find_scheduled_reminders(until)
+    fresh = {_reminder_key(reminder) for reminder in reminders}
+    for key in _scheduler.keys():
+        if key[0] in _REMINDER_TYPES and key not in fresh:
+            _scheduler.cancel(key)
+    for reminder in reminders:
+        _schedule_reminder(reminder)
+
+    auto_complete_times = await find_auto_complete_times(until)
+    for when in auto_complete_times:
+        _scheduler.schedule(("auto_complete", when), when, _fire_auto_complete)
+
+    logger.info(
+        f"Таймеры напоминаний загружены до {until:%H:%M}: "
+        f"напоминаний {len(reminders)}, авто‑завершений {len(auto_complete_times)}"
+    )
+
+
+async def _reload_event(event_id: int) -> None:
+    """Заново загружает таймеры одного мероприятия."""
+    until = _horizon()
+    _scheduler.cancel_group(event_id)
+    for reminder in await find_scheduled_reminders(until, event_id=event_id):
+        _schedule_reminder(reminder)
+    # Прежние таймеры авто‑завершения не снимаются: лишний запуск
+    # auto_complete_events ничего не меняет.
+    for when in await find_auto_complete_times(until, event_id=event_id):
+        _scheduler.schedule(("auto_complete", when), when, _fire_auto_complete)
+
+
+def _request_full_reload() -> None:
+    global _full_reload_requested
+    _full_reload_requested = True
+    _reload_requested.set()
+
+
+def _on_reminder_invalidate(connection, pid, channel, payload) -> None:
+    try:
+        _pending_invalidations.add(int(payload))
+    except ValueError:
+        logger.warning(f"Некорректное уведомление {channel}: {payload!r}, таймеры будут перезагружены целиком")
+        _request_full_reload()
+        return
+    _reload_requested.set()
+
+
+async def _invalidation_listener() -> None:
+    """
+    Слушает канал `reminder_invalidate` на отдельном соединении вне пула.
+
+    Примечания:
+        🔥 ВАЖНО: после (пере)подключения запрашивается полная перезагрузка —
+        уведомления, пришедшие до подписки или во время разрыва, потеряны.
+    """
+    while True:
+        conn: Optional[asyncpg.Connection] = None
+        try:
+            conn = await asyncpg.connect(dsn=config.DATABASE_URL)
+            await conn.add_listener(REMINDER_CHANNEL, _on_reminder_invalidate)
+            _request_full_reload()
+            logger.info("Подписка на изменения назначений (LISTEN reminder_invalidate) активна")
+            while True:
+                await asyncio.sleep(_LISTENER_CHECK_SECONDS)
+                await conn.fetchval("SELECT 1", timeout=_LISTENER_CHECK_SECONDS)
+        except Exception as e:
+            logger.error(f"Ошибка подписки на изменения назначений: {e}", exc_info=True)
+        finally:
+            if conn is not None:
+                conn.terminate()
+        await asyncio.sleep(_LISTENER_CHECK_SECONDS)
+
+
+async def reminder_scheduler_loop() -> None:
+    """
+    Запускает планировщик таймеров и поддерживает его в актуальном состоянии.
+
+    Примечания:
+        🔥 ВАЖНО: запускается только на ведущем экземпляре
+        (services/leader.py). Ошибки загрузки только логируются — уже
+        поставленные таймеры продолжают срабатывать.
+    """
+    global _full_reload_requested
+    runner = asyncio.create_task(_scheduler.run())
+    listener = asyncio.create_task(_invalidation_listener())
+    reload_interval = config.REMINDER_RELOAD_MINUTES * 60
+    full_reload = True
+    try:
+        while True:
+            try:
+                if full_reload or len(_pending_invalidations) > _MAX_EVENT_RELOADS:
+                    await reload_timers()
+                    _pending_invalidations.clear()
+                else:
+                    while _pending_invalidations:
+                        await _reload_event(_pending_invalidations.pop())
+            except Exception as e:
+                logger.error(f"Ошибка загрузки таймеров напоминаний: {e}", exc_info=True)
+
+            try:
+                await asyncio.wait_for(_reload_requested.wait(), timeout=reload_interval)
+                _reload_requested.clear()
+                # Точечная перезагрузка, если запрошены только отдельные мероприятия.
+                full_reload = _full_reload_requested
+            except asyncio.TimeoutError:
+                full_reload = True
+            _full_reload_requested = False
+    finally:
+        runner.cancel()
+        listener.cancel()
+        await asyncio.gather(runner, listener, return_exceptions=True)
+        # Планировщик мог быть остановлен при потере роли ведущего
+        # (services/leader.py): таймеры снимаются.
+        for key in _scheduler.keys():
+            _scheduler.cancel(key)
+        _pending_invalidations.clear()
+
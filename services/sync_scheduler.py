@@ -4,51 +4,67 @@ import asyncio
 import logging
 from datetime import datetime, timedelta
 
+from typing import Dict
+
 from database import get_db_pool
-from services.google_calendar import calendar_client, sync_calendar
+from config import config
+from core.types import CalendarSyncResult
+from services.google_calendar import sync_calendar, sync_calendar_incremental, sync_calendars
 
 logger = logging.getLogger(__name__)
 
 
-async def force_sync(days: int = 30) -> int:
+async def force_sync(days: int = 30) -> Dict[str, CalendarSyncResult]:
     """
-    Принудительная синхронизация с Google Calendar.
-    
-    Returns:
-        int: Количество обработанных событий
+    Принудительная синхронизация всех календарей с Google Calendar.
+
+    Возвращает:
+        Словарь `calendar_id -> CalendarSyncResult` с количеством
+        обработанных событий, длительностью и ошибкой по каждому календарю.
     """
     logger.info("Запуск принудительной синхронизации")
     
     try:
-        # Получаем события из календаря
-        events = await calendar_client.fetch_events(days=days)
-        
-        if not events:
-            logger.info("Нет новых событий для синхронизации")
-            return 0
-        
-        # Сохраняем в БД
-        await calendar_client.save_events_to_db(events)
-        
-        logger.info(f"Принудительная синхронизация завершена. Обработано: {len(events)} событий")
-        return len(events)
-        
+        results = await sync_calendars(days)
     except Exception as e:
         logger.error(f"Ошибка при принудительной синхронизации: {e}", exc_info=True)
         raise
 
+    for calendar_id, result in results.items():
+        status = f"ошибка: {result['error']}" if result["error"] else "ок"
+        logger.info(
+            f"Календарь {calendar_id}: {result['processed']} событий "
+            f"за {result['duration_sec']:.2f} сек. ({status})"
+        )
+    processed = sum(result["processed"] for result in results.values())
+    logger.info(f"Принудительная синхронизация завершена. Обработано: {processed} событий")
+    return results
+
 
 async def sync_loop():
     """
-    Бесконечный цикл фоновой синхронизации (каждые 6 часов).
+    Бесконечный цикл фоновой синхронизации.
+
+    Каждые `CALENDAR_SYNC_INTERVAL_MINUTES` минут запрашиваются только
+    изменения по `syncToken`. Раз в `CALENDAR_FULL_SYNC_HOURS` часов
+    дополнительно выполняется полная синхронизация окна в
+    `CALENDAR_SYNC_WINDOW_DAYS` дней —
+    как страховка на случай пропущенных изменений.
     """
+    full_sync_interval = timedelta(hours=config.CALENDAR_FULL_SYNC_HOURS)
+    last_full_sync = None
     while True:
         try:
             logger.info("Запуск плановой синхронизации")
-            await sync_calendar(days=30)
+            # Таймеры напоминаний перенесённых мероприятий переставляются по
+            # уведомлению reminder_invalidate (см. services/reminder_scheduler.py).
+            await sync_calendar_incremental()
+            now = datetime.now()
+            if last_full_sync is None or now - last_full_sync >= full_sync_interval:
+                await sync_calendar(days=config.CALENDAR_SYNC_WINDOW_DAYS)
+                last_full_sync = now
             logger.info("Плановая синхронизация завершена")
         except Exception as e:
             logger.error(f"Ошибка в цикле синхронизации: {e}", exc_info=True)
         
-        # Ждём 6 часов
-        await asyncio.sleep(6 * 60 * 60)
\ No newline at end of file
+        await asyncio.sleep(config.CALENDAR_SYNC_INTERVAL_MINUTES * 60)
@@ -0,0 +1,185 @@
+"""Планировщик точных таймеров на куче (heapq) внутри процесса бота.
+
+Задачи модуля:
+- выполнять корутины в заданный момент времени без периодического опроса БД;
+- заменять и отменять таймеры по ключу, а также группой (например, все
+  таймеры одного мероприятия);
+- выполнять просроченные таймеры сразу после постановки (догоняющий режим
+  после перезапуска).
+
+Использование:
+    scheduler = TimerScheduler()
+    scheduler.schedule(("reminder", 42, 100500), due_at, callback, group=42)
+    asyncio.create_task(scheduler.run())
+
+Примечания:
+    Источник времени передаётся в конструктор (`clock`), поэтому поведение
+    легко проверить на «виртуальных часах»: сдвинуть время и вызвать
+    `run_due()` — без ожидания и без обращения к БД.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+TimerCallback = Callable[[], Awaitable[None]]
+
+# Максимальная пауза ожидания: защита от ухода системных часов.
+_MAX_WAIT_SECONDS = 60
+# Допустимый запас отменённых записей в куче до её пересборки.
+_COMPACT_SLACK = 64
+
+
+@dataclass(order=True)
+class _Timer:
+    """Запись в куче. Отменённые записи не удаляются из кучи, а помечаются."""
+
+    when: datetime
+    seq: int
+    key: Hashable = field(compare=False)
+    callback: TimerCallback = field(compare=False)
+    group: Optional[Hashable] = field(compare=False, default=None)
+    cancelled: bool = field(compare=False, default=False)
+
+
+class TimerScheduler:
+    """
+    Очередь таймеров с точным срабатыванием.
+
+    Аргументы:
+        clock: функция текущего времени (по умолчанию `datetime.now`,
+            наивное локальное время — как во всём проекте).
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: у каждого ключа не больше одного таймера. Повторный
+        `schedule` с тем же ключом заменяет прежний таймер.
+    """
+
+    def __init__(self, clock: Callable[[], datetime] = datetime.now):
+        self._clock = clock
+        self._heap: List[_Timer] = []
+        self._timers: Dict[Hashable, _Timer] = {}
+        self._groups: Dict[Hashable, Set[Hashable]] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._running: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def keys(self) -> List[Hashable]:
+        """Ключи ожидающих таймеров."""
+        return list(self._timers)
+
+    def schedule(
+        self,
+        key: Hashable,
+        when: datetime,
+        callback: TimerCallback,
+        group: Optional[Hashable] = None,
+    ) -> None:
+        """
+        Ставит (или переставляет) таймер.
+
+        Аргументы:
+            key: уникальный ключ таймера.
+            when: момент срабатывания; прошедшее время — сработать сразу.
+            callback: корутина без аргументов.
+            group: необязательная группа для массовой отмены.
+        """
+        self.cancel(key)
+        # Отменённые записи копятся при частых перестановках — периодически чистим кучу.
+        if len(self._heap) > 2 * len(self._timers) + _COMPACT_SLACK:
+            self._heap = [timer for timer in self._heap if not timer.cancelled]
+            heapq.heapify(self._heap)
+        timer = _Timer(when, next(self._seq), key, callback, group)
+        heapq.heappush(self._heap, timer)
+        self._timers[key] = timer
+        if group is not None:
+            self._groups.setdefault(group, set()).add(key)
+        # Будим цикл, только если новый таймер стал ближайшим.
+        if self._heap[0] is timer:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable) -> bool:
+        """Отменяет таймер по ключу. Возвращает True, если он был."""
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        timer.cancelled = True
+        if timer.group is not None:
+            keys = self._groups.get(timer.group)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._groups[timer.group]
+        return True
+
+    def cancel_group(self, group: Hashable) -> int:
+        """Отменяет все таймеры группы. Возвращает количество отменённых."""
+        keys = list(self._groups.get(group, ()))
+        for key in keys:
+            self.cancel(key)
+        return len(keys)
+
+    def next_due(self) -> Optional[datetime]:
+        """Момент ближайшего таймера или None, если очередь пуста."""
+        self._drop_cancelled()
+        return self._heap[0].when if self._heap else None
+
+    def run_due(self) -> int:
+        """
+        Запускает все таймеры, время которых наступило.
+
+        Возвращает:
+            Количество запущенных таймеров.
+
+        Примечания:
+            Колбэки запускаются отдельными задачами и не блокируют очередь;
+            их ошибки логируются.
+        """
+        now = self._clock()
+        fired = 0
+        while True:
+            self._drop_cancelled()
+            if not self._heap or self._heap[0].when > now:
+                return fired
+            timer = heapq.heappop(self._heap)
+            self.cancel(timer.key)
+            task = asyncio.create_task(self._fire(timer))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            fired += 1
+
+    async def run(self) -> None:
+        """Бесконечный цикл: спит до ближайшего таймера или до постановки более раннего."""
+        while True:
+            self.run_due()
+            self._wakeup.clear()
+            due = self.next_due()
+            timeout = _MAX_WAIT_SECONDS
+            if due is not None:
+                timeout = min(max((due - self._clock()).total_seconds(), 0), _MAX_WAIT_SECONDS)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _drop_cancelled(self) -> None:
+        while self._heap and self._heap[0].cancelled:
+            heapq.heappop(self._heap)
+
+    @staticmethod
+    async def _fire(timer: _Timer) -> None:
+        try:
+            await timer.callback()
+        except Exception as e:
+            logger.error(f"Ошибка таймера {timer.key}: {e}", exc_info=True)
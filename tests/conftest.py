@@ -0,0 +1,81 @@
+"""Общие настройки тестов.
+
+Тесты проверяют чистую логику модулей без PostgreSQL и Telegram:
+обращения к БД подменяются через `monkeypatch`, время — «виртуальными
+часами» (`VirtualClock`, `FakeMonotonic`).
+
+Запуск (из корня проекта):
+    python -m pytest -q
+
+Проверки планов запросов (`EXPLAIN`) требуют настоящей БД со схемой из
+migrations/ и пропускаются, если не задан `TEST_DATABASE_URL`.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Модули проекта импортируются от корня репозитория.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# config.Config проверяет обязательные переменные при импорте.
+os.environ.setdefault("BOT_TOKEN", "test-token")
+os.environ.setdefault("DATABASE_URL", "postgresql://test@localhost/test")
+
+
+def pytest_terminal_summary(terminalreporter):
+    # Причина пропуска видна и при `-q`, без флага `-rs`.
+    if not os.getenv("TEST_DATABASE_URL") and terminalreporter.stats.get("skipped"):
+        terminalreporter.write_line(
+            "TEST_DATABASE_URL не задан: проверки с настоящей БД (EXPLAIN, замеры записи) пропущены",
+            yellow=True,
+        )
+
+
+class VirtualClock:
+    """Управляемый источник времени для `TimerScheduler`."""
+
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **kwargs) -> None:
+        self.now += timedelta(**kwargs)
+
+
+@pytest.fixture
+def clock() -> VirtualClock:
+    return VirtualClock(datetime(2026, 3, 2, 9, 0))
+
+
+class FakeMonotonic:
+    """Монотонные часы, которые сдвигает подменённый `asyncio.sleep`.
+
+    Ожидание не уступает управление event loop: параллельные отправки
+    выполняются по очереди, а `now` показывает, сколько бы они заняли.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def monotonic(monkeypatch) -> FakeMonotonic:
+    from services import dispatcher
+
+    clock = FakeMonotonic()
+    monkeypatch.setattr(dispatcher.asyncio, "sleep", clock.sleep)
+    return clock
@@ -0,0 +1,97 @@
+"""Тесты отзывчивости event loop во время синхронизации с медленным Google Calendar.
+
+Запрос googleapiclient подменён блокирующим: `execute` засыпает через
+`time.sleep`, как httplib2 на медленном сокете. Обработчик бота в это время
+должен отвечать без задержек.
+"""
+
+import asyncio
+import time
+
+from config import config
+from services.google_calendar import GoogleCalendarClient
+
+# Время ответа медленного API на одну страницу.
+SLOW_PAGE_SECONDS = 0.2
+# Допустимая задержка «обработчика» во время синхронизации.
+HANDLER_BOUND_SECONDS = 0.1
+
+
+class SlowRequest:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self, http=None):
+        time.sleep(SLOW_PAGE_SECONDS)
+        return self.response
+
+
+class SlowEvents:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def list(self, pageToken=None, **kwargs):
+        return SlowRequest(self.pages[pageToken])
+
+
+class SlowService:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def events(self):
+        return SlowEvents(self.pages)
+
+
+PAGES = {
+    None: {"items": [{"id": "a"}], "nextPageToken": "p2"},
+    "p2": {"items": [{"id": "b"}], "nextPageToken": "p3"},
+    "p3": {"items": [{"id": "c"}]},
+}
+
+
+def _client():
+    client = GoogleCalendarClient.__new__(GoogleCalendarClient)
+    client.service = SlowService(PAGES)
+    client.credentials = None
+    client.calendar_id = "primary"
+    return client
+
+
+async def _handler_latencies(task):
+    """Имитирует обработчик апдейтов: замеряет, насколько опаздывает каждый его шаг."""
+    latencies = []
+    while not task.done():
+        started = time.monotonic()
+        await asyncio.sleep(0.01)
+        latencies.append(time.monotonic() - started - 0.01)
+    return latencies
+
+
+def test_handler_latency_stays_flat_during_slow_sync():
+    async def scenario():
+        started = time.monotonic()
+        sync = asyncio.ensure_future(_client().fetch_events(days=30))
+        latencies = await _handler_latencies(sync)
+        return await sync, time.monotonic() - started, latencies
+
+    events, elapsed, latencies = asyncio.run(scenario())
+    assert [event["id"] for event in events] == ["a", "b", "c"]
+    # Синхронизация действительно медленная, а обработчик всё это время отвечал.
+    assert elapsed >= len(PAGES) * SLOW_PAGE_SECONDS
+    assert len(latencies) > 10
+    assert max(latencies) < HANDLER_BOUND_SECONDS
+
+
+def test_hung_request_is_abandoned_after_timeout(monkeypatch):
+    monkeypatch.setattr(config, "GOOGLE_API_TIMEOUT", 0.05)
+
+    async def scenario():
+        started = time.monotonic()
+        sync = asyncio.ensure_future(_client().fetch_events(days=30))
+        latencies = await _handler_latencies(sync)
+        return await sync, time.monotonic() - started, latencies
+
+    events, elapsed, latencies = asyncio.run(scenario())
+    assert events == []
+    assert elapsed < SLOW_PAGE_SECONDS
+    assert max(latencies, default=0.0) < HANDLER_BOUND_SECONDS
@@ -0,0 +1,126 @@
+"""Тесты постраничного обхода events().list в services.google_calendar (без Google API)."""
+
+import asyncio
+
+import pytest
+
+from services.google_calendar import GoogleCalendarClient
+
+
+class FakeEvents:
+    """`service.events()`: `list(**kwargs)` возвращает параметры запроса как «request»."""
+
+    def list(self, **kwargs):
+        return kwargs
+
+
+class FakeService:
+    def events(self):
+        return FakeEvents()
+
+
+class FakeApi:
+    """Отвечает на запросы страниц по `pageToken`; ответ можно задержать."""
+
+    def __init__(self, pages, gated=False):
+        self.pages = pages
+        self.requests = []
+        self.cancelled = []
+        self.gates = {token: asyncio.Event() for token in pages}
+        self.gated = gated
+
+    async def execute(self, request):
+        token = request["pageToken"]
+        self.requests.append(request)
+        if self.gated:
+            try:
+                await self.gates[token].wait()
+            except asyncio.CancelledError:
+                self.cancelled.append(token)
+                raise
+        return self.pages[token]
+
+
+async def _settle():
+    """Даёт фоновым задачам (предзагрузке страницы) дойти до ожидания."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def _client(api):
+    client = GoogleCalendarClient.__new__(GoogleCalendarClient)
+    client.service = FakeService()
+    client.calendar_id = "primary"
+    client._execute = api.execute
+    return client
+
+
+PAGES = {
+    None: {"items": [1, 2], "nextPageToken": "p2"},
+    "p2": {"items": [3], "nextPageToken": "p3"},
+    "p3": {"items": [4], "nextSyncToken": "sync"},
+}
+
+
+def test_walks_all_pages_in_order():
+    api = FakeApi(PAGES)
+
+    async def scenario():
+        return [page async for page in _client(api)._iter_pages("cal", maxResults=2)]
+
+    results = asyncio.run(scenario())
+    assert [page["items"] for page in results] == [[1, 2], [3], [4]]
+    assert [request["pageToken"] for request in api.requests] == [None, "p2", "p3"]
+    assert all(request["calendarId"] == "cal" for request in api.requests)
+    assert all(request["singleEvents"] is True and request["maxResults"] == 2 for request in api.requests)
+
+
+def test_next_page_is_requested_before_current_is_processed():
+    api = FakeApi(PAGES, gated=True)
+
+    async def scenario():
+        pages = _client(api)._iter_pages("cal")
+        first = asyncio.ensure_future(pages.__anext__())
+        await _settle()
+        api.gates[None].set()
+        page = await first
+        assert page["items"] == [1, 2]
+        # Вызывающий код ещё обрабатывает первую страницу, а вторая уже запрошена.
+        await _settle()
+        assert [request["pageToken"] for request in api.requests] == [None, "p2"]
+        # Третья страница не запрашивается, пока не получена вторая:
+        # в памяти не больше двух страниц.
+        await _settle()
+        assert len(api.requests) == 2
+        await pages.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_prefetch_is_cancelled_when_consumer_stops():
+    api = FakeApi(PAGES, gated=True)
+
+    async def scenario():
+        pages = _client(api)._iter_pages("cal")
+        first = asyncio.ensure_future(pages.__anext__())
+        await _settle()
+        api.gates[None].set()
+        await first
+        await _settle()
+        await pages.aclose()
+        await _settle()
+
+    asyncio.run(scenario())
+    assert api.cancelled == ["p2"]
+
+
+def test_error_on_page_is_propagated():
+    pages = dict(PAGES)
+    del pages["p2"]
+    api = FakeApi(pages)
+
+    async def scenario():
+        return [page async for page in _client(api)._iter_pages("cal")]
+
+    with pytest.raises(KeyError):
+        asyncio.run(scenario())
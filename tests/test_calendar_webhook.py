@@ -0,0 +1,166 @@
+"""Тесты приёма push‑уведомлений services.calendar_webhook (без БД и Google API)."""
+
+import asyncio
+
+import pytest
+
+from services import calendar_webhook
+from utils.http_server import HttpRequest
+
+CHANNEL = {"channel_id": "ch-1", "calendar_id": "cal@example.com", "token": "secret"}
+
+
+def _request(channel_id="ch-1", token="secret", state="exists"):
+    headers = {
+        "x-goog-channel-id": channel_id,
+        "x-goog-channel-token": token,
+        "x-goog-resource-state": state,
+    }
+    return HttpRequest(method="POST", path="/google/push", headers=headers)
+
+
+@pytest.fixture
+def channels(monkeypatch):
+    calls = {"touched": [], "notified": []}
+
+    async def get_channel(channel_id):
+        return CHANNEL if channel_id == CHANNEL["channel_id"] else None
+
+    async def touch_channel(channel_id):
+        calls["touched"].append(channel_id)
+
+    async def notify_calendar_push(channel, calendar_id):
+        calls["notified"].append((channel, calendar_id))
+
+    monkeypatch.setattr(calendar_webhook, "get_channel", get_channel)
+    monkeypatch.setattr(calendar_webhook, "touch_channel", touch_channel)
+    monkeypatch.setattr(calendar_webhook, "notify_calendar_push", notify_calendar_push)
+    return calls
+
+
+def test_valid_push_is_passed_to_leader(channels):
+    response = asyncio.run(calendar_webhook.handle_push(_request()))
+    assert response.status == 200
+    assert channels["touched"] == ["ch-1"]
+    assert channels["notified"] == [(calendar_webhook.PUSH_CHANNEL, "cal@example.com")]
+
+
+@pytest.mark.parametrize(
+    "request_kwargs",
+    [{"token": "wrong"}, {"token": ""}, {"channel_id": "unknown"}, {"channel_id": ""}],
+)
+def test_unknown_channel_or_wrong_token_is_rejected(channels, request_kwargs):
+    response = asyncio.run(calendar_webhook.handle_push(_request(**request_kwargs)))
+    assert response.status == 403
+    assert channels["notified"] == []
+
+
+def test_sync_state_is_acknowledged_without_sync(channels):
+    response = asyncio.run(calendar_webhook.handle_push(_request(state="sync")))
+    assert response.status == 200
+    assert channels["touched"] == []
+    assert channels["notified"] == []
+
+
+class FakeSync:
+    """`sync_calendar_incremental`, который можно задержать до `release()`."""
+
+    def __init__(self):
+        self.calls = []
+        self.started = asyncio.Event()
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    def hold(self):
+        self.gate.clear()
+
+    def release(self):
+        self.gate.set()
+
+    async def __call__(self, calendar_id):
+        self.calls.append(calendar_id)
+        self.started.set()
+        await self.gate.wait()
+        return 0
+
+
+@pytest.fixture
+def push_sync(monkeypatch):
+    monkeypatch.setattr(calendar_webhook, "_DEBOUNCE_SECONDS", 0.01)
+    monkeypatch.setattr(calendar_webhook, "get_calendar_ids", lambda: ["cal@example.com"])
+    calendar_webhook._sync_tasks.clear()
+    calendar_webhook._resync_requested.clear()
+    yield monkeypatch
+    calendar_webhook._sync_tasks.clear()
+    calendar_webhook._resync_requested.clear()
+
+
+async def _wait_idle(calendar_id="cal@example.com"):
+    await calendar_webhook._sync_tasks[calendar_id]
+
+
+def test_burst_of_pushes_is_debounced_into_one_sync(push_sync):
+    async def scenario():
+        sync = FakeSync()
+        push_sync.setattr(calendar_webhook, "sync_calendar_incremental", sync)
+        for _ in range(5):
+            calendar_webhook.schedule_sync("cal@example.com")
+        await _wait_idle()
+        return sync.calls
+
+    assert asyncio.run(scenario()) == ["cal@example.com"]
+
+
+def test_push_during_running_sync_triggers_one_more_pass(push_sync):
+    async def scenario():
+        sync = FakeSync()
+        push_sync.setattr(calendar_webhook, "sync_calendar_incremental", sync)
+        sync.hold()
+        calendar_webhook.schedule_sync("cal@example.com")
+        await sync.started.wait()
+        # Синхронизация занята: новые уведомления не запускают вторую
+        # параллельно, а копятся в один повторный проход.
+        for _ in range(3):
+            calendar_webhook.schedule_sync("cal@example.com")
+        assert len(sync.calls) == 1
+        sync.release()
+        await _wait_idle()
+        return sync.calls
+
+    assert asyncio.run(scenario()) == ["cal@example.com", "cal@example.com"]
+
+
+def test_sync_error_does_not_drop_pending_resync(push_sync):
+    async def scenario():
+        calls = []
+        started = asyncio.Event()
+        gate = asyncio.Event()
+
+        async def failing_sync(calendar_id):
+            calls.append(calendar_id)
+            started.set()
+            await gate.wait()
+            if len(calls) == 1:
+                raise RuntimeError("Google недоступен")
+            return 0
+
+        push_sync.setattr(calendar_webhook, "sync_calendar_incremental", failing_sync)
+        calendar_webhook.schedule_sync("cal@example.com")
+        await started.wait()
+        calendar_webhook.schedule_sync("cal@example.com")
+        gate.set()
+        await _wait_idle()
+        return calls
+
+    assert len(asyncio.run(scenario())) == 2
+
+
+def test_push_for_removed_calendar_is_ignored(push_sync):
+    async def scenario():
+        sync = FakeSync()
+        push_sync.setattr(calendar_webhook, "sync_calendar_incremental", sync)
+        calendar_webhook.schedule_sync("old@example.com")
+        await _wait_idle("old@example.com")
+        return sync.calls
+
+    assert asyncio.run(scenario()) == []
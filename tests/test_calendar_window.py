@@ -0,0 +1,81 @@
+"""Тесты окна инкрементальной синхронизации services.google_calendar (без Google API и БД)."""
+
+import asyncio
+import datetime
+
+import pytest
+
+from services import google_calendar
+
+
+class FakeResolver:
+    def report_unresolved(self):
+        pass
+
+
+class FakeClient:
+    """Отдаёт одну страницу изменений и запоминает сохранённые события."""
+
+    def __init__(self, items, stored_ids):
+        self.items = items
+        self.stored_ids = set(stored_ids)
+        self.saved = []
+
+    async def iter_changed_event_pages(self, sync_token, calendar_id=None):
+        yield {"items": self.items, "nextSyncToken": "next"}
+
+    async def known_event_ids(self, google_event_ids):
+        return {event_id for event_id in google_event_ids if event_id in self.stored_ids}
+
+    async def save_events_to_db(self, events, resolver=None, calendar_id=None):
+        self.saved.extend(event["id"] for event in events)
+
+
+def _event(event_id, days_ahead):
+    start = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=days_ahead)
+    return {"id": event_id, "status": "confirmed", "start": {"dateTime": start.isoformat()}}
+
+
+@pytest.fixture(autouse=True)
+def window(monkeypatch):
+    monkeypatch.setattr(google_calendar.config, "CALENDAR_SYNC_WINDOW_DAYS", 30)
+
+    async def load():
+        return FakeResolver()
+
+    monkeypatch.setattr(google_calendar.AuditoryResolver, "load", load)
+
+
+def _sync(client):
+    return asyncio.run(google_calendar._sync_changes(client, "cal", "token"))
+
+
+def test_new_event_beyond_window_is_skipped():
+    client = FakeClient([_event("inside", 5), _event("far", 90)], stored_ids=[])
+    processed, next_token = _sync(client)
+    assert client.saved == ["inside"]
+    assert (processed, next_token) == (1, "next")
+
+
+def test_stored_event_moved_beyond_window_is_updated():
+    # Мероприятие было через 5 дней и сохранено в БД, его перенесли на 90 дней.
+    client = FakeClient([_event("moved", 90)], stored_ids=["moved"])
+    _sync(client)
+    assert client.saved == ["moved"]
+
+
+def test_cancelled_event_without_start_is_kept():
+    client = FakeClient([{"id": "gone", "status": "cancelled"}], stored_ids=[])
+    _sync(client)
+    assert client.saved == ["gone"]
+
+
+def test_all_day_event_uses_date():
+    far = (datetime.date.today() + datetime.timedelta(days=60)).isoformat()
+    near = (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
+    client = FakeClient(
+        [{"id": "far", "start": {"date": far}}, {"id": "near", "start": {"date": near}}],
+        stored_ids=[],
+    )
+    _sync(client)
+    assert client.saved == ["near"]
@@ -0,0 +1,84 @@
+"""Тесты маршрутизатора callback‑данных handlers.router."""
+
+import asyncio
+
+import pytest
+
+from handlers.router import CallbackArgumentError, CallbackRouter
+
+
+async def _noop(*args, **kwargs):
+    return None
+
+
+@pytest.fixture
+def router():
+    router = CallbackRouter()
+    router.exact("help", _noop)
+    router.exact("complete_all", _noop)
+    router.prefix("complete_", _noop, event_id=int)
+    router.prefix("engineer_complete_", _noop, event_id=int)
+    router.prefix("assign_to_", _noop, event_id=int, engineer_id=str)
+    return router
+
+
+def test_exact_match_wins_over_prefix(router):
+    assert router.resolve("help").name == "help"
+    assert router.resolve("complete_all").name == "complete_all"
+
+
+def test_longest_prefix_wins(router):
+    assert router.resolve("complete_42").name == "complete_<event_id>"
+    assert router.resolve("engineer_complete_42").name == "engineer_complete_<event_id>"
+
+
+def test_unknown_data_is_not_resolved(router):
+    assert router.resolve("unknown") is None
+    assert router.resolve("engineer_42") is None
+    assert router.resolve("") is None
+
+
+def test_parse_converts_types(router):
+    assert router.resolve("complete_42").parse("complete_42") == {"event_id": 42}
+    route = router.resolve("assign_to_7_123")
+    assert route.parse("assign_to_7_123") == {"event_id": 7, "engineer_id": "123"}
+
+
+def test_last_argument_keeps_underscores(router):
+    route = router.resolve("assign_to_7_a_b")
+    assert route.parse("assign_to_7_a_b") == {"event_id": 7, "engineer_id": "a_b"}
+
+
+@pytest.mark.parametrize("data", ["complete_abc", "assign_to_7", "assign_to__x", "complete_"])
+def test_parse_rejects_malformed_arguments(router, data):
+    route = router.resolve(data)
+    with pytest.raises(CallbackArgumentError):
+        route.parse(data)
+
+
+def test_duplicate_registration_is_rejected(router):
+    with pytest.raises(ValueError):
+        router.exact("help", _noop)
+    with pytest.raises(ValueError):
+        router.prefix("complete_", _noop, event_id=int)
+    with pytest.raises(ValueError):
+        router.prefix("complete", _noop)
+
+
+def test_dispatch_passes_arguments_and_counts_stats():
+    calls = []
+
+    async def handler(update, context, event_id):
+        calls.append((update, context, event_id))
+
+    router = CallbackRouter()
+    router.prefix("complete_", handler, event_id=int)
+
+    async def scenario():
+        assert await router.dispatch("complete_5", "update", "context") is True
+        assert await router.dispatch("complete_x", "update", "context") is False
+        assert await router.dispatch("other", "update", "context") is False
+
+    asyncio.run(scenario())
+    assert calls == [("update", "context", 5)]
+    assert router.stats()["complete_<event_id>"].count == 1
@@ -0,0 +1,98 @@
+"""Тесты таблицы inline‑кнопок handlers.callback._build_callback_router.
+
+Кроме разбора кнопок здесь же — замер разбора `callback_data` роутером
+против прежней цепочки `if/elif` (копия `_old_chain`). Запуск с выводом
+времени:
+    python -m pytest -q -s tests/test_callback_routes.py
+"""
+
+import timeit
+
+import pytest
+
+from handlers import callback
+from handlers.admin import admin_callbacks
+from handlers.callback import callback_router
+
+
+def test_set_status_keeps_trailing_segments_in_status():
+    # Прежняя цепочка брала parts[2] и молча отбрасывала остальное.
+    route = callback_router.resolve("set_12_red_extra")
+    assert route.parse("set_12_red_extra") == {"auditory_id": "12", "status": "red_extra"}
+    assert route.parse("set_12_green") == {"auditory_id": "12", "status": "green"}
+
+
+def test_assign_to_keeps_trailing_segments_in_engineer_id():
+    # Прежняя цепочка брала parts[3] и молча отбрасывала остальное.
+    route = callback_router.resolve("assign_to_5_7_9")
+    assert route.parse("assign_to_5_7_9") == {"event_id": "5", "engineer_id": "7_9"}
+
+
+def test_admin_exact_route_wins_over_prefix(monkeypatch):
+    # Прежняя цепочка проверяла `complete_` раньше таблицы admin_callbacks,
+    # и такая кнопка ушла бы в complete_event_manually с int("all").
+    async def complete_all(update, context):
+        return None
+
+    monkeypatch.setitem(callback.admin_callbacks, "complete_all", complete_all)
+    router = callback._build_callback_router()
+    assert router.resolve("complete_all").name == "complete_all"
+    assert router.resolve("complete_42").name == "complete_<event_id>"
+
+
+def test_every_admin_callback_is_routed():
+    for data in admin_callbacks:
+        assert callback_router.resolve(data).name == data
+
+
+def _old_chain(data):
+    """Копия разбора из прежнего `callback_handler` (без вызова обработчиков)."""
+    if data == "list_auditories": return 1
+    elif data == "schedule_menu": return 1
+    elif data == "today_schedule": return 1
+    elif data == "tomorrow_schedule": return 1
+    elif data == "week_schedule": return 1
+    elif data.startswith("aud_"): return data[4:]
+    elif data.startswith("set_"): return data.split("_")
+    elif data == "back_to_main": return 1
+    elif data == "help": return 1
+    elif data == "first_start": return 1
+    elif data == "assign_list": return 1
+    elif data.startswith("assign_event_"): return data.split("_")[2]
+    elif data.startswith("assign_to_"): return data.split("_")
+    elif data.startswith("confirm_"): return int(data.split("_")[1])
+    elif data.startswith("replace_"): return int(data.split("_")[1])
+    elif data.startswith("accept_"): return data.split("_")[1]
+    elif data.startswith("decline_"): return data.split("_")[1]
+    elif data.startswith("complete_"): return int(data.split("_")[1])
+    elif data in admin_callbacks: return 1
+    elif data == "help_main": return 1
+    elif data == "help_commands": return 1
+    elif data == "help_roles": return 1
+    elif data == "help_statuses": return 1
+    elif data == "help_schedule": return 1
+    elif data == "help_assign": return 1
+    elif data == "help_notifications": return 1
+    elif data == "help_faq": return 1
+    elif data.startswith("engineer_complete_"): return int(data.split("_")[2])
+    elif data.startswith("assign_multi_"): return data.split("_")[2]
+    elif data.startswith("multi_toggle_"): return data.split("_")
+    elif data.startswith("multi_confirm_"): return data.split("_")[2]
+    return None
+
+
+def _best_ns(func, number=20_000, repeat=5):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e9
+
+
+@pytest.mark.parametrize(
+    "data",
+    ["list_auditories", "aud_12", "help_faq", "engineer_complete_42", "multi_toggle_4_77", "admin_test_sync"],
+)
+def test_dispatch_microbenchmark(data):
+    chain = _best_ns(lambda: _old_chain(data))
+    router = _best_ns(lambda: callback_router.resolve(data).parse(data))
+    print(f"\n{data:22s} цепочка {chain:6.0f} нс, роутер {router:6.0f} нс")
+    # Кнопки из конца цепочки роутер разбирает не медленнее, чем она.
+    if data in ("help_faq", "admin_test_sync"):
+        assert router < chain * 1.5
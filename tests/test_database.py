@@ -0,0 +1,26 @@
+"""Тесты статистики запросов database.InstrumentedPool (без БД)."""
+
+import database
+from database import InstrumentedPool, _query_name
+
+
+def test_query_name_strips_literals():
+    assert _query_name("SELECT * FROM users\n  WHERE telegram_id = 42") == "SELECT * FROM users WHERE telegram_id = ?"
+    assert _query_name("SELECT * FROM t WHERE id IN (1, 2, 3) AND x = $1") == "SELECT * FROM t WHERE id IN (?...) AND x = $1"
+    assert _query_name("UPDATE t SET s = 'it''s' WHERE id = $2") == "UPDATE t SET s = ? WHERE id = $2"
+
+
+def test_queries_with_different_literals_share_stats():
+    pool = InstrumentedPool(None, slow_query_seconds=60)
+    for telegram_id in range(100):
+        pool._observe("caller", f"SELECT * FROM users WHERE telegram_id = {telegram_id}", (), 0.001, 1, False)
+    assert len(pool.queries) == 1
+
+
+def test_query_stats_are_capped(monkeypatch):
+    monkeypatch.setattr(database, "_MAX_QUERY_STATS", 3)
+    pool = InstrumentedPool(None, slow_query_seconds=60)
+    for table in ("a", "b", "c", "d", "e"):
+        pool._observe("caller", f"SELECT * FROM {table}", (), 0.001, 1, False)
+    assert len(pool.queries) == 4
+    assert pool.queries[database._OTHER_QUERIES].latency.count == 2
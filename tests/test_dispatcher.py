@@ -0,0 +1,147 @@
+"""Тесты services.dispatcher.NotificationDispatcher с поддельным ботом.
+
+Время виртуальное (`monotonic`): паузы лимитов и повторов не ждут
+по‑настоящему, а сдвигают часы, поэтому по `monotonic.now` видно, сколько
+заняла бы рассылка.
+"""
+
+import asyncio
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+from services.dispatcher import GROUP_CHAT_RATE, NotificationDispatcher
+
+
+class FakeBot:
+    """Записывает отправленные сообщения; перед ответом выдаёт ошибки из `failures`."""
+
+    def __init__(self, clock, failures=None):
+        self.clock = clock
+        self.failures = {chat_id: list(errors) for chat_id, errors in (failures or {}).items()}
+        self.sent = []
+        self.attempts = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.attempts += 1
+        errors = self.failures.get(chat_id)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append((self.clock(), chat_id, text))
+        return SimpleNamespace(message_id=len(self.sent), chat_id=chat_id)
+
+
+def _dispatcher(bot, monotonic, **kwargs):
+    kwargs.setdefault("global_rate", 30)
+    kwargs.setdefault("chat_rate", 1)
+    return NotificationDispatcher(bot, clock=monotonic, **kwargs)
+
+
+def _send_many(dispatcher, messages):
+    return asyncio.run(dispatcher.send_many(messages))
+
+
+def _times(bot, chat_id):
+    return [sent_at for sent_at, chat, _ in bot.sent if chat == chat_id]
+
+
+def test_private_chat_gets_one_message_per_second(monotonic):
+    bot = FakeBot(monotonic)
+    dispatcher = _dispatcher(bot, monotonic)
+    _send_many(dispatcher, [{"chat_id": 1, "text": str(i)} for i in range(4)])
+
+    sent = _times(bot, 1)
+    assert [b - a for a, b in zip(sent, sent[1:])] == pytest.approx([1.0, 1.0, 1.0])
+    # Порядок сообщений в чате сохраняется.
+    assert [text for _, _, text in bot.sent] == ["0", "1", "2", "3"]
+
+
+def test_group_chat_gets_twenty_messages_per_minute(monotonic):
+    bot = FakeBot(monotonic)
+    dispatcher = _dispatcher(bot, monotonic)
+    _send_many(dispatcher, [{"chat_id": -100, "text": str(i)} for i in range(3)])
+
+    sent = _times(bot, -100)
+    assert [b - a for a, b in zip(sent, sent[1:])] == pytest.approx([1 / GROUP_CHAT_RATE] * 2)
+
+
+def test_different_chats_do_not_wait_for_each_other(monotonic):
+    bot = FakeBot(monotonic)
+    dispatcher = _dispatcher(bot, monotonic)
+    _send_many(dispatcher, [{"chat_id": chat_id, "text": "hi"} for chat_id in range(1, 11)])
+    assert len(bot.sent) == 10
+    assert monotonic.sleeps == []
+
+
+def test_retry_after_waits_requested_time_and_resends(monotonic):
+    bot = FakeBot(monotonic, failures={1: [RetryAfter(timedelta(seconds=7))]})
+    dispatcher = _dispatcher(bot, monotonic)
+
+    message = asyncio.run(dispatcher.send_message(chat_id=1, text="hi"))
+    assert message.message_id == 1
+    assert bot.attempts == 2
+    assert 7 in monotonic.sleeps
+
+
+def test_retry_after_is_raised_when_retries_are_exhausted(monotonic):
+    bot = FakeBot(monotonic, failures={1: [RetryAfter(timedelta(seconds=1))] * 3})
+    dispatcher = _dispatcher(bot, monotonic, max_retries=2)
+
+    with pytest.raises(RetryAfter):
+        asyncio.run(dispatcher.send_message(chat_id=1, text="hi"))
+    assert bot.attempts == 3
+
+
+def test_network_errors_are_retried_with_backoff(monotonic):
+    bot = FakeBot(monotonic, failures={1: [NetworkError("reset"), TimedOut()]})
+    dispatcher = _dispatcher(bot, monotonic)
+
+    asyncio.run(dispatcher.send_message(chat_id=1, text="hi"))
+    assert bot.attempts == 3
+    backoff = [seconds for seconds in monotonic.sleeps if seconds in (1, 2)]
+    assert backoff == [1, 2]
+
+
+@pytest.mark.parametrize("error", [BadRequest("chat not found"), Forbidden("blocked")])
+def test_permanent_errors_are_not_retried(monotonic, error):
+    bot = FakeBot(monotonic, failures={1: [error]})
+    dispatcher = _dispatcher(bot, monotonic)
+
+    with pytest.raises(type(error)):
+        asyncio.run(dispatcher.send_message(chat_id=1, text="hi"))
+    assert bot.attempts == 1
+
+
+def test_send_many_returns_errors_in_order(monotonic):
+    bot = FakeBot(monotonic, failures={2: [Forbidden("blocked")]})
+    dispatcher = _dispatcher(bot, monotonic)
+
+    results = _send_many(dispatcher, [{"chat_id": chat_id, "text": "hi"} for chat_id in (1, 2, 3)])
+    assert [getattr(result, "chat_id", None) for result in results] == [1, None, 3]
+    assert isinstance(results[1], Forbidden)
+
+
+def test_throughput_stays_within_global_limit(monotonic):
+    """Замер: рассылка 1000 пользователям при лимите 25 сообщений в секунду."""
+    count, rate = 1000, 25
+    bot = FakeBot(monotonic)
+    dispatcher = _dispatcher(bot, monotonic, global_rate=rate)
+
+    started_virtual, started_wall = monotonic.now, time.perf_counter()
+    _send_many(dispatcher, [{"chat_id": chat_id, "text": "hi"} for chat_id in range(1, count + 1)])
+    virtual = monotonic.now - started_virtual
+    wall = time.perf_counter() - started_wall
+    print(
+        f"\n{count} сообщений: {count / virtual:.1f} сообщ./с по лимитам Telegram, "
+        f"накладные расходы диспетчера {wall / count * 1e6:.0f} мкс на сообщение"
+    )
+
+    assert len(bot.sent) == count
+    # Первые `rate` сообщений уходят сразу (запас бакета), дальше — ровно по лимиту.
+    assert virtual == pytest.approx((count - rate) / rate)
+    times = [sent_at for sent_at, _, _ in bot.sent]
+    for i in range(len(times) - rate * 2):
+        assert times[i + rate * 2] - times[i] >= 1.0 - 1e-9
@@ -0,0 +1,124 @@
+"""Замер пакетной записи событий GoogleCalendarClient.save_events_to_db.
+
+Сравнивает запись страницы из 1 000 и 10 000 событий одним COPY + MERGE
+с прежней схемой «один INSERT ... ON CONFLICT на событие». Нужна настоящая
+БД со схемой из migrations/: задайте `TEST_DATABASE_URL`. Тестовые строки
+(`google_event_id` с префиксом `bench-`) удаляются после замера.
+
+Запуск с выводом времени:
+    TEST_DATABASE_URL=postgresql://... python -m pytest -q -s tests/test_event_bulk_write.py
+"""
+
+import asyncio
+import datetime
+import os
+import time
+
+import asyncpg
+import pytest
+
+from repositories.auditories import AuditoryResolver
+from services import google_calendar
+from services.google_calendar import GoogleCalendarClient
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("TEST_DATABASE_URL"),
+    reason="TEST_DATABASE_URL не задан: замер записи требует настоящей БД",
+)
+
+PREFIX = "bench-"
+
+# Прежняя запись: отдельный запрос на каждое событие.
+_PER_EVENT_UPSERT_SQL = """
+    INSERT INTO calendar_events
+    (google_event_id, auditory_id, title, description,
+     start_time, end_time, organizer, status, last_sync)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW())
+    ON CONFLICT (google_event_id) DO UPDATE SET
+        auditory_id = EXCLUDED.auditory_id,
+        title = EXCLUDED.title,
+        description = EXCLUDED.description,
+        start_time = EXCLUDED.start_time,
+        end_time = EXCLUDED.end_time,
+        organizer = EXCLUDED.organizer,
+        status = EXCLUDED.status,
+        last_sync = NOW()
+"""
+
+
+def _events(count, tag):
+    start = datetime.datetime(2026, 3, 2, 9, 0, tzinfo=datetime.timezone.utc)
+    events = []
+    for i in range(count):
+        begins = start + datetime.timedelta(minutes=30 * i)
+        events.append({
+            "id": f"{PREFIX}{tag}-{i}",
+            "summary": f"Мероприятие {i}",
+            "description": "Замер пакетной записи",
+            "start": {"dateTime": begins.isoformat()},
+            "end": {"dateTime": (begins + datetime.timedelta(hours=1)).isoformat()},
+            "organizer": {"email": "bench@example.com"},
+            "etag": f'"{i}"',
+            "updated": "2026-03-01T00:00:00Z",
+        })
+    return events
+
+
+def _client():
+    client = GoogleCalendarClient.__new__(GoogleCalendarClient)
+    client.calendar_id = "bench@example.com"
+    return client
+
+
+async def _per_event_write(pool, client, events):
+    for event in events:
+        row = client._parse_event(event)
+        await pool.execute(
+            _PER_EVENT_UPSERT_SQL,
+            row["google_event_id"],
+            None,
+            row["title"],
+            row["description"],
+            row["start_time"],
+            row["end_time"],
+            row["organizer"],
+            row["status"],
+        )
+
+
+async def _measure(count, monkeypatch):
+    pool = await asyncpg.create_pool(dsn=os.environ["TEST_DATABASE_URL"], min_size=1, max_size=2)
+    monkeypatch.setattr(google_calendar, "get_db_pool", lambda: pool)
+    client = _client()
+    resolver = AuditoryResolver([])
+    try:
+        started = time.perf_counter()
+        await _per_event_write(pool, client, _events(count, "row"))
+        per_event = time.perf_counter() - started
+
+        events = _events(count, "batch")
+        started = time.perf_counter()
+        stats = await client.save_events_to_db(events, resolver=resolver)
+        batch = time.perf_counter() - started
+
+        # Повторная синхронизация тех же событий ничего не перезаписывает.
+        started = time.perf_counter()
+        repeat = await client.save_events_to_db(events, resolver=resolver)
+        unchanged = time.perf_counter() - started
+    finally:
+        await pool.execute("DELETE FROM calendar_events WHERE google_event_id LIKE $1", PREFIX + "%")
+        await pool.close()
+
+    print(
+        f"\n{count} событий: по одному {per_event:.2f} с, пакетом {batch:.2f} с "
+        f"(x{per_event / batch:.1f}), повтор без изменений {unchanged:.2f} с"
+    )
+    return stats, repeat, per_event, batch
+
+
+@pytest.mark.parametrize("count", [1_000, 10_000])
+def test_batch_write_is_faster_than_per_event_upsert(count, monkeypatch):
+    stats, repeat, per_event, batch = asyncio.run(_measure(count, monkeypatch))
+    assert stats["inserted"] == count
+    assert repeat["unchanged"] == count and repeat["updated"] == 0
+    assert batch < per_event
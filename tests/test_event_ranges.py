@@ -0,0 +1,89 @@
+"""Тесты полуинтервалов времени repositories.events.
+
+Проверка плана запроса выполняется только с настоящей БД: задайте
+`TEST_DATABASE_URL` (схема из migrations/ должна быть применена).
+"""
+
+import asyncio
+import json
+import os
+from datetime import date, datetime
+
+import asyncpg
+import pytest
+
+from repositories import events
+from repositories.events import day_range, time_range_sql
+
+# Индексы по calendar_events.start_time (migrations/v0.2.0, v0.5.0):
+# планировщик вправе выбрать любой из них.
+START_TIME_INDEXES = {"idx_calendar_events_date", "idx_calendar_events_start_time_status"}
+
+NO_DATABASE_REASON = "TEST_DATABASE_URL не задан: проверки EXPLAIN по индексу start_time пропущены"
+
+
+def test_time_range_sql_is_half_open():
+    assert time_range_sql("ce.start_time", 1) == "ce.start_time >= $1 AND ce.start_time < $2"
+    assert time_range_sql("start_time", 3) == "start_time >= $3 AND start_time < $4"
+
+
+def test_day_range_covers_whole_days():
+    assert day_range(date(2026, 3, 2)) == (datetime(2026, 3, 2), datetime(2026, 3, 3))
+    assert day_range(date(2026, 2, 27), days=3) == (datetime(2026, 2, 27), datetime(2026, 3, 2))
+
+
+def test_range_filters_do_not_wrap_start_time():
+    for sql in (
+        events._EVENTS_BETWEEN_SQL,
+        events._EVENTS_WITH_ASSIGNMENTS_BETWEEN_SQL,
+        events._ASSIGNMENT_STATS_BETWEEN_SQL,
+        events._UNASSIGNED_EVENTS_BETWEEN_SQL,
+    ):
+        assert "DATE(" not in sql.upper()
+        assert "ce.start_time >= $1 AND ce.start_time < $2" in sql
+    assert "DATE(" not in events._ENGINEER_EVENTS_BETWEEN_SQL.upper()
+    assert "ce.start_time >= $2 AND ce.start_time < $3" in events._ENGINEER_EVENTS_BETWEEN_SQL
+
+
+def _plan_uses_index(plan, index_names):
+    if isinstance(plan, dict):
+        if plan.get("Index Name") in index_names:
+            return True
+        return any(_plan_uses_index(value, index_names) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_plan_uses_index(value, index_names) for value in plan)
+    return False
+
+
+async def _explain(sql, *args):
+    conn = await asyncpg.connect(dsn=os.environ["TEST_DATABASE_URL"])
+    try:
+        async with conn.transaction():
+            # На маленькой тестовой таблице планировщик выбрал бы seq scan,
+            # а вложенный цикл по первичному ключу скрыл бы фильтр по
+            # start_time: calendar_events должна читаться по диапазону.
+            await conn.execute("SET LOCAL enable_seqscan = off")
+            await conn.execute("SET LOCAL enable_nestloop = off")
+            plan = await conn.fetchval("EXPLAIN (FORMAT JSON) " + sql, *args)
+    finally:
+        await conn.close()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+DAY = day_range(date(2026, 3, 2))
+
+# Все запросы, в которых `DATE(start_time)` заменён полуинтервалом.
+RANGE_QUERIES = [
+    pytest.param(events._EVENTS_WITH_ASSIGNMENTS_BETWEEN_SQL, DAY, id="morning_summary"),
+    pytest.param(events._ASSIGNMENT_STATS_BETWEEN_SQL, DAY, id="daily_report"),
+    pytest.param(events._UNASSIGNED_EVENTS_BETWEEN_SQL, DAY, id="evening_reminder"),
+    pytest.param(events._EVENTS_BETWEEN_SQL, DAY, id="assign_and_schedule"),
+    pytest.param(events._ENGINEER_EVENTS_BETWEEN_SQL, (123456789, *DAY), id="my_tasks"),
+]
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason=NO_DATABASE_REASON)
+@pytest.mark.parametrize("sql, args", RANGE_QUERIES)
+def test_range_query_uses_start_time_index(sql, args):
+    plan = asyncio.run(_explain(sql, *args))
+    assert _plan_uses_index(plan, START_TIME_INDEXES), json.dumps(plan, indent=2)
@@ -0,0 +1,102 @@
+"""Тесты services.job_runner (без БД)."""
+
+import asyncio
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from services import job_runner
+from services.job_runner import JobRunner, JobSpec, latest_slot, next_slot
+
+MOSCOW = ZoneInfo("Europe/Moscow")
+BERLIN = ZoneInfo("Europe/Berlin")
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Подменяет таблицу scheduled_job_runs словарём job_name -> last_slot."""
+    table = {}
+    records = []
+
+    async def claim_job_slot(job_name, slot, started_at, catch_up=False):
+        last_slot = table.get(job_name)
+        if last_slot is None and catch_up:
+            return False
+        if last_slot is not None and last_slot >= slot:
+            return False
+        table[job_name] = slot
+        return True
+
+    async def record_job_run(job_name, slot, duration_sec, error):
+        records.append((job_name, slot, error))
+
+    monkeypatch.setattr(job_runner, "claim_job_slot", claim_job_slot)
+    monkeypatch.setattr(job_runner, "record_job_run", record_job_run)
+    return table, records
+
+
+def test_slots_follow_local_time_across_dst():
+    spec = JobSpec("morning_summary", time(9, 0), None)
+    # 29.03.2026 в Берлине переход на летнее время: 9:00 остаётся 9:00.
+    before = datetime(2026, 3, 28, 10, 0, tzinfo=BERLIN)
+    slot = next_slot(spec, before)
+    assert slot.hour == 9 and slot.day == 29
+    assert slot.utcoffset() == timedelta(hours=2)
+    assert latest_slot(spec, before).day == 28
+
+
+def test_system_timezone_is_not_a_fixed_offset(monkeypatch):
+    monkeypatch.setattr(job_runner.config, "TIMEZONE", "")
+    assert isinstance(job_runner.get_timezone(), (ZoneInfo, job_runner.timezone))
+    monkeypatch.setattr(job_runner.config, "TIMEZONE", "Europe/Moscow")
+    assert job_runner.get_timezone() == MOSCOW
+
+
+def test_slot_runs_once(runs):
+    table, records = runs
+    calls = []
+
+    async def job(bot):
+        calls.append(bot)
+
+    async def scenario():
+        runner = JobRunner("bot", [JobSpec("daily", time(9, 0), job)])
+        slot = datetime(2026, 3, 2, 9, 0, tzinfo=MOSCOW)
+        assert await runner.run_slot(runner.jobs[0], slot) is True
+        assert await runner.run_slot(runner.jobs[0], slot) is False
+
+    asyncio.run(scenario())
+    assert calls == ["bot"]
+    assert [error for _, _, error in records] == [None]
+
+
+def test_catch_up_skips_never_run_job(runs):
+    table, records = runs
+
+    async def job(bot):
+        raise AssertionError("не должна запускаться")
+
+    async def scenario():
+        runner = JobRunner("bot", [JobSpec("daily", time(9, 0), job)])
+        slot = datetime(2026, 3, 2, 9, 0, tzinfo=MOSCOW)
+        assert await runner.run_slot(runner.jobs[0], slot, catch_up=True) is False
+
+    asyncio.run(scenario())
+    assert records == []
+
+
+def test_failed_job_is_recorded(runs):
+    table, records = runs
+
+    async def job(bot):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        runner = JobRunner("bot", [JobSpec("daily", time(9, 0), job)])
+        slot = datetime(2026, 3, 2, 9, 0, tzinfo=MOSCOW)
+        assert await runner.run_slot(runner.jobs[0], slot) is True
+        assert runner.stats["daily"].errors == 1
+
+    asyncio.run(scenario())
+    assert records[0][2] == "RuntimeError: boom"
@@ -0,0 +1,96 @@
+"""Тесты services.leader.LeaderElector (без БД: блокировка и проверка соединения подменены)."""
+
+import asyncio
+
+from services.leader import LeaderElector
+
+HEARTBEAT = 0.01
+
+
+def _elector(jobs, alive=True):
+    elector = LeaderElector(jobs, heartbeat=HEARTBEAT)
+    state = {"alive": alive}
+
+    async def try_acquire():
+        return True
+
+    async def is_alive():
+        return state["alive"]
+
+    elector._try_acquire = try_acquire
+    elector._is_alive = is_alive
+    return elector, state
+
+
+async def _never_acquire():
+    return False
+
+
+async def _until(predicate, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "условие не выполнилось"
+        await asyncio.sleep(HEARTBEAT)
+
+
+def test_crashed_job_is_restarted_while_leader():
+    runs = {"flaky": 0, "steady": 0}
+
+    async def flaky():
+        runs["flaky"] += 1
+        if runs["flaky"] < 3:
+            raise RuntimeError("сбой цикла")
+        await asyncio.Event().wait()
+
+    async def steady():
+        runs["steady"] += 1
+        await asyncio.Event().wait()
+
+    async def scenario():
+        elector, _ = _elector({"flaky": flaky, "steady": steady})
+        elector.start()
+        await _until(lambda: runs["flaky"] == 3)
+        await asyncio.sleep(HEARTBEAT * 5)
+        assert elector.is_leader
+        await elector.stop()
+
+    asyncio.run(scenario())
+    assert runs == {"flaky": 3, "steady": 1}
+
+
+def test_job_that_returns_is_restarted():
+    runs = []
+
+    async def one_shot():
+        runs.append(1)
+
+    async def scenario():
+        elector, _ = _elector({"one_shot": one_shot})
+        elector.start()
+        await _until(lambda: len(runs) >= 3)
+        await elector.stop()
+
+    asyncio.run(scenario())
+
+
+def test_jobs_are_not_restarted_after_leadership_is_lost():
+    runs = []
+
+    async def job():
+        runs.append(1)
+        await asyncio.Event().wait()
+
+    async def scenario():
+        elector, state = _elector({"job": job})
+        # Соединение пропало: задачи отменены, роль снова берётся только
+        # после новой блокировки.
+        elector._try_acquire = _never_acquire
+        elector._start_jobs()
+        state["alive"] = False
+        elector.start()
+        await _until(lambda: not elector.is_leader)
+        await asyncio.sleep(HEARTBEAT * 5)
+        await elector.stop()
+
+    asyncio.run(scenario())
+    assert runs == [1]
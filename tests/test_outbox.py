@@ -0,0 +1,106 @@
+"""Тесты доставки очереди services.outbox (без БД и Telegram)."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from config import config
+from core.constants import OUTBOX_STATUS_FAILED, OUTBOX_STATUS_PENDING, OUTBOX_STATUS_SENT
+from services import outbox
+from services.dispatcher import GROUP_CHAT_RATE
+
+
+class FakeDispatcher:
+    def __init__(self, fail_chats=()):
+        self.sent = []
+        self.fail_chats = set(fail_chats)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if chat_id in self.fail_chats:
+            raise ConnectionError("network down")
+        self.sent.append((chat_id, text))
+        return SimpleNamespace(message_id=len(self.sent))
+
+
+def _row(row_id, chat_id=-100, reply_markup=None):
+    return {
+        "id": row_id,
+        "chat_id": chat_id,
+        "text": f"text {row_id}",
+        "parse_mode": None,
+        "reply_markup": reply_markup,
+        "attempts": 1,
+    }
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    state = SimpleNamespace(rows=[], lease=None, completed=[], dispatcher=FakeDispatcher())
+
+    async def claim_batch(limit, lease_seconds):
+        state.lease = lease_seconds
+        return state.rows[:limit]
+
+    async def complete_batch(ids, statuses, errors, message_ids, retry_delays):
+        state.completed.append((ids, statuses, errors, message_ids, retry_delays))
+
+    monkeypatch.setattr(outbox, "claim_batch", claim_batch)
+    monkeypatch.setattr(outbox, "complete_batch", complete_batch)
+    monkeypatch.setattr(outbox, "get_dispatcher", lambda bot: state.dispatcher)
+    return state
+
+
+def test_lease_covers_batch_to_one_group_chat():
+    # 50 сообщений в одну группу по 20 в минуту — около 150 секунд.
+    assert outbox._lease_seconds(50) > 50 / GROUP_CHAT_RATE
+    assert outbox._lease_seconds(100) > outbox._lease_seconds(50)
+
+
+def test_lease_follows_slowest_configured_rate(monkeypatch):
+    monkeypatch.setattr(config, "TELEGRAM_CHAT_RATE", 0.1)
+    assert outbox._lease_seconds(50) >= 50 / 0.1
+
+
+def test_rows_are_completed_one_by_one(queue):
+    queue.rows = [_row(1), _row(2), _row(3)]
+    assert asyncio.run(outbox.deliver_pending(bot=None, batch_size=50)) == 3
+    assert queue.lease == outbox._lease_seconds(50)
+    assert sorted(ids for ids, *_ in queue.completed) == [[1], [2], [3]]
+    assert all(statuses == [OUTBOX_STATUS_SENT] for _, statuses, *_ in queue.completed)
+
+
+def test_malformed_row_is_failed_and_others_are_sent(queue):
+    queue.rows = [_row(1), _row(2, reply_markup="{not json"), _row(3)]
+    assert asyncio.run(outbox.deliver_pending(bot=None, batch_size=50)) == 3
+
+    outcomes = {ids[0]: (statuses[0], errors[0]) for ids, statuses, errors, _, _ in queue.completed}
+    assert outcomes[1] == (OUTBOX_STATUS_SENT, None)
+    assert outcomes[3] == (OUTBOX_STATUS_SENT, None)
+    assert outcomes[2][0] == OUTBOX_STATUS_FAILED
+    assert outcomes[2][1].startswith("JSONDecodeError")
+    assert [text for _, text in queue.dispatcher.sent] == ["text 1", "text 3"]
+
+
+def test_send_error_is_retried_later(queue):
+    queue.dispatcher = FakeDispatcher(fail_chats={7})
+    queue.rows = [_row(1, chat_id=7), _row(2)]
+    asyncio.run(outbox.deliver_pending(bot=None, batch_size=50))
+
+    outcomes = {ids[0]: (statuses[0], delays[0]) for ids, statuses, _, _, delays in queue.completed}
+    assert outcomes[1] == (OUTBOX_STATUS_PENDING, float(outbox._RETRY_BASE_SECONDS))
+    assert outcomes[2] == (OUTBOX_STATUS_SENT, 0.0)
+
+
+def test_completion_error_does_not_stop_other_rows(queue, monkeypatch):
+    completed = []
+
+    async def complete_batch(ids, statuses, errors, message_ids, retry_delays):
+        if ids == [1]:
+            raise ConnectionError("db down")
+        completed.append(ids)
+
+    monkeypatch.setattr(outbox, "complete_batch", complete_batch)
+    queue.rows = [_row(1), _row(2)]
+    assert asyncio.run(outbox.deliver_pending(bot=None, batch_size=50)) == 2
+    assert completed == [[2]]
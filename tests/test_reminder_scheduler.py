@@ -0,0 +1,191 @@
+"""Тесты загрузки таймеров services.reminder_scheduler (без БД)."""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from core.constants import NOTIFICATION_COMPLETION_REMINDER, NOTIFICATION_REMINDER
+from services import reminder_scheduler
+from services.timer_scheduler import TimerScheduler
+
+
+def _reminder(clock, event_id, telegram_id, due_in, notification_type=NOTIFICATION_REMINDER):
+    start_time = clock.now + due_in + timedelta(minutes=30)
+    return {
+        "notification_type": notification_type,
+        "event_id": event_id,
+        "telegram_id": telegram_id,
+        "start_time": start_time,
+        "end_time": start_time + timedelta(hours=1),
+        "due_at": clock.now + due_in,
+    }
+
+
+@pytest.fixture
+def scheduler(clock, monkeypatch):
+    """Подменяет планировщик и обращения к БД модуля reminder_scheduler."""
+    scheduler = TimerScheduler(clock=clock)
+    monkeypatch.setattr(reminder_scheduler, "_scheduler", scheduler)
+    scheduler.rows = []
+    scheduler.auto_complete_times = []
+    scheduler.enqueued = []
+
+    async def find_scheduled_reminders(until, event_id=None):
+        return [row for row in scheduler.rows if event_id is None or row["event_id"] == event_id]
+
+    async def find_auto_complete_times(until, event_id=None):
+        return list(scheduler.auto_complete_times)
+
+    async def enqueue_due_reminder(reminder):
+        scheduler.enqueued.append(reminder_scheduler._reminder_key(reminder))
+        return True
+
+    monkeypatch.setattr(reminder_scheduler, "find_scheduled_reminders", find_scheduled_reminders)
+    monkeypatch.setattr(reminder_scheduler, "find_auto_complete_times", find_auto_complete_times)
+    monkeypatch.setattr(reminder_scheduler, "enqueue_due_reminder", enqueue_due_reminder)
+    monkeypatch.setattr(reminder_scheduler, "_pending_invalidations", set())
+    monkeypatch.setattr(reminder_scheduler, "_full_reload_requested", False)
+    return scheduler
+
+
+async def _run_due(scheduler):
+    scheduler.run_due()
+    await asyncio.sleep(0)
+
+
+def test_reload_does_not_duplicate_timers(clock, scheduler):
+    async def scenario():
+        scheduler.rows = [
+            _reminder(clock, 1, 10, timedelta(minutes=5)),
+            _reminder(clock, 1, 11, timedelta(minutes=5)),
+        ]
+        await reminder_scheduler.reload_timers()
+        await reminder_scheduler.reload_timers()
+        assert len(scheduler) == 2
+
+        clock.advance(minutes=5)
+        await _run_due(scheduler)
+        assert sorted(scheduler.enqueued) == [
+            (NOTIFICATION_REMINDER, 1, 10),
+            (NOTIFICATION_REMINDER, 1, 11),
+        ]
+
+    asyncio.run(scenario())
+
+
+def test_reload_moves_and_drops_timers(clock, scheduler):
+    async def scenario():
+        scheduler.rows = [
+            _reminder(clock, 1, 10, timedelta(minutes=5)),
+            _reminder(clock, 2, 10, timedelta(minutes=5)),
+        ]
+        await reminder_scheduler.reload_timers()
+
+        # Мероприятие 1 перенесли на 20 минут, мероприятие 2 отменили.
+        scheduler.rows = [_reminder(clock, 1, 10, timedelta(minutes=25))]
+        await reminder_scheduler.reload_timers()
+        assert scheduler.keys() == [(NOTIFICATION_REMINDER, 1, 10)]
+
+        clock.advance(minutes=5)
+        await _run_due(scheduler)
+        assert scheduler.enqueued == []
+        clock.advance(minutes=20)
+        await _run_due(scheduler)
+        assert scheduler.enqueued == [(NOTIFICATION_REMINDER, 1, 10)]
+
+    asyncio.run(scenario())
+
+
+def test_overdue_reminders_fire_right_after_load(clock, scheduler):
+    async def scenario():
+        scheduler.rows = [
+            _reminder(clock, 1, 10, -timedelta(minutes=10), NOTIFICATION_COMPLETION_REMINDER),
+            _reminder(clock, 2, 10, timedelta(minutes=10)),
+        ]
+        await reminder_scheduler.reload_timers()
+        await _run_due(scheduler)
+        assert scheduler.enqueued == [(NOTIFICATION_COMPLETION_REMINDER, 1, 10)]
+        assert scheduler.keys() == [(NOTIFICATION_REMINDER, 2, 10)]
+
+    asyncio.run(scenario())
+
+
+def test_reload_after_fire_schedules_again_only_if_still_due(clock, scheduler):
+    async def scenario():
+        row = _reminder(clock, 1, 10, timedelta(minutes=1))
+        scheduler.rows = [row]
+        await reminder_scheduler.reload_timers()
+        clock.advance(minutes=1)
+        await _run_due(scheduler)
+
+        # Уже отправленное напоминание выборка больше не возвращает.
+        scheduler.rows = []
+        await reminder_scheduler.reload_timers()
+        await _run_due(scheduler)
+        assert scheduler.enqueued == [(NOTIFICATION_REMINDER, 1, 10)]
+        assert len(scheduler) == 0
+
+    asyncio.run(scenario())
+
+
+def test_reload_event_replaces_only_its_group(clock, scheduler):
+    async def scenario():
+        scheduler.rows = [
+            _reminder(clock, 1, 10, timedelta(minutes=5)),
+            _reminder(clock, 2, 10, timedelta(minutes=5)),
+        ]
+        await reminder_scheduler.reload_timers()
+
+        # Инженеру 10 сняли назначение на мероприятие 1, назначили инженера 11.
+        scheduler.rows = [
+            _reminder(clock, 1, 11, timedelta(minutes=5)),
+            _reminder(clock, 2, 10, timedelta(minutes=5)),
+        ]
+        await reminder_scheduler._reload_event(1)
+        assert sorted(scheduler.keys()) == [
+            (NOTIFICATION_REMINDER, 1, 11),
+            (NOTIFICATION_REMINDER, 2, 10),
+        ]
+
+    asyncio.run(scenario())
+
+
+def test_auto_complete_times_are_deduplicated(clock, scheduler, monkeypatch):
+    async def scenario():
+        runs = []
+
+        async def auto_complete_events():
+            runs.append(clock.now)
+            return []
+
+        monkeypatch.setattr(reminder_scheduler, "auto_complete_events", auto_complete_events)
+        when = clock.now + timedelta(minutes=3)
+        scheduler.auto_complete_times = [clock.now - timedelta(minutes=1), when]
+        await reminder_scheduler.reload_timers()
+        await reminder_scheduler.reload_timers()
+        assert len(scheduler) == 2
+
+        await _run_due(scheduler)
+        assert len(runs) == 1
+        clock.advance(minutes=3)
+        await _run_due(scheduler)
+        assert len(runs) == 2
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_notification_queues_event_reload(scheduler):
+    reminder_scheduler._reload_requested.clear()
+    reminder_scheduler._on_reminder_invalidate(None, 1, reminder_scheduler.REMINDER_CHANNEL, "42")
+    assert reminder_scheduler._pending_invalidations == {42}
+    assert reminder_scheduler._reload_requested.is_set()
+    assert reminder_scheduler._full_reload_requested is False
+
+
+def test_malformed_notification_requests_full_reload(scheduler):
+    reminder_scheduler._reload_requested.clear()
+    reminder_scheduler._on_reminder_invalidate(None, 1, reminder_scheduler.REMINDER_CHANNEL, "oops")
+    assert reminder_scheduler._pending_invalidations == set()
+    assert reminder_scheduler._full_reload_requested is True
+    assert reminder_scheduler._reload_requested.is_set()
@@ -0,0 +1,87 @@
+"""Замер времени старта бота до и после ленивого создания клиента Google Calendar.
+
+Раньше `services.google_calendar` создавал клиент при импорте: чтение
+`token.json`, обновление токена и `discovery.build` — сетевые запросы к
+Google — выполнялись до запуска бота. Теперь клиент создаётся при первом
+вызове `get_calendar_client()`.
+
+Каждый вариант запускается в отдельном процессе, чтобы импорт был
+«холодным». Обращения к Google в дочернем процессе заменены паузой
+`GOOGLE_DELAY_SECONDS` (медленный Google), сами библиотеки — настоящие.
+Запуск с выводом времени:
+    python -m pytest -q -s tests/test_startup_time.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Задержка каждого обращения к Google в дочернем процессе.
+GOOGLE_DELAY_SECONDS = 0.5
+
+_CHILD = """
+import json, sys, time
+from types import SimpleNamespace
+
+import google.oauth2.credentials
+import googleapiclient.discovery
+
+delay = float(sys.argv[2])
+calls = []
+
+def slow(name, result):
+    def call(*args, **kwargs):
+        calls.append(name)
+        time.sleep(delay)
+        return result
+    return call
+
+google.oauth2.credentials.Credentials.from_authorized_user_file = slow(
+    "token", SimpleNamespace(valid=True)
+)
+googleapiclient.discovery.build = slow("discovery", object())
+
+started = time.perf_counter()
+import main
+if sys.argv[1] == "eager":
+    # Прежнее поведение: `calendar_client = GoogleCalendarClient()` при импорте.
+    from services.google_calendar import GoogleCalendarClient
+    GoogleCalendarClient()
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "google_calls": calls}))
+"""
+
+
+def _startup(mode, tmp_path):
+    # Пустой token.json: конструктор клиента идёт по пути «токен уже есть».
+    (tmp_path / "token.json").write_text("{}")
+    env = dict(os.environ, PYTHONPATH=str(ROOT), BOT_TOKEN="test-token")
+    env.setdefault("DATABASE_URL", "postgresql://test@localhost/test")
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD, mode, str(GOOGLE_DELAY_SECONDS)],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_startup_does_not_wait_for_google(tmp_path):
+    before = _startup("eager", tmp_path)
+    after = _startup("lazy", tmp_path)
+    print(
+        f"\nстарт (import main): с клиентом при импорте {before['seconds']:.2f} с, "
+        f"с ленивым клиентом {after['seconds']:.2f} с"
+    )
+
+    assert before["google_calls"] == ["token", "discovery"]
+    assert before["seconds"] >= 2 * GOOGLE_DELAY_SECONDS
+    assert after["google_calls"] == []
+    assert after["seconds"] < before["seconds"]
@@ -0,0 +1,149 @@
+"""Тесты services.timer_scheduler на виртуальных часах."""
+
+import asyncio
+from datetime import timedelta
+
+from services.timer_scheduler import _COMPACT_SLACK, TimerScheduler
+
+
+def _recorder(fired, name):
+    async def callback():
+        fired.append(name)
+    return callback
+
+
+async def _run_due(scheduler):
+    """Запускает наступившие таймеры и дожидается их колбэков."""
+    count = scheduler.run_due()
+    await asyncio.sleep(0)
+    return count
+
+
+def test_fires_in_due_order(clock):
+    async def scenario():
+        scheduler = TimerScheduler(clock=clock)
+        fired = []
+        scheduler.schedule("c", clock.now + timedelta(minutes=3), _recorder(fired, "c"))
+        scheduler.schedule("a", clock.now + timedelta(minutes=1), _recorder(fired, "a"))
+        scheduler.schedule("b", clock.now + timedelta(minutes=2), _recorder(fired, "b"))
+
+        assert await _run_due(scheduler) == 0
+        assert scheduler.next_due() == clock.now + timedelta(minutes=1)
+
+        clock.advance(minutes=2)
+        assert await _run_due(scheduler) == 2
+        assert fired == ["a", "b"]
+
+        clock.advance(minutes=1)
+        await _run_due(scheduler)
+        assert fired == ["a", "b", "c"]
+        assert len(scheduler) == 0
+        assert scheduler.next_due() is None
+
+    asyncio.run(scenario())
+
+
+def test_same_time_fires_in_schedule_order(clock):
+    async def scenario():
+        scheduler = TimerScheduler(clock=clock)
+        fired = []
+        when = clock.now + timedelta(minutes=5)
+        for name in ("first", "second", "third"):
+            scheduler.schedule(name, when, _recorder(fired, name))
+        clock.advance(minutes=5)
+        await _run_due(scheduler)
+        assert fired == ["first", "second", "third"]
+
+    asyncio.run(scenario())
+
+
+def test_overdue_timer_fires_on_first_run(clock):
+    async def scenario():
+        scheduler = TimerScheduler(clock=clock)
+        fired = []
+        scheduler.schedule("late", clock.now - timedelta(hours=1), _recorder(fired, "late"))
+        assert await _run_due(scheduler) == 1
+        assert fired == ["late"]
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_timer_does_not_fire(clock):
+    async def scenario():
+        scheduler = TimerScheduler(clock=clock)
+        fired = []
+        scheduler.schedule("a", clock.now + timedelta(minutes=1), _recorder(fired, "a"))
+        scheduler.schedule("b", clock.now + timedelta(minutes=2), _recorder(fired, "b"))
+
+        assert scheduler.cancel("a") is True
+        assert scheduler.cancel("a") is False
+        # Отменённая запись остаётся в куче, но не считается ближайшей.
+        assert scheduler.next_due() == clock.now + timedelta(minutes=2)
+
+        clock.advance(minutes=5)
+        await _run_due(scheduler)
+        assert fired == ["b"]
+
+    asyncio.run(scenario())
+
+
+def test_reschedule_replaces_timer(clock):
+    async def scenario():
+        scheduler = TimerScheduler(clock=clock)
+        fired = []
+        scheduler.schedule("a", clock.now + timedelta(minutes=1), _recorder(fired, "old"))
+        scheduler.schedule("a", clock.now + timedelta(minutes=10), _recorder(fired, "new"))
+        assert len(scheduler) == 1
+
+        clock.advance(minutes=5)
+        assert await _run_due(scheduler) == 0
+        clock.advance(minutes=5)
+        await _run_due(scheduler)
+        assert fired == ["new"]
+
+    asyncio.run(scenario())
+
+
+def test_cancel_group(clock):
+    async def scenario():
+        scheduler = TimerScheduler(clock=clock)
+        fired = []
+        when = clock.now + timedelta(minutes=1)
+        scheduler.schedule(("reminder", 1, 10), when, _recorder(fired, "1/10"), group=1)
+        scheduler.schedule(("reminder", 1, 11), when, _recorder(fired, "1/11"), group=1)
+        scheduler.schedule(("reminder", 2, 10), when, _recorder(fired, "2/10"), group=2)
+
+        assert scheduler.cancel_group(1) == 2
+        assert scheduler.cancel_group(1) == 0
+        clock.advance(minutes=1)
+        await _run_due(scheduler)
+        assert fired == ["2/10"]
+
+    asyncio.run(scenario())
+
+
+def test_heap_is_compacted_after_many_reschedules(clock):
+    async def scenario():
+        scheduler = TimerScheduler(clock=clock)
+        for minute in range(1000):
+            scheduler.schedule("a", clock.now + timedelta(minutes=minute), _recorder([], "a"))
+        assert len(scheduler) == 1
+        assert len(scheduler._heap) <= 2 + _COMPACT_SLACK + 1
+
+    asyncio.run(scenario())
+
+
+def test_callback_error_does_not_stop_other_timers(clock):
+    async def scenario():
+        scheduler = TimerScheduler(clock=clock)
+        fired = []
+
+        async def broken():
+            raise RuntimeError("boom")
+
+        scheduler.schedule("broken", clock.now, broken)
+        scheduler.schedule("ok", clock.now, _recorder(fired, "ok"))
+        assert await _run_due(scheduler) == 2
+        assert fired == ["ok"]
+
+    asyncio.run(scenario())
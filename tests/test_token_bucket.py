@@ -0,0 +1,48 @@
+"""Тесты services.dispatcher.TokenBucket на виртуальном монотонном времени."""
+
+import asyncio
+
+import pytest
+
+from services.dispatcher import TokenBucket
+
+
+def _acquire(bucket, times):
+    async def scenario():
+        for _ in range(times):
+            await bucket.acquire()
+
+    asyncio.run(scenario())
+
+
+def test_burst_up_to_capacity_without_waiting(monotonic):
+    bucket = TokenBucket(rate=10, capacity=5, clock=monotonic)
+    _acquire(bucket, 5)
+    assert monotonic.sleeps == []
+
+
+def test_waits_for_refill_after_burst(monotonic):
+    bucket = TokenBucket(rate=2, capacity=1, clock=monotonic)
+    _acquire(bucket, 3)
+    # Первый токен — из запаса, следующие — по одному каждые 0.5 сек.
+    assert monotonic.sleeps == pytest.approx([0.5, 0.5])
+    assert monotonic.now == pytest.approx(1001.0)
+
+
+def test_refill_is_capped_by_capacity(monotonic):
+    bucket = TokenBucket(rate=1, capacity=2, clock=monotonic)
+    _acquire(bucket, 2)
+    monotonic.now += 60
+    _acquire(bucket, 2)
+    assert monotonic.sleeps == []
+    _acquire(bucket, 1)
+    assert monotonic.sleeps == pytest.approx([1.0])
+
+
+def test_idle_after_ttl(monotonic):
+    bucket = TokenBucket(rate=1, capacity=1, clock=monotonic)
+    _acquire(bucket, 1)
+    monotonic.now += 299
+    assert bucket.is_idle(300) is False
+    monotonic.now += 1
+    assert bucket.is_idle(300) is True
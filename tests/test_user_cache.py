@@ -0,0 +1,85 @@
+"""Тесты кэша пользователей repositories.users (без БД)."""
+
+import asyncio
+
+import pytest
+
+from repositories import users
+
+
+class _SlowPool:
+    """Пул, чей `fetchrow` ждёт разрешения — чтобы вклиниться в середину чтения."""
+
+    def __init__(self, row):
+        self.row = row
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.queries = 0
+
+    async def fetchrow(self, query, *args):
+        self.queries += 1
+        self.started.set()
+        await self.release.wait()
+        return dict(self.row)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    users.clear_user_cache()
+    yield
+    users.clear_user_cache()
+
+
+def _read_with(monkeypatch, interrupt):
+    async def scenario():
+        pool = _SlowPool({"telegram_id": 10, "role": "engineer"})
+        monkeypatch.setattr(users, "get_db_pool", lambda: pool)
+        fetch = asyncio.create_task(users.get_user(10))
+        await pool.started.wait()
+        interrupt()
+        pool.release.set()
+        user = await fetch
+        return user, pool
+
+    return asyncio.run(scenario())
+
+
+def test_fetched_user_is_cached(monkeypatch):
+    user, pool = _read_with(monkeypatch, lambda: None)
+    assert user["role"] == "engineer"
+    assert 10 in users._cache
+
+
+def test_invalidation_during_fetch_is_not_overwritten(monkeypatch):
+    user, pool = _read_with(monkeypatch, lambda: users.invalidate_user(10))
+    # Вызывающий код получает прочитанную строку, но кэш остаётся пустым.
+    assert user["role"] == "engineer"
+    assert 10 not in users._cache
+
+
+def test_cache_clear_during_fetch_is_not_overwritten(monkeypatch):
+    user, pool = _read_with(monkeypatch, users.clear_user_cache)
+    assert 10 not in users._cache
+
+
+def test_invalidation_of_other_user_does_not_block_store(monkeypatch):
+    user, pool = _read_with(monkeypatch, lambda: users.invalidate_user(11))
+    assert 10 in users._cache
+
+
+def test_cancelled_flush_keeps_pending_marks(monkeypatch):
+    async def scenario():
+        pool = _SlowPool({})
+        pool.execute = pool.fetchrow
+        monkeypatch.setattr(users, "get_db_pool", lambda: pool)
+        buffer = users.LastActiveBuffer()
+        buffer.touch(10)
+        flush = asyncio.create_task(buffer.flush())
+        await pool.started.wait()
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert len(buffer) == 1
@@ -142,6 +142,15 @@ class AuditoryNormalizer:
         key = _normalize_key(raw_name)
         return cls.ALIASES.get(key, raw_name.strip())
 
+    @staticmethod
+    def normalize_key(name: str) -> str:
+        """
+        Возвращает нормализованный ключ строки (тот же, что у ключей `ALIASES`).
+
+        Используется для построения индексов поиска аудиторий вне этого модуля.
+        """
+        return _normalize_key(name)
+
     @classmethod
     def add_alias(cls, variant: str, correct_name: str) -> None:
         """
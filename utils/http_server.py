@@ -0,0 +1,170 @@
+"""Минимальный встроенный HTTP‑сервер на asyncio.
+
+Задачи модуля:
+- принимать простые HTTP/1.1 запросы (вебхуки Google, служебные эндпоинты)
+  в том же процессе и event loop, что и бот;
+- не тянуть в проект отдельный веб‑фреймворк ради пары маршрутов.
+
+Ограничения:
+    ⚠️ ВНИМАНИЕ: сервер рассчитан на внутренние служебные маршруты за
+    reverse proxy (nginx и т.п.), который терминирует TLS. Поддерживаются
+    только запросы с `Content-Length` (без chunked), соединение закрывается
+    после каждого ответа.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Максимальный размер тела запроса и заголовков (байт).
+_MAX_BODY_SIZE = 64 * 1024
+_MAX_HEADER_LINES = 100
+_READ_TIMEOUT = 10
+
+_REASONS = {
+    200: "OK",
+    204: "No Content",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+@dataclass
+class HttpRequest:
+    """Разобранный HTTP‑запрос. Имена заголовков приведены к нижнему регистру."""
+
+    method: str
+    path: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+
+@dataclass
+class HttpResponse:
+    """Ответ обработчика маршрута."""
+
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "text/plain; charset=utf-8"
+
+
+RouteHandler = Callable[[HttpRequest], Awaitable[HttpResponse]]
+
+
+class SimpleHttpServer:
+    """
+    HTTP‑сервер с таблицей маршрутов `(метод, путь) -> обработчик`.
+
+    Использование:
+        server = SimpleHttpServer(host, port)
+        server.add_route("POST", "/google/calendar/push", handler)
+        await server.start()
+        ...
+        await server.stop()
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._routes: Dict[Tuple[str, str], RouteHandler] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def add_route(self, method: str, path: str, handler: RouteHandler) -> None:
+        """Регистрирует обработчик для пары метод + путь (без query string)."""
+        self._routes[(method.upper(), path)] = handler
+
+    async def start(self) -> None:
+        """Начинает принимать соединения."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        logger.info(f"HTTP‑сервер слушает {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        """Прекращает приём соединений и закрывает сокет."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            logger.info("HTTP‑сервер остановлен")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                request = await asyncio.wait_for(self._read_request(reader), timeout=_READ_TIMEOUT)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                logger.debug(f"Некорректный HTTP‑запрос: {e}")
+                await self._write_response(writer, HttpResponse(status=400))
+                return
+
+            if request is None:
+                await self._write_response(writer, HttpResponse(status=413))
+                return
+
+            handler = self._routes.get((request.method, request.path))
+            if handler is None:
+                known_path = any(path == request.path for _, path in self._routes)
+                await self._write_response(writer, HttpResponse(status=405 if known_path else 404))
+                return
+
+            try:
+                response = await handler(request)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика {request.method} {request.path}: {e}", exc_info=True)
+                response = HttpResponse(status=500)
+            await self._write_response(writer, response)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[HttpRequest]:
+        """Читает запрос. Возвращает None, если тело превышает допустимый размер."""
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        method, target, _version = request_line.split(" ", 2)
+
+        headers: Dict[str, str] = {}
+        for _ in range(_MAX_HEADER_LINES):
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise ValueError("слишком много заголовков")
+
+        length = int(headers.get("content-length", "0") or 0)
+        if length > _MAX_BODY_SIZE:
+            return None
+        body = await reader.readexactly(length) if length else b""
+
+        return HttpRequest(
+            method=method.upper(),
+            path=target.split("?", 1)[0],
+            headers=headers,
+            body=body,
+        )
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, response: HttpResponse) -> None:
+        reason = _REASONS.get(response.status, "")
+        head = (
+            f"HTTP/1.1 {response.status} {reason}\r\n"
+            f"Content-Type: {response.content_type}\r\n"
+            f"Content-Length: {len(response.body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + response.body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
@@ -0,0 +1,227 @@
+"""Простые метрики времени выполнения в памяти процесса.
+
+Задачи модуля:
+- накапливать статистику длительности повторяющихся операций
+  (фоновые задачи, запросы к внешним API);
+- считать перцентили длительностей (`LatencyHistogram`) для запросов к БД,
+  ожидания соединения из пула и обработчиков Telegram;
+- выводить гистограммы и счётчики в текстовом формате Prometheus;
+- отдавать сводку для логов и админ‑панели без внешних зависимостей.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass
+class TimingStats:
+    """
+    Статистика длительностей одной операции (в секундах).
+
+    Использование:
+        stats = TimingStats()
+        stats.add(0.42)
+        stats.summary()  # 'n=1 avg=0.420s min=0.420s max=0.420s last=0.420s'
+    """
+
+    count: int = 0
+    total: float = 0.0
+    min: float = math.inf
+    max: float = 0.0
+    last: Optional[float] = None
+    errors: int = 0
+
+    def add(self, seconds: float, error: bool = False) -> None:
+        """Учитывает одно выполнение; `error=True` — выполнение завершилось ошибкой."""
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.last = seconds
+        if error:
+            self.errors += 1
+
+    @property
+    def avg(self) -> float:
+        """Средняя длительность (0, если выполнений не было)."""
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> str:
+        """Краткая строка для логов."""
+        if not self.count:
+            return "n=0"
+        text = (
+            f"n={self.count} avg={self.avg:.3f}s min={self.min:.3f}s "
+            f"max={self.max:.3f}s last={self.last:.3f}s"
+        )
+        if self.errors:
+            text += f" errors={self.errors}"
+        return text
+
+
+# Верхние границы корзин гистограммы, секунды (как в клиентах Prometheus).
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+@dataclass
+class LatencyHistogram:
+    """
+    Гистограмма длительностей с фиксированными корзинами.
+
+    Память не растёт с числом измерений, поэтому гистограмму можно держать
+    на каждый запрос или обработчик всё время работы процесса.
+
+    Использование:
+        hist = LatencyHistogram()
+        hist.observe(0.004)
+        hist.observe(0.3)
+        hist.percentile(0.5)  # 0.005 — верхняя граница корзины
+        hist.summary()        # 'n=2 p50=5ms p95=300ms p99=300ms max=300ms'
+
+    Примечания:
+        ⚠️ ВНИМАНИЕ: перцентиль считается с точностью до корзины
+        (возвращается её верхняя граница, но не больше максимума).
+        Для подбора размера пула и поиска медленных запросов этого достаточно.
+    """
+
+    buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS
+    counts: List[int] = field(default_factory=list)
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    errors: int = 0
+
+    def __post_init__(self) -> None:
+        # Последняя корзина — всё, что больше последней границы (+Inf).
+        if not self.counts:
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        """Учитывает одно измерение; `error=True` — операция завершилась ошибкой."""
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if error:
+            self.errors += 1
+
+    @property
+    def avg(self) -> float:
+        """Средняя длительность (0, если измерений не было)."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        Возвращает оценку перцентиля `q` (0 < q <= 1), секунды.
+
+        Возвращает:
+            Верхнюю границу корзины, в которую попал перцентиль, но не больше
+            наблюдавшегося максимума; 0, если измерений не было.
+        """
+        if not self.count:
+            return 0.0
+        rank = math.ceil(q * self.count)
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index < len(self.buckets):
+                    return min(self.buckets[index], self.max)
+                break
+        return self.max
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """Пары (верхняя граница, число измерений не больше неё), последняя — `inf`."""
+        result = []
+        seen = 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), self.counts):
+            seen += bucket_count
+            result.append((bound, seen))
+        return result
+
+    def summary(self) -> str:
+        """Краткая строка для логов и админ‑панели (миллисекунды)."""
+        if not self.count:
+            return "n=0"
+        text = (
+            f"n={self.count} p50={self.percentile(0.5) * 1000:.0f}ms "
+            f"p95={self.percentile(0.95) * 1000:.0f}ms "
+            f"p99={self.percentile(0.99) * 1000:.0f}ms max={self.max * 1000:.0f}ms"
+        )
+        if self.errors:
+            text += f" errors={self.errors}"
+        return text
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == math.inf else repr(bound)
+
+
+class PrometheusText:
+    """
+    Построитель ответа в текстовом формате Prometheus (version 0.0.4).
+
+    Использование:
+        text = PrometheusText()
+        text.gauge("otskvm_db_connections_in_use", "Занятые соединения пула", [({}, 3)])
+        text.histogram("otskvm_handler_duration_seconds", "Длительность обработчиков",
+                       [({"handler": "start"}, hist)])
+        body = text.render()
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self) -> None:
+        self._lines: List[str] = []
+
+    def _header(self, name: str, help_text: str, kind: str) -> None:
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {kind}")
+
+    def gauge(self, name: str, help_text: str, series: Iterable[Tuple[Dict[str, str], float]]) -> None:
+        """Добавляет метрику‑значение: пары (метки, значение)."""
+        self._header(name, help_text, "gauge")
+        for labels, value in series:
+            self._lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    def counter(self, name: str, help_text: str, series: Iterable[Tuple[Dict[str, str], float]]) -> None:
+        """Добавляет счётчик (имя должно оканчиваться на `_total`)."""
+        self._header(name, help_text, "counter")
+        for labels, value in series:
+            self._lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        series: Iterable[Tuple[Dict[str, str], LatencyHistogram]],
+    ) -> None:
+        """Добавляет гистограммы: корзины `_bucket`, `_sum` и `_count` на каждый набор меток."""
+        self._header(name, help_text, "histogram")
+        for labels, histogram in series:
+            for bound, seen in histogram.cumulative():
+                bucket_labels = dict(labels, le=_format_bound(bound))
+                self._lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {seen}")
+            self._lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total}")
+            self._lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+    def render(self) -> bytes:
+        """Тело HTTP‑ответа."""
+        return ("\n".join(self._lines) + "\n").encode("utf-8")
@@ -6,7 +6,7 @@ from typing import List, Callable, Any
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from database import Database, get_db_pool
+from repositories.users import get_user, update_user_role
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +37,7 @@ class RoleError(Exception):
 
 async def get_user_role(user_id: int) -> str:
     """
-    Получает роль пользователя из БД.
+    Получает роль пользователя (из кэша `repositories.users`).
     
     Args:
         user_id: Telegram ID пользователя
@@ -45,7 +45,7 @@ async def get_user_role(user_id: int) -> str:
     Returns:
         str: роль пользователя (по умолчанию 'engineer')
     """
-    user = await Database.get_user(user_id)
+    user = await get_user(user_id)
     return user.get('role', 'engineer') if user else 'engineer'
 
 
@@ -168,13 +168,9 @@ async def set_user_role(admin_id: int, target_user_id: int, new_role: str) -> bo
         logger.error(f"Недопустимая роль: {new_role}")
         return False
     
-    # Обновляем роль в БД
-    pool = get_db_pool()
-    await pool.execute(
-        "UPDATE users SET role = $1 WHERE telegram_id = $2",
-        new_role,
-        target_user_id,
-    )
+    # Обновляем роль в БД и в кэше пользователей (другие экземпляры бота
+    # получат уведомление users_changed от триггера)
+    await update_user_role(target_user_id, new_role)
     
     logger.info(f"Роль пользователя {target_user_id} изменена на {new_role}")
     return True
\ No newline at end of file